@@ -23,6 +23,8 @@ class OutputConfig:
     classified_dir: str = "1_分类结果"
     processed_dxf_dir: str = "2_DXF处理结果"
     merged_dir: str = "3_合并文件"
+    # 预检未通过的DXF移到此目录（与其他结果目录同级）
+    quarantine_dir: str = "0_隔离文件"
 
 
 @dataclass(frozen=True)
@@ -34,6 +36,27 @@ class InventoryConfig:
 class SolidWorksConfig:
     template_dir: str = "template"
     visible: bool = False
+    early_binding: bool = False
+    # 记录COM调用耗时直方图和转换步骤耗时，写入运行报告
+    com_trace: bool = True
+    # drawing: 打开工程图整页导出; flat_pattern: 钣金零件直接导出展开图
+    export_mode: str = "drawing"
+    # 导出格式，英文分号分隔，如 dxf;pdf;dwg（DXF始终导出）
+    export_formats: str = "dxf"
+    # 工程图打开模式: normal / read_only / view_only / detailing（未知值按 normal）；
+    # view_only 不能修改文档，导出时不设置视图比例、不替换模板
+    open_mode: str = "normal"
+    lightweight_references: bool = False
+    # 排程前不经SolidWorks读取工程图元数据（参考文件、图幅、图纸数量）
+    read_drawing_metadata: bool = True
+    # 工程图及参考文件都未变化时跳过转换（依赖记录保存在输出文件旁的 .deps.json）
+    skip_unchanged: bool = True
+    # 转换前把工程图和参考文件复制到本地缓存目录（留空使用系统临时目录）
+    staging_enabled: bool = False
+    staging_dir: str = ""
+    staging_workers: int = 4
+    # 常驻SolidWorks会话空闲多久后释放连接
+    session_idle_minutes: int = 15
 
 
 @dataclass(frozen=True)
@@ -42,6 +65,39 @@ class DxfConfig:
     text_color: int = 2
     text_height: float = 50.0
     spacing: float = 100.0
+    # 标注方式: dom 完整加载文档; stream 逐组码流式处理（不支持时自动退回 dom）
+    annotation_mode: str = "dom"
+    # DXF标注进程数（0表示使用全部CPU核心）及每次提交的文件数
+    annotation_workers: int = 0
+    annotation_chunk_size: int = 4
+    # 合并后保持显示的图层（英文分号分隔），其他图层关闭
+    merge_visible_layers: str = "0;细实线层"
+    # 合并时只导入上述图层的实体，其他图层的实体不复制到合并文件
+    merge_import_visible_only: bool = False
+    # 几何相同的零件共用一个块定义
+    merge_dedup_blocks: bool = True
+    # 并行合并的进程数（0表示使用全部CPU核心，1为逐组合并）及内存预算（MB，0表示按可用内存自动计算）
+    merge_workers: int = 0
+    merge_memory_budget_mb: int = 0
+    # 合并文件分片上限（实体数、估算文件大小MB、排版宽度），0表示不限制
+    merge_max_entities: int = 0
+    merge_max_file_mb: int = 0
+    merge_max_width: float = 0.0
+    # 标注结果（中间文件）和合并结果（最终文件）写出为二进制DXF
+    binary_intermediate: bool = False
+    binary_final: bool = False
+    # 流式合并：导入完成的块实体写到临时文件，内存占用不随组内零件数增长（只能写出ASCII DXF）
+    merge_streaming: bool = False
+    # 标注/合并前快速检查DXF结构，截断或损坏的文件移到隔离目录
+    preflight: bool = True
+    # 合并前清理几何：删除重复和零长度实体、合并共线线段（容差为图纸单位，读取时删除重复实体也用此容差）
+    merge_cleanup: bool = False
+    merge_cleanup_tolerance: float = 0.001
+    # 合并排版: strip 零件排成一行; pack 货架式紧凑排样，目标宽度为0时接近正方形
+    merge_layout: str = "strip"
+    merge_sheet_width: float = 0.0
+    # 读取DXF时删除重合的直线、圆弧和圆（多个视图重复绘制的边），标注和合并结果都不再包含
+    remove_duplicates: bool = False
 
 
 @dataclass(frozen=True)
@@ -78,13 +134,46 @@ SETTING_SPECS: Tuple[Tuple[str, Any], ...] = (
     ("output.classified_dir", str),
     ("output.processed_dxf_dir", str),
     ("output.merged_dir", str),
+    ("output.quarantine_dir", str),
     ("inventory.export_filename_prefix", str),
     ("solidworks.template_dir", str),
     ("solidworks.visible", bool),
+    ("solidworks.early_binding", bool),
+    ("solidworks.com_trace", bool),
+    ("solidworks.export_mode", str),
+    ("solidworks.export_formats", str),
+    ("solidworks.open_mode", str),
+    ("solidworks.lightweight_references", bool),
+    ("solidworks.read_drawing_metadata", bool),
+    ("solidworks.skip_unchanged", bool),
+    ("solidworks.staging_enabled", bool),
+    ("solidworks.staging_dir", str),
+    ("solidworks.staging_workers", int),
+    ("solidworks.session_idle_minutes", int),
     ("dxf.text_layer", str),
     ("dxf.text_color", int),
     ("dxf.text_height", float),
     ("dxf.spacing", float),
+    ("dxf.annotation_mode", str),
+    ("dxf.annotation_workers", int),
+    ("dxf.annotation_chunk_size", int),
+    ("dxf.merge_visible_layers", str),
+    ("dxf.merge_import_visible_only", bool),
+    ("dxf.merge_dedup_blocks", bool),
+    ("dxf.merge_workers", int),
+    ("dxf.merge_memory_budget_mb", int),
+    ("dxf.merge_max_entities", int),
+    ("dxf.merge_max_file_mb", int),
+    ("dxf.merge_max_width", float),
+    ("dxf.binary_intermediate", bool),
+    ("dxf.binary_final", bool),
+    ("dxf.merge_streaming", bool),
+    ("dxf.preflight", bool),
+    ("dxf.merge_cleanup", bool),
+    ("dxf.merge_cleanup_tolerance", float),
+    ("dxf.merge_layout", str),
+    ("dxf.merge_sheet_width", float),
+    ("dxf.remove_duplicates", bool),
     ("remote_api.base_url", str),
     ("remote_api.timeout_seconds", int),
     ("auth.fallback_admin_username", str),
@@ -7,6 +7,7 @@ __all__ = [
     "FileExport",
     "SetViews",
     "SetTemplate",
+    "ConversionScheduler",
 ]
 
 
@@ -35,4 +36,8 @@ def __getattr__(name):
         from core.set_template import SetTemplate
 
         return SetTemplate
+    if name == "ConversionScheduler":
+        from core.conversion_scheduler import ConversionScheduler
+
+        return ConversionScheduler
     raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
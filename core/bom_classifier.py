@@ -21,6 +21,7 @@ class BOMClassifier:
         self.classified_dir: Optional[Path] = None
         self.processed_dxf_dir: Optional[Path] = None
         self.merged_dir: Optional[Path] = None
+        self.quarantine_dir: Optional[Path] = None
         
         self.df: Optional[pd.DataFrame] = None
         self.headers: List[str] = []
@@ -35,6 +36,8 @@ class BOMClassifier:
             self.classified_dir = self.result_dir / self.output_config.classified_dir
             self.processed_dxf_dir = self.result_dir / self.output_config.processed_dxf_dir
             self.merged_dir = self.result_dir / self.output_config.merged_dir
+            # 隔离目录在有文件需要隔离时才创建
+            self.quarantine_dir = self.result_dir / self.output_config.quarantine_dir
             
             # 创建所有目录
             for directory in [self.result_dir, self.classified_dir, 
@@ -44,6 +47,21 @@ class BOMClassifier:
             return True
         return False
     
+    def find_reference_files(self, drawing_path: Path) -> List[Path]:
+        """查找与工程图同名的零件/装配体文件"""
+        references: List[Path] = []
+        for ext in ['.SLDPRT', '.sldprt', '.SLDASM', '.sldasm']:
+            reference = drawing_path.with_suffix(ext)
+            if reference.exists() and reference not in references:
+                references.append(reference)
+        return references
+    
+    def classified_dir_for(self, export_format: str) -> Optional[Path]:
+        """各导出格式的分类目录：DXF使用分类目录，其他格式使用带格式后缀的同级目录"""
+        if self.classified_dir is None or export_format.lower() == "dxf":
+            return self.classified_dir
+        return self.classified_dir.with_name(f"{self.classified_dir.name}_{export_format.upper()}")
+    
     def find_bom_files(self) -> List[Path]:
         """在项目目录中查找所有Excel文件"""
         if not self.project_dir:
@@ -66,6 +84,14 @@ class BOMClassifier:
         
         return sorted(slddrw_files)
     
+    def find_part_file(self, drawing_path: Path) -> Optional[Path]:
+        """查找与工程图同名的零件文件（SLDPRT）"""
+        for ext in ['.SLDPRT', '.sldprt', '.SldPrt']:
+            part_path = drawing_path.with_suffix(ext)
+            if part_path.exists():
+                return part_path
+        return None
+    
     def set_bom_file(self, file_path: str) -> bool:
         """设置BOM文件"""
         self.bom_file = Path(file_path)
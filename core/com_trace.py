@@ -0,0 +1,99 @@
+# core/com_trace.py
+
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+
+# 耗时直方图各桶的上限（毫秒），超过最后一个上限的计入溢出桶
+HISTOGRAM_BOUNDS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000, 10000)
+
+
+class _CallStats:
+    __slots__ = ("count", "total", "minimum", "maximum", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.minimum = float("inf")
+        self.maximum = 0.0
+        self.buckets = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.minimum = min(self.minimum, seconds)
+        self.maximum = max(self.maximum, seconds)
+        elapsed_ms = seconds * 1000
+        for index, bound in enumerate(HISTOGRAM_BOUNDS_MS):
+            if elapsed_ms < bound:
+                self.buckets[index] += 1
+                return
+        self.buckets[-1] += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "total_seconds": round(self.total, 4),
+            "avg_ms": round(self.total / self.count * 1000, 2),
+            "min_ms": round(self.minimum * 1000, 2),
+            "max_ms": round(self.maximum * 1000, 2),
+            "histogram": {
+                label: count for label, count in zip(histogram_labels(), self.buckets) if count
+            },
+        }
+
+
+def histogram_labels() -> List[str]:
+    labels = [f"<{bound}ms" for bound in HISTOGRAM_BOUNDS_MS]
+    labels.append(f">={HISTOGRAM_BOUNDS_MS[-1]}ms")
+    return labels
+
+
+class ComCallTrace:
+    """
+    COM调用耗时跟踪
+
+    按调用名累计次数、总耗时、最值和对数分桶直方图（不保存逐次样本），
+    另按转换步骤（打开、视图比例、模板、导出、关闭）计时。
+    关闭时调用方直接跳过计时，不产生额外开销。
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._calls: Dict[str, _CallStats] = {}
+        self._steps: Dict[str, _CallStats] = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        stats = self._calls.get(name)
+        if stats is None:
+            stats = self._calls[name] = _CallStats()
+        stats.add(seconds)
+
+    def call_count(self, name: str) -> int:
+        stats = self._calls.get(name)
+        return stats.count if stats else 0
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[None]:
+        """统计一个转换步骤的耗时（包含其中所有COM调用）"""
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats = self._steps.get(name)
+            if stats is None:
+                stats = self._steps[name] = _CallStats()
+            stats.add(time.perf_counter() - started)
+
+    def call_summary(self) -> Dict[str, Dict[str, Any]]:
+        return {name: stats.to_dict() for name, stats in sorted(self._calls.items())}
+
+    def step_summary(self) -> Dict[str, Dict[str, Any]]:
+        return {name: stats.to_dict() for name, stats in sorted(self._steps.items())}
+
+    def reset(self) -> None:
+        self._calls.clear()
+        self._steps.clear()
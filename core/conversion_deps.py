@@ -0,0 +1,129 @@
+# core/conversion_deps.py
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+# 修改时间比较容差（网络共享时间精度较粗）
+MTIME_TOLERANCE_SECONDS = 2.0
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class ConversionDependencies:
+    """
+    转换结果的依赖记录
+
+    每个输出文件旁保存一个 <输出文件名>.deps.json，记录工程图及其参考文件的
+    大小、修改时间和SHA-256，以及影响输出的转换设置签名。重新运行时，
+    只有工程图本身、任一参考文件或设置（含打开方式和模板文件）发生变化的工程图才需要重新转换；
+    大小和修改时间都未变时不重新计算哈希。
+    """
+
+    SUFFIX = ".deps.json"
+    VERSION = 1
+
+    def __init__(self, signature: Optional[Dict[str, Any]] = None):
+        self.signature = signature or {}
+        self.hashed_files = 0
+
+    @staticmethod
+    def directory_signature(directory: Path) -> Dict[str, list]:
+        """目录中各文件的大小和修改时间，用于设置签名（模板文件原地修改后也会重新转换）"""
+        try:
+            files = sorted(path for path in directory.iterdir() if path.is_file())
+        except OSError:
+            return {}
+        signature: Dict[str, list] = {}
+        for path in files:
+            stat = path.stat()
+            signature[path.name] = [stat.st_size, stat.st_mtime]
+        return signature
+
+    @classmethod
+    def sidecar_path(cls, output_path: Path) -> Path:
+        return output_path.with_name(output_path.name + cls.SUFFIX)
+
+    def check(self, output_path: Path, drawing: Path, references: Sequence[Path]) -> Tuple[bool, str]:
+        """
+        检查输出是否仍为最新
+
+        Returns:
+            (是否最新, 需要重新转换的原因)
+        """
+        if not output_path.exists():
+            return False, "输出文件不存在"
+        record = self._load(output_path)
+        if record is None:
+            return False, "没有依赖记录"
+        if record.get("signature") != self.signature:
+            return False, "转换设置已变更"
+
+        recorded = {self._key(Path(entry["path"])): entry for entry in record.get("files", [])}
+        current = [drawing, *references]
+        if set(recorded) != {self._key(path) for path in current}:
+            return False, "参考文件列表已变更"
+        for path in current:
+            if not self._is_unchanged(path, recorded[self._key(path)]):
+                return False, f"{path.name} 已修改"
+        return True, ""
+
+    def write(self, output_path: Path, drawing: Path, references: Sequence[Path]) -> None:
+        """转换成功后写入依赖记录（沿用旧记录中仍有效的哈希）"""
+        previous = self._load(output_path) or {}
+        previous_files = {self._key(Path(entry["path"])): entry for entry in previous.get("files", [])}
+        files = [
+            self._fingerprint(path, previous_files.get(self._key(path)))
+            for path in dict.fromkeys([drawing, *references])
+        ]
+        record = {"version": self.VERSION, "signature": self.signature, "files": files}
+        sidecar = self.sidecar_path(output_path)
+        sidecar.write_text(json.dumps(record, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    def _is_unchanged(self, path: Path, entry: Dict[str, Any]) -> bool:
+        try:
+            stat = path.stat()
+        except OSError:
+            return False
+        if stat.st_size != entry.get("size"):
+            return False
+        if abs(stat.st_mtime - entry.get("mtime", 0.0)) <= MTIME_TOLERANCE_SECONDS:
+            return True
+        # 只有修改时间变化（如重新复制）时按内容判断
+        return self._hash(path) == entry.get("sha256")
+
+    def _fingerprint(self, path: Path, previous: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        stat = path.stat()
+        if (
+            previous
+            and previous.get("size") == stat.st_size
+            and abs(previous.get("mtime", 0.0) - stat.st_mtime) <= MTIME_TOLERANCE_SECONDS
+            and previous.get("sha256")
+        ):
+            sha256 = previous["sha256"]
+        else:
+            sha256 = self._hash(path)
+        return {"path": str(path), "size": stat.st_size, "mtime": stat.st_mtime, "sha256": sha256}
+
+    def _hash(self, path: Path) -> str:
+        self.hashed_files += 1
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _load(self, output_path: Path) -> Optional[Dict[str, Any]]:
+        sidecar = self.sidecar_path(output_path)
+        try:
+            record = json.loads(sidecar.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if not isinstance(record, dict) or record.get("version") != self.VERSION:
+            return None
+        return record
+
+    @staticmethod
+    def _key(path: Path) -> str:
+        return os.path.normcase(str(path))
@@ -0,0 +1,217 @@
+# core/conversion_scheduler.py
+
+import heapq
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+MB = 1024 * 1024
+
+
+@dataclass
+class ScheduledConversion:
+    """一个已排程的转换任务"""
+    task: Any
+    path: Path
+    predicted_seconds: float
+    worker_index: int = 0
+    actual_seconds: Optional[float] = None
+
+
+class ConversionHistory:
+    """历史转换耗时，按工程图完整路径保存为JSON（不同项目中的同名工程图互不影响）"""
+
+    FILE_NAME = "conversion_history.json"
+    # 新耗时在滑动平均中的权重
+    SMOOTHING = 0.5
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path
+        self.entries: Dict[str, Dict[str, float]] = {}
+        self.load()
+
+    @staticmethod
+    def key_for(path: Path) -> str:
+        return os.path.normcase(str(path.resolve()))
+
+    def load(self) -> None:
+        if not self.path or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict):
+            self.entries = {str(k): v for k, v in data.items() if isinstance(v, dict)}
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self.entries, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    def get(self, path: Path) -> Optional[Dict[str, float]]:
+        return self.entries.get(self.key_for(path))
+
+    def record(self, path: Path, size_bytes: int, seconds: float) -> None:
+        """记录一次实际耗时（同一文件取滑动平均）"""
+        key = self.key_for(path)
+        entry = self.entries.get(key)
+        if entry and entry.get("size") == size_bytes:
+            seconds = entry["seconds"] * (1 - self.SMOOTHING) + seconds * self.SMOOTHING
+            runs = int(entry.get("runs", 1)) + 1
+        else:
+            runs = 1
+        self.entries[key] = {"size": size_bytes, "seconds": round(seconds, 3), "runs": runs}
+
+    def seconds_per_mb(self, base_seconds: float = 0.0) -> Optional[float]:
+        """
+        根据历史记录拟合每MB耗时
+
+        记录的是总耗时，先扣除每个文件固定的 base_seconds，估算时再加回一次
+        """
+        total_mb = sum(entry.get("size", 0) for entry in self.entries.values()) / MB
+        total_seconds = sum(max(entry.get("seconds", 0.0) - base_seconds, 0.0) for entry in self.entries.values())
+        if len(self.entries) < 3 or total_mb <= 0:
+            return None
+        return total_seconds / total_mb
+
+
+class ConversionCostModel:
+    """根据文件大小、图纸数量与历史耗时估算转换时间"""
+
+    BASE_SECONDS = 3.0
+    DEFAULT_SECONDS_PER_MB = 4.0
+    # 每多一张图纸增加的耗时比例
+    EXTRA_SHEET_FACTOR = 0.5
+    # 历史记录仍然有效的文件大小偏差
+    SIZE_TOLERANCE = 0.1
+
+    def __init__(self, history: Optional[ConversionHistory] = None):
+        self.history = history or ConversionHistory()
+
+    def estimate(self, path: Path, size_bytes: Optional[int] = None, sheet_count: int = 1) -> float:
+        """估算单个工程图的转换秒数"""
+        if size_bytes is None:
+            try:
+                size_bytes = path.stat().st_size
+            except OSError:
+                size_bytes = 0
+
+        entry = self.history.get(path)
+        if entry and size_bytes and abs(entry.get("size", 0) - size_bytes) <= size_bytes * self.SIZE_TOLERANCE:
+            return float(entry["seconds"])
+
+        seconds_per_mb = self.history.seconds_per_mb(self.BASE_SECONDS) or self.DEFAULT_SECONDS_PER_MB
+        sheet_factor = 1 + self.EXTRA_SHEET_FACTOR * max(sheet_count - 1, 0)
+        return (self.BASE_SECONDS + seconds_per_mb * size_bytes / MB) * sheet_factor
+
+
+class ConversionScheduler:
+    """按预计耗时从长到短分派转换任务（LPT），缩短整体完成时间"""
+
+    def __init__(self, cost_model: Optional[ConversionCostModel] = None, worker_count: int = 1):
+        self.cost_model = cost_model or ConversionCostModel()
+        self.worker_count = max(worker_count, 1)
+        self.queues: List[List[ScheduledConversion]] = [[] for _ in range(self.worker_count)]
+        self._sizes: Dict[int, int] = {}
+
+    def plan(
+        self,
+        tasks: Sequence[Any],
+        path_of: Callable[[Any], Path],
+        sheet_count_of: Optional[Callable[[Any], int]] = None,
+    ) -> List[List[ScheduledConversion]]:
+        """
+        生成每个工作者的任务队列
+
+        Args:
+            tasks: 待转换任务
+            path_of: 从任务取工程图路径
+            sheet_count_of: 从任务取图纸数量（可选）
+
+        Returns:
+            每个工作者的队列，队内按预计耗时从长到短
+        """
+        items: List[ScheduledConversion] = []
+        for task in tasks:
+            path = path_of(task)
+            try:
+                size_bytes = path.stat().st_size
+            except OSError:
+                size_bytes = 0
+            sheet_count = sheet_count_of(task) if sheet_count_of else 1
+            item = ScheduledConversion(task, path, self.cost_model.estimate(path, size_bytes, sheet_count))
+            self._sizes[id(item)] = size_bytes
+            items.append(item)
+
+        items.sort(key=lambda item: item.predicted_seconds, reverse=True)
+
+        self.queues = [[] for _ in range(self.worker_count)]
+        loads = [(0.0, index) for index in range(self.worker_count)]
+        heapq.heapify(loads)
+        for item in items:
+            load, index = heapq.heappop(loads)
+            item.worker_index = index
+            self.queues[index].append(item)
+            heapq.heappush(loads, (load + item.predicted_seconds, index))
+        return self.queues
+
+    def record_actual(self, item: ScheduledConversion, seconds: float, success: bool = True) -> None:
+        """记录实际耗时，成功的转换写入历史"""
+        item.actual_seconds = seconds
+        if success:
+            self.cost_model.history.record(item.path, self._sizes.get(id(item), 0), seconds)
+
+    def save_history(self) -> None:
+        self.cost_model.history.save()
+
+    @property
+    def predicted_makespan(self) -> float:
+        return max((sum(item.predicted_seconds for item in queue) for queue in self.queues), default=0.0)
+
+    @property
+    def actual_makespan(self) -> float:
+        return max(
+            (sum(item.actual_seconds or 0.0 for item in queue) for queue in self.queues),
+            default=0.0,
+        )
+
+    def summary(self) -> Dict[str, Any]:
+        """预测与实际耗时对比"""
+        items = [item for queue in self.queues for item in queue]
+        finished = [item for item in items if item.actual_seconds is not None]
+        return {
+            "worker_count": self.worker_count,
+            "task_count": len(items),
+            "predicted_makespan_seconds": round(self.predicted_makespan, 2),
+            "actual_makespan_seconds": round(self.actual_makespan, 2),
+            "tasks": [
+                {
+                    "file": item.path.name,
+                    "worker": item.worker_index,
+                    "predicted_seconds": round(item.predicted_seconds, 2),
+                    "actual_seconds": round(item.actual_seconds, 2) if item.actual_seconds is not None else None,
+                }
+                for item in finished
+            ],
+        }
+
+    def summary_lines(self, top: int = 5) -> List[str]:
+        """用于日志显示的对比摘要"""
+        finished = [item for queue in self.queues for item in queue if item.actual_seconds is not None]
+        lines = [
+            f"   预计耗时: {self.predicted_makespan:.1f} 秒, 实际耗时: {self.actual_makespan:.1f} 秒",
+        ]
+        deviations = sorted(
+            finished,
+            key=lambda item: abs((item.actual_seconds or 0.0) - item.predicted_seconds),
+            reverse=True,
+        )[:top]
+        for item in deviations:
+            lines.append(
+                f"      - {item.path.name}: 预计 {item.predicted_seconds:.1f} 秒, 实际 {item.actual_seconds:.1f} 秒"
+            )
+        return lines
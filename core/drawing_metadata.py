@@ -0,0 +1,156 @@
+# core/drawing_metadata.py
+
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import olefile
+
+MODEL_SUFFIXES = (".sldprt", ".sldasm")
+SHEET_FORMAT_SUFFIX = ".slddrt"
+# Windows路径最大长度，向前回溯超过此长度视为不是路径
+MAX_PATH_CHARS = 260
+_INVALID_PATH_CHARS = set('"<>|*?')
+_PATH_ROOT_PATTERN = re.compile(r"[A-Za-z]:[\\/]|\\\\")
+# 图纸格式文件名中的图幅，如 a3图纸格式.slddrt、A4 - landscape.slddrt
+_SHEET_SIZE_PATTERN = re.compile(r"(?<![a-z0-9])(a[0-4])(?![0-9])", re.IGNORECASE)
+# 预览图、缩略图和摘要属性集（\x05开头）流中没有参考路径，且预览位图往往是最大的流
+_SKIPPED_STREAM_PREFIXES = ("preview", "thumbnail", "\x05")
+
+
+@dataclass
+class DrawingMetadata:
+    """不经SolidWorks从SLDDRW文件中读取的元数据"""
+    path: Path
+    references: List[str] = field(default_factory=list)
+    sheet_formats: List[str] = field(default_factory=list)
+    sheet_count: int = 1
+    sheet_size: Optional[str] = None
+    is_ole: bool = False
+    error: Optional[str] = None
+
+    def resolve_references(self) -> List[Path]:
+        """
+        解析参考文件的实际位置
+
+        文件中记录的是保存时的绝对路径；找不到时按SolidWorks的规则
+        在工程图所在文件夹中查找同名文件。
+        """
+        resolved: List[Path] = []
+        for reference in self.references:
+            name = re.split(r"[\\/]", reference)[-1]
+            for candidate in (Path(reference), self.path.parent / name):
+                try:
+                    exists = candidate.is_file()
+                except OSError:
+                    exists = False
+                if exists:
+                    if candidate not in resolved:
+                        resolved.append(candidate)
+                    break
+        return resolved
+
+
+class DrawingMetadataReader:
+    """
+    SLDDRW元数据读取器
+
+    旧版SLDDRW是OLE复合文档，用olefile逐个流读取（流的扇区在文件中不一定连续），
+    跳过预览图等不含路径的流；
+    新版非OLE格式直接扫描整个文件。参考模型和图纸格式以UTF-16路径字符串保存在文件中，
+    据此得到参考文件、图幅和图纸数量，用于排程估算、模板预选和依赖跟踪。
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max(max_workers, 1)
+
+    def read(self, path: Path) -> DrawingMetadata:
+        metadata = DrawingMetadata(path)
+        try:
+            chunks = self._read_chunks(path, metadata)
+        except OSError as e:
+            metadata.error = str(e)
+            return metadata
+
+        for chunk in chunks:
+            for suffix in MODEL_SUFFIXES:
+                for reference in self._find_paths(chunk, suffix):
+                    if reference.lower() not in {r.lower() for r in metadata.references}:
+                        metadata.references.append(reference)
+            for sheet_format in self._find_paths(chunk, SHEET_FORMAT_SUFFIX):
+                if sheet_format.lower() not in {f.lower() for f in metadata.sheet_formats}:
+                    metadata.sheet_formats.append(sheet_format)
+
+        # 同一路径可能保存多份，按不同的图纸格式计数；使用同一格式的多张图纸只计一张，
+        # 压缩流中读不到路径时为1，因此是下限估计
+        metadata.sheet_count = max(len(metadata.sheet_formats), 1)
+        metadata.sheet_size = self.sheet_size_of(metadata.sheet_formats)
+        return metadata
+
+    def read_many(self, paths: Sequence[Path]) -> Dict[Path, DrawingMetadata]:
+        """并行批量读取（以IO为主，线程池即可）"""
+        unique_paths = list(dict.fromkeys(paths))
+        if not unique_paths:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(unique_paths))) as executor:
+            return dict(zip(unique_paths, executor.map(self.read, unique_paths)))
+
+    @staticmethod
+    def sheet_size_of(sheet_formats: Iterable[str]) -> Optional[str]:
+        """从图纸格式文件名中识别图幅"""
+        for sheet_format in sheet_formats:
+            name = re.split(r"[\\/]", sheet_format)[-1]
+            match = _SHEET_SIZE_PATTERN.search(name)
+            if match:
+                return match.group(1).upper()
+        return None
+
+    @classmethod
+    def _read_chunks(cls, path: Path, metadata: DrawingMetadata) -> List[bytes]:
+        if olefile.isOleFile(str(path)):
+            metadata.is_ole = True
+            with olefile.OleFileIO(str(path)) as ole:
+                return [
+                    ole.openstream(entry).read()
+                    for entry in ole.listdir(streams=True, storages=False)
+                    if not cls._is_skipped_stream(entry)
+                ]
+        return [path.read_bytes()]
+
+    @staticmethod
+    def _is_skipped_stream(entry: Sequence[str]) -> bool:
+        return any(part.lower().startswith(_SKIPPED_STREAM_PREFIXES) for part in entry)
+
+    @classmethod
+    def _find_paths(cls, data: bytes, suffix: str) -> List[str]:
+        """查找以指定扩展名结尾的路径字符串（UTF-16LE与ASCII）"""
+        found: List[str] = []
+        for encoding, width in (("utf-16-le", 2), ("ascii", 1)):
+            pattern = re.compile(re.escape(suffix.encode(encoding)), re.IGNORECASE)
+            for match in pattern.finditer(data):
+                start = match.start()
+                while start >= width and (match.end() - start) // width < MAX_PATH_CHARS:
+                    char = data[start - width:start].decode(encoding, errors="replace")
+                    if not cls._is_path_char(char):
+                        break
+                    start -= width
+                if width == 1 and start > 0 and data[start - 1] >= 0x80:
+                    # 非ASCII的本地编码路径只截到一部分，不可靠
+                    continue
+                text = data[start:match.end()].decode(encoding, errors="replace")
+                # 长度前缀等字节可能被当作字符吸收，绝对路径从盘符或UNC开头截取
+                root = _PATH_ROOT_PATTERN.search(text)
+                if root:
+                    text = text[root.start():]
+                if len(text) > len(suffix):
+                    found.append(text)
+        return found
+
+    @staticmethod
+    def _is_path_char(char: str) -> bool:
+        code = ord(char)
+        if code < 0x20 or code == 0x7F or char in _INVALID_PATH_CHARS or char == "�":
+            return False
+        return not 0xD800 <= code <= 0xDFFF
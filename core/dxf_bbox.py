@@ -0,0 +1,145 @@
+# core/dxf_bbox.py
+
+from typing import Iterable, List
+
+import numpy as np
+from ezdxf.bbox import extents as ezdxf_extents
+from ezdxf.entities import DXFEntity
+from ezdxf.math import BoundingBox
+
+# 法向量与Z轴的偏差在此范围内视为平面实体
+EXTRUSION_TOLERANCE = 1e-9
+
+
+class _Collector:
+    """按实体类型收集坐标数组，最后一次性向量化计算范围"""
+
+    def __init__(self):
+        self.points: List[tuple] = []
+        # 圆弧参数 (cx, cy, cz, r, start_rad, end_rad, mirror_x)，整圆的 end-start = 2π
+        self.arcs: List[tuple] = []
+        # 多段线凸度段 (x0, y0, x1, y1, bulge, elevation, mirror_x)，最后统一转换为圆弧
+        self.bulges: List[tuple] = []
+        self.fallback: List[DXFEntity] = []
+
+    def add(self, entity: DXFEntity) -> None:
+        dxftype = entity.dxftype()
+        if dxftype == "LINE":
+            self.points.append(tuple(entity.dxf.start))
+            self.points.append(tuple(entity.dxf.end))
+        elif dxftype == "POINT":
+            self.points.append(tuple(entity.dxf.location))
+        elif dxftype in ("CIRCLE", "ARC"):
+            mirror_x = self._mirror_x(entity)
+            if mirror_x is None:
+                self.fallback.append(entity)
+                return
+            center = entity.dxf.center
+            if dxftype == "CIRCLE":
+                start, end = 0.0, 2 * np.pi
+            else:
+                start, end = np.radians(entity.dxf.start_angle), np.radians(entity.dxf.end_angle)
+            self.arcs.append((center.x, center.y, center.z, entity.dxf.radius, start, end, mirror_x))
+        elif dxftype == "LWPOLYLINE":
+            mirror_x = self._mirror_x(entity)
+            if mirror_x is None:
+                self.fallback.append(entity)
+                return
+            self._add_lwpolyline(entity, mirror_x)
+        elif dxftype == "SPLINE" and len(entity.control_points):
+            # 控制点凸包必然包含曲线，结果偏保守
+            self.points.extend(tuple(point) for point in entity.control_points)
+        else:
+            self.fallback.append(entity)
+
+    @staticmethod
+    def _mirror_x(entity: DXFEntity):
+        """OCS法向为 +Z 返回1，为 -Z 返回-1（X轴镜像），其他返回None"""
+        extrusion = entity.dxf.get("extrusion", (0.0, 0.0, 1.0))
+        if abs(extrusion[0]) > EXTRUSION_TOLERANCE or abs(extrusion[1]) > EXTRUSION_TOLERANCE:
+            return None
+        return -1.0 if extrusion[2] < 0 else 1.0
+
+    def _add_lwpolyline(self, entity: DXFEntity, mirror_x: float) -> None:
+        # lwpoints.values 为 (n, 5) 数组，每行 (x, y, start_width, end_width, bulge)
+        vertices = entity.lwpoints.values.tolist()
+        count = len(vertices)
+        if not count:
+            return
+        elevation = entity.dxf.elevation
+        z = -elevation if mirror_x < 0 else elevation
+        self.points.extend((x * mirror_x, y, z) for x, y, _sw, _ew, _b in vertices)
+
+        segments = count if entity.closed else count - 1
+        for index in range(segments):
+            x0, y0, _sw, _ew, bulge = vertices[index]
+            if bulge:
+                x1, y1 = vertices[(index + 1) % count][:2]
+                self.bulges.append((x0, y0, x1, y1, bulge, elevation, mirror_x))
+
+    def bounding_box(self) -> BoundingBox:
+        bbox = BoundingBox()
+        if self.points:
+            points = np.asarray(self.points, dtype=float)
+            bbox.extend([points.min(axis=0), points.max(axis=0)])
+        arcs = [np.asarray(self.arcs, dtype=float).reshape(-1, 7)]
+        if self.bulges:
+            arcs.append(_bulge_arcs(np.asarray(self.bulges, dtype=float)))
+        arcs = np.concatenate(arcs)
+        if len(arcs):
+            bbox.extend(_arc_extents(arcs))
+        if self.fallback:
+            fallback_bbox = ezdxf_extents(self.fallback)
+            if fallback_bbox.has_data:
+                bbox.extend([fallback_bbox.extmin, fallback_bbox.extmax])
+        return bbox
+
+
+def _bulge_arcs(segments: np.ndarray) -> np.ndarray:
+    """凸度段转圆弧参数（与 ezdxf.math.bulge_to_arc 相同的定义，向量化）"""
+    x0, y0, x1, y1, bulges, elevation, mirror_x = segments.T
+    chord_length = np.hypot(x1 - x0, y1 - y0)
+    signed_radius = chord_length * (1 + bulges ** 2) / (4 * bulges)
+    center_angle = np.arctan2(y1 - y0, x1 - x0) + (np.pi / 2 - 2 * np.arctan(bulges))
+    cx = x0 + signed_radius * np.cos(center_angle)
+    cy = y0 + signed_radius * np.sin(center_angle)
+    start_angles = np.arctan2(y0 - cy, x0 - cx)
+    end_angles = np.arctan2(y1 - cy, x1 - cx)
+    # 负凸度为顺时针，交换起止角后统一按逆时针处理
+    ccw_start = np.where(bulges > 0, start_angles, end_angles)
+    ccw_end = np.where(bulges > 0, end_angles, start_angles)
+    return np.column_stack((cx, cy, elevation, np.abs(signed_radius), ccw_start, ccw_end, mirror_x))
+
+
+def _arc_extents(arcs: np.ndarray) -> List[np.ndarray]:
+    """圆弧的精确范围：端点加上落在弧内的0°/90°/180°/270°点"""
+    cx, cy, cz, radius, start, end, mirror_x = arcs.T
+    start = np.mod(start, 2 * np.pi)
+    sweep = np.mod(end - start, 2 * np.pi)
+    sweep = np.where(sweep == 0, 2 * np.pi, sweep)
+
+    angles = [start, start + sweep]
+    for quadrant in np.arange(4) * np.pi / 2:
+        inside = np.mod(quadrant - start, 2 * np.pi) <= sweep
+        angles.append(np.where(inside, quadrant, start))
+    angles = np.stack(angles)  # (6, N)
+
+    xs = (cx + radius * np.cos(angles)) * mirror_x
+    ys = cy + radius * np.sin(angles)
+    zs = cz * mirror_x  # -Z法向时OCS的Z也取反
+    minimum = np.array([xs.min(), ys.min(), zs.min()])
+    maximum = np.array([xs.max(), ys.max(), zs.max()])
+    return [minimum, maximum]
+
+
+def fast_extents(entities: Iterable[DXFEntity]) -> BoundingBox:
+    """
+    计算实体范围（ezdxf.bbox.extents的向量化替代）
+
+    LINE/POINT/ARC/CIRCLE/LWPOLYLINE按坐标数组整体计算，圆弧和凸度段为精确范围；
+    SPLINE取控制点范围；其他实体和非XY平面的实体交给ezdxf计算。
+    """
+    collector = _Collector()
+    for entity in entities:
+        collector.add(entity)
+    return collector.bounding_box()
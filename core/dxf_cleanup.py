@@ -0,0 +1,465 @@
+# core/dxf_cleanup.py
+
+import math
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from ezdxf.document import Drawing
+from ezdxf.entities import DXFEntity
+from ezdxf.math import Vec3
+
+# 默认清理容差（图纸单位，通常为mm）
+DEFAULT_TOLERANCE = 1e-3
+# 空间哈希格大小：直线按方向角（弧度）和到原点的距离分格。
+# 只用于查找候选，是否共线按容差精确判断；查找范围按线段长度和到原点的距离放宽
+ANGLE_CELL = 1e-3
+OFFSET_CELL = 1.0
+ANGLE_EPSILON = 1e-9
+EXTRUSION_TOLERANCE = 1e-9
+# 重复检测的哈希格大小（容差的倍数）：格越大，靠近格边界、需要探测相邻格的行越少
+DUPLICATE_CELL = 16
+# 混合格号的奇数乘数
+_HASH_MULTIPLIER = 0x9E3779B97F4A7C15 - (1 << 64)
+
+
+@dataclass
+class CleanupStats:
+    """单个文件的清理统计"""
+    before: int = 0
+    after: int = 0
+    degenerate: int = 0  # 删除的零长度实体
+    duplicates: int = 0  # 删除的重复或被完全覆盖的实体
+    joined: int = 0  # 并入相邻共线线段的线段数
+    vertices: int = 0  # 多段线删除的顶点数
+
+    def summary(self) -> str:
+        details = [
+            f"{label} {count}"
+            for label, count in (
+                ("重复", self.duplicates),
+                ("零长度", self.degenerate),
+                ("共线合并", self.joined),
+                ("多段线顶点", self.vertices),
+            )
+            if count
+        ]
+        return f"实体 {self.before} → {self.after}" + (f"（{'，'.join(details)}）" if details else "")
+
+
+def _attributes(entity: DXFEntity) -> tuple:
+    """只有图层、颜色、线型都相同的实体才互相去重或合并"""
+    dxf = entity.dxf
+    return dxf.get("layer", "0"), dxf.get("color", 256), dxf.get("linetype", "BYLAYER")
+
+
+def _planar(entity: DXFEntity) -> bool:
+    extrusion = entity.dxf.get("extrusion", (0.0, 0.0, 1.0))
+    return abs(extrusion[0]) <= EXTRUSION_TOLERANCE and abs(extrusion[1]) <= EXTRUSION_TOLERANCE
+
+
+class _Carrier:
+    """共线线段所在的直线，由组内最长的线段确定方向"""
+
+    def __init__(self, start: Vec3, end: Vec3):
+        self.origin = start
+        self.direction = (end - start).normalize()
+        self.members: List[Tuple[int, DXFEntity]] = []
+
+    def distance(self, point: Vec3) -> float:
+        offset = point - self.origin
+        return abs(offset.x * self.direction.y - offset.y * self.direction.x)
+
+    def project(self, point: Vec3) -> float:
+        return (point - self.origin).dot(self.direction)
+
+
+class _CarrierIndex:
+    """
+    按方向角和到参考点距离分格的直线空间哈希
+
+    两端都在某条直线容差内的线段，与该直线的夹角不超过 asin(2×容差/线段长度)，
+    且该直线经过线段中点附近（容差内）。查找时对夹角范围内的每个方向角格，
+    只检查经过中点的直线可能落入的距离格；距离随方向角变化的幅度与中点到参考点的
+    距离成正比，参考点取所有直线的范围中心，远离原点的图纸也不会漏掉。
+    要检查的格比同类直线还多时直接逐条比较。
+    """
+
+    ANGLE_CELLS = math.ceil(math.pi / ANGLE_CELL)
+
+    def __init__(self, tolerance: float, origin: Vec3 = Vec3()):
+        self.tolerance = tolerance
+        self.origin = origin
+        self.cells: Dict[tuple, List[_Carrier]] = defaultdict(list)
+        self.carriers: List[_Carrier] = []
+        self.carriers_by_key: Dict[tuple, List[_Carrier]] = defaultdict(list)
+
+    def add(self, key: tuple, index: int, entity: DXFEntity, start: Vec3, end: Vec3) -> None:
+        local_start, local_end = (start - self.origin).vec2, (end - self.origin).vec2
+        angle = math.atan2(local_end.y - local_start.y, local_end.x - local_start.x) % math.pi
+        angle_spread = math.asin(min(2 * self.tolerance / local_start.distance(local_end), 1.0))
+        for carrier in self._candidates(key, angle, angle_spread, local_start.lerp(local_end)):
+            if carrier.distance(start) <= self.tolerance and carrier.distance(end) <= self.tolerance:
+                carrier.members.append((index, entity))
+                return
+        carrier = _Carrier(start, end)
+        carrier.members.append((index, entity))
+        offset = self._offset(local_start, angle)
+        self.cells[(key, int(angle / ANGLE_CELL) % self.ANGLE_CELLS, math.floor(offset / OFFSET_CELL))].append(carrier)
+        self.carriers.append(carrier)
+        self.carriers_by_key[key].append(carrier)
+
+    @staticmethod
+    def _offset(point, angle: float) -> float:
+        """方向角为 angle 且经过 point 的直线到参考点的有向距离"""
+        return point.y * math.cos(angle) - point.x * math.sin(angle)
+
+    def _candidates(self, key: tuple, angle: float, angle_spread: float, midpoint):
+        # 略微放宽夹角，浮点误差不会让方向角恰好落在格边界另一侧
+        angle_spread += ANGLE_EPSILON
+        first_angle = math.floor((angle - angle_spread) / ANGLE_CELL)
+        last_angle = math.floor((angle + angle_spread) / ANGLE_CELL)
+        # 同一方向角格内，经过中点容差内的直线到参考点的距离与格中心方向相差不超过 half_width
+        half_width = midpoint.magnitude * ANGLE_CELL / 2 + self.tolerance
+        offset_cells = math.floor(2 * half_width / OFFSET_CELL) + 2
+        same_key = self.carriers_by_key.get(key, ())
+        if (last_angle - first_angle + 1) * offset_cells > len(same_key):
+            yield from same_key
+            return
+        for cell in range(first_angle, last_angle + 1):
+            # 方向角在 0 和 π 处首尾相接，按取模后的格中心方向计算距离
+            cell %= self.ANGLE_CELLS
+            center = self._offset(midpoint, (cell + 0.5) * ANGLE_CELL)
+            first_offset = math.floor((center - half_width) / OFFSET_CELL)
+            for offset_cell in range(first_offset, first_offset + offset_cells):
+                yield from self.cells.get((key, cell, offset_cell), ())
+
+
+def _endpoints(entity: DXFEntity) -> Tuple[Vec3, Vec3]:
+    return Vec3(entity.dxf.start), Vec3(entity.dxf.end)
+
+
+class DxfCleaner:
+    """
+    合并前的几何清理
+
+    - 长度或半径小于容差的直线、圆、圆弧和多段线直接删除；
+    - 重合的直线、圆弧和圆由 find_duplicates 找出，只保留一个；
+    - 同图层、颜色、线型且共线的直线按空间哈希分组，重叠或首尾相接
+      （间隙不超过容差）的线段合并为一条；
+    - 多段线删除重合顶点和直线段中间的共线顶点。
+    只处理位于XY平面内的实体，其他实体原样保留。保留的实体原地修改。
+    读取时已经删除过重复实体的，duplicates 传False跳过重复检测。
+    """
+
+    def __init__(self, tolerance: float = DEFAULT_TOLERANCE, duplicates: bool = True):
+        self.tolerance = tolerance
+        self.duplicates = duplicates
+
+    def clean(self, entities: Sequence[DXFEntity]) -> Tuple[List[DXFEntity], CleanupStats]:
+        """返回清理后的实体列表（保持原顺序）和统计"""
+        stats = CleanupStats(before=len(entities))
+        removed: set = set(find_duplicates(entities, self.tolerance)) if self.duplicates else set()
+        stats.duplicates = len(removed)
+
+        # 先放入长线段，共线分组的方向由最长的线段确定
+        ordered_lines = []
+        for index, entity in enumerate(entities):
+            if index in removed:
+                continue
+            dxftype = entity.dxftype()
+            if dxftype == "LINE":
+                start, end = _endpoints(entity)
+                if abs(start.z) > self.tolerance or abs(end.z) > self.tolerance:
+                    continue
+                length = start.distance(end)
+                if length <= self.tolerance:
+                    removed.add(index)
+                    stats.degenerate += 1
+                else:
+                    ordered_lines.append((length, index, entity, start, end))
+            elif dxftype in ("CIRCLE", "ARC") and _planar(entity):
+                if entity.dxf.radius <= self.tolerance:
+                    removed.add(index)
+                    stats.degenerate += 1
+            elif dxftype == "LWPOLYLINE" and _planar(entity):
+                remaining = self._simplify_lwpolyline(entity, stats)
+                if remaining is None:
+                    removed.add(index)
+                    stats.degenerate += 1
+
+        ordered_lines.sort(key=lambda item: item[0], reverse=True)
+        lines = _CarrierIndex(self.tolerance, self._center(ordered_lines))
+        for _length, index, entity, start, end in ordered_lines:
+            lines.add(_attributes(entity), index, entity, start, end)
+        for carrier in lines.carriers:
+            if len(carrier.members) > 1:
+                removed.update(self._join_collinear(carrier, stats))
+
+        kept = [entity for index, entity in enumerate(entities) if index not in removed]
+        stats.after = len(kept)
+        return kept, stats
+
+    @staticmethod
+    def _center(ordered_lines: list) -> Vec3:
+        """所有直线端点范围的中心"""
+        if not ordered_lines:
+            return Vec3()
+        xs = [point.x for item in ordered_lines for point in item[3:5]]
+        ys = [point.y for item in ordered_lines for point in item[3:5]]
+        return Vec3((min(xs) + max(xs)) / 2, (min(ys) + max(ys)) / 2)
+
+    def _join_collinear(self, carrier: _Carrier, stats: CleanupStats) -> List[int]:
+        """合并一条直线上重叠或相接的线段，返回删除的实体序号"""
+        intervals = []
+        for index, entity in carrier.members:
+            start, end = _endpoints(entity)
+            t_start, t_end = carrier.project(start), carrier.project(end)
+            if t_start > t_end:
+                t_start, t_end, start, end = t_end, t_start, end, start
+            intervals.append((t_start, t_end, start, end, index, entity))
+        intervals.sort(key=lambda item: (item[0], -item[1]))
+
+        removed: List[int] = []
+        group: Optional[list] = None
+        for t_start, t_end, start, end, index, entity in intervals:
+            if group is not None and t_start <= group[1] + self.tolerance:
+                if t_end <= group[1] + self.tolerance:
+                    stats.duplicates += 1
+                else:
+                    stats.joined += 1
+                    group[1], group[3] = t_end, end
+                group[4].append((index, entity))
+                continue
+            if group is not None:
+                removed.extend(self._apply_join(group))
+            group = [t_start, t_end, start, end, [(index, entity)]]
+        if group is not None:
+            removed.extend(self._apply_join(group))
+        return removed
+
+    @staticmethod
+    def _apply_join(group: list) -> List[int]:
+        """组内保留原顺序中第一个实体，端点改为合并后的端点"""
+        members = sorted(group[4], key=lambda member: member[0])
+        if len(members) == 1:
+            return []
+        _index, kept = members[0]
+        kept.dxf.start = group[2]
+        kept.dxf.end = group[3]
+        return [index for index, _entity in members[1:]]
+
+    def _simplify_lwpolyline(self, entity: DXFEntity, stats: CleanupStats) -> Optional[int]:
+        """删除重合顶点和共线顶点，返回剩余顶点数；退化为一点时返回None"""
+        # 每行 (x, y, start_width, end_width, bulge)
+        vertices = entity.lwpoints.values.tolist()
+        original_count = len(vertices)
+        tolerance = self.tolerance
+
+        result: List[list] = []
+        for vertex in vertices:
+            if result and math.hypot(vertex[0] - result[-1][0], vertex[1] - result[-1][1]) <= tolerance:
+                # 零长度段：前一顶点改用本顶点出发的凸度和线宽
+                result[-1][2:] = vertex[2:]
+                continue
+            # 前两段都是无宽度直线段且中间顶点在两端连线上时删除中间顶点
+            while len(result) >= 2 and self._collinear_vertex(result[-2], result[-1], vertex):
+                result.pop()
+            result.append(list(vertex))
+
+        if entity.closed:
+            if len(result) > 1 and math.hypot(result[-1][0] - result[0][0], result[-1][1] - result[0][1]) <= tolerance:
+                result.pop()
+            # 闭合多段线首尾相接，终点和起点两侧的共线顶点也要检查
+            while len(result) > 3:
+                if self._collinear_vertex(result[-2], result[-1], result[0]):
+                    result.pop()
+                elif self._collinear_vertex(result[-1], result[0], result[1]):
+                    result.pop(0)
+                else:
+                    break
+        if len(result) < 2:
+            return None
+        if len(result) != original_count:
+            stats.vertices += original_count - len(result)
+            entity.set_points([tuple(vertex) for vertex in result], format="xyseb")
+        return len(result)
+
+    def _collinear_vertex(self, previous: list, middle: list, following: Sequence[float]) -> bool:
+        if previous[4] or middle[4] or any(previous[2:4]) or any(middle[2:4]):
+            return False
+        ax, ay = middle[0] - previous[0], middle[1] - previous[1]
+        bx, by = following[0] - middle[0], following[1] - middle[1]
+        chord = math.hypot(following[0] - previous[0], following[1] - previous[1])
+        if chord <= self.tolerance or ax * bx + ay * by <= 0:
+            return False
+        # 中间顶点到两端连线的距离
+        cx, cy = following[0] - previous[0], following[1] - previous[1]
+        return abs(ax * cy - ay * cx) / chord <= self.tolerance
+
+
+def _grid_hash(keys: np.ndarray, cells: np.ndarray) -> np.ndarray:
+    """把键编号和各列格号混合为一个int64哈希（溢出回绕）；冲突只会多出候选，由精确比较排除"""
+    hashed = keys
+    for column in range(cells.shape[1]):
+        hashed = hashed * _HASH_MULTIPLIER + cells[:, column]
+    return hashed
+
+
+def _duplicate_rows(keys: np.ndarray, coordinates: np.ndarray, tolerance: float, hashed_columns: int,
+                    reversible: bool = False) -> np.ndarray:
+    """
+    返回重复行的布尔掩码：按行序，与某个更早的保留行每个坐标之差都不超过容差的行
+
+    完全相同的行先去掉。其余行的前 hashed_columns 列按网格量化，
+    容差内的另一行在每一列上只可能落在同一格，或在该列距格边界不到容差时落在相邻格，
+    因此在这些相邻格组合中探测即可找全候选，坐标跨格边界时也不会漏掉；
+    候选对再按全部坐标精确比较。reversible 为True时前4列为直线的两个端点，
+    再按交换端点后的坐标探测和比较，方向相反的线段也能匹配。
+    删除只相对保留的行判断，不会经近似重复首尾串联而累积。
+    """
+    # 多列小整数键合并为一个编号
+    keys = keys.astype(np.int64).reshape(len(keys), -1)
+    key = keys[:, 0]
+    for column in range(1, keys.shape[1]):
+        key = key * (int(keys[:, column].max()) + 1) + keys[:, column]
+    coordinates = np.ascontiguousarray(coordinates, dtype=float)
+
+    # 完全相同的行按浮点位模式哈希分组，与组内第一行逐列确认
+    _unique, first, inverse = np.unique(_grid_hash(key, coordinates.view(np.int64)),
+                                        return_index=True, return_inverse=True)
+    representative = first[inverse.ravel()]
+    duplicate = ((representative != np.arange(len(key))) & (key == key[representative])
+                 & np.all(coordinates == coordinates[representative], axis=1))
+    distinct = np.flatnonzero(~duplicate)
+    keys, values = key[distinct], coordinates[distinct]
+    cell = DUPLICATE_CELL * tolerance
+    # 判断是否靠近格边界时留一点余量，浮点误差不致漏掉相邻格
+    margin = 1.5 * tolerance
+    table = _grid_hash(keys, np.floor(values[:, :hashed_columns] / cell).astype(np.int64))
+    order = np.argsort(table, kind="stable")
+    table = table[order]
+
+    orientations = [values]
+    if reversible:
+        orientations.append(values[:, [2, 3, 0, 1] + list(range(4, values.shape[1]))])
+    pairs = []
+    for probe_values in orientations:
+        base = np.floor(probe_values[:, :hashed_columns] / cell).astype(np.int64)
+        position = probe_values[:, :hashed_columns] - base * cell
+        step = np.where(position < margin, -1, 1)
+        near = (position < margin) | (position > cell - margin)
+        near_bits = (near.astype(np.int64) << np.arange(hashed_columns)).sum(axis=1)
+        for mask in range(1 << hashed_columns):
+            # 只有在这些列上都靠近格边界的行才需要探测对应的相邻格
+            rows = np.flatnonzero((near_bits & mask) == mask)
+            if not len(rows):
+                continue
+            shift = np.array([(mask >> column) & 1 for column in range(hashed_columns)], dtype=np.int64)
+            probe = _grid_hash(keys[rows], base[rows] + step[rows] * shift)
+            low = np.searchsorted(table, probe, side="left")
+            counts = np.searchsorted(table, probe, side="right") - low
+            total = int(counts.sum())
+            if not total:
+                continue
+            offsets = np.cumsum(counts) - counts
+            source = np.repeat(rows, counts)
+            target = order[np.arange(total) - np.repeat(offsets, counts) + np.repeat(low, counts)]
+            candidate = (source != target) & (keys[source] == keys[target])
+            source, target = source[candidate], target[candidate]
+            close = np.all(np.abs(probe_values[source] - values[target]) <= tolerance, axis=1)
+            pairs.append(np.column_stack((np.minimum(source, target), np.maximum(source, target)))[close])
+
+    if pairs:
+        found = np.unique(np.concatenate(pairs), axis=0)
+        # 按后一行排序逐对判断：前一行的去留此时已确定，只有与保留行重合才删除
+        removed = np.zeros(len(values), dtype=bool)
+        for earlier, later in found[np.lexsort((found[:, 0], found[:, 1]))].tolist():
+            if not removed[earlier]:
+                removed[later] = True
+        duplicate[distinct[removed]] = True
+    return duplicate
+
+
+def find_duplicates(entities: Sequence[DXFEntity], tolerance: float = DEFAULT_TOLERANCE) -> List[int]:
+    """
+    向量化检测重合的直线、圆弧和圆
+
+    多个视图在同一图层重复绘制的边：图层、颜色、线型相同，端点（圆弧为圆心、半径
+    和起止点）的每个坐标之差都在容差内即视为重复。只遍历一次实体读取坐标，
+    去重在NumPy中完成。
+    返回要删除的实体序号（每组保留最先出现的一个）。
+    """
+    attribute_ids: Dict[tuple, int] = {}
+    lines: List[tuple] = []
+    line_index: List[int] = []
+    arcs: List[tuple] = []
+    arc_index: List[int] = []
+    circles: List[tuple] = []
+    circle_index: List[int] = []
+
+    for index, entity in enumerate(entities):
+        dxftype = entity.dxftype()
+        if dxftype not in ("LINE", "ARC", "CIRCLE"):
+            continue
+        dxf = entity.dxf
+        attribute_id = attribute_ids.setdefault(_attributes(entity), len(attribute_ids))
+        if dxftype == "LINE":
+            start, end = dxf.start, dxf.end
+            if start[2] or end[2]:
+                continue
+            lines.append((attribute_id, start[0], start[1], end[0], end[1]))
+            line_index.append(index)
+            continue
+        if not _planar(entity) or dxf.get("elevation", 0.0):
+            continue
+        center = dxf.center
+        if center[2]:
+            continue
+        # OCS法向为 -Z 的圆弧与 +Z 的不同
+        orientation = 1 if dxf.get("extrusion", (0.0, 0.0, 1.0))[2] < 0 else 0
+        if dxftype == "CIRCLE":
+            circles.append((attribute_id, orientation, center[0], center[1], dxf.radius))
+            circle_index.append(index)
+        else:
+            arcs.append((attribute_id, orientation, center[0], center[1], dxf.radius, dxf.start_angle, dxf.end_angle))
+            arc_index.append(index)
+
+    removed: List[int] = []
+    if lines:
+        data = np.asarray(lines, dtype=float)
+        mask = _duplicate_rows(data[:, :1].astype(np.int64), data[:, 1:], tolerance, 4, reversible=True)
+        removed.extend(np.asarray(line_index)[mask].tolist())
+    if arcs:
+        data = np.asarray(arcs, dtype=float)
+        cx, cy, radius = data[:, 2], data[:, 3], data[:, 4]
+        start, end = np.radians(data[:, 5]), np.radians(data[:, 6])
+        # 起止角换算为起止点，与圆心、半径一样按长度量化
+        coordinates = np.column_stack((
+            cx, cy, radius,
+            cx + radius * np.cos(start), cy + radius * np.sin(start),
+            cx + radius * np.cos(end), cy + radius * np.sin(end),
+        ))
+        # 只按圆心和半径探测，起止点在精确比较中判断
+        mask = _duplicate_rows(data[:, :2].astype(np.int64), coordinates, tolerance, 3)
+        removed.extend(np.asarray(arc_index)[mask].tolist())
+    if circles:
+        data = np.asarray(circles, dtype=float)
+        mask = _duplicate_rows(data[:, :2].astype(np.int64), data[:, 2:], tolerance, 3)
+        removed.extend(np.asarray(circle_index)[mask].tolist())
+    return sorted(removed)
+
+
+def remove_duplicates(doc: Drawing, tolerance: float = DEFAULT_TOLERANCE) -> int:
+    """删除模型空间中重合的直线、圆弧和圆，返回删除数量"""
+    msp = doc.modelspace()
+    entities = list(msp)
+    duplicates = find_duplicates(entities, tolerance)
+    if not duplicates:
+        return 0
+    # 逐个 delete_entity 每次都要在实体列表中查找，批量销毁后一次清除
+    for index in duplicates:
+        doc.entitydb.delete_entity(entities[index])
+    msp.purge()
+    return len(duplicates)
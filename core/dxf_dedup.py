@@ -0,0 +1,99 @@
+# core/dxf_dedup.py
+
+import hashlib
+from typing import Iterable, List, Optional, Tuple
+
+from ezdxf.entities import DXFEntity
+from ezdxf.math import Vec3
+
+# 坐标比较精度（小数位数）
+COORDINATE_PRECISION = 6
+
+
+class _Unsupported(Exception):
+    """实体类型无法生成几何签名"""
+
+
+def _number(value: float) -> float:
+    # 加0.0把 -0.0 统一为 0.0
+    return round(float(value), COORDINATE_PRECISION) + 0.0
+
+
+def _point(point, origin) -> Tuple[float, ...]:
+    return tuple(_number(a - b) for a, b in zip(Vec3(point), origin))
+
+
+def _entity_key(entity: DXFEntity, origin: Vec3) -> tuple:
+    dxftype = entity.dxftype()
+    dxf = entity.dxf
+    common = (dxftype, dxf.get("layer", "0"), dxf.get("color", 256), dxf.get("linetype", "BYLAYER"))
+
+    if dxftype == "LINE":
+        return common + (_point(dxf.start, origin), _point(dxf.end, origin))
+    if dxftype == "POINT":
+        return common + (_point(dxf.location, origin),)
+
+    # 其余实体坐标在OCS中，原点也换算到OCS
+    extrusion = Vec3(dxf.get("extrusion", (0, 0, 1)))
+    ocs_origin = entity.ocs().from_wcs(origin)
+    common += (_point(extrusion, Vec3()),)
+    if dxftype == "CIRCLE":
+        return common + (_point(dxf.center, ocs_origin), _number(dxf.radius))
+    if dxftype == "ARC":
+        return common + (
+            _point(dxf.center, ocs_origin),
+            _number(dxf.radius),
+            _number(dxf.start_angle % 360),
+            _number(dxf.end_angle % 360),
+        )
+    if dxftype == "LWPOLYLINE":
+        points = tuple(
+            (_number(x - ocs_origin.x), _number(y - ocs_origin.y), _number(sw), _number(ew), _number(bulge))
+            for x, y, sw, ew, bulge in entity.lwpoints.values.tolist()
+        )
+        return common + (
+            points,
+            entity.closed,
+            _number(dxf.get("elevation", 0.0) - ocs_origin.z),
+            _number(dxf.get("const_width", 0.0)),
+        )
+    if dxftype == "SPLINE":
+        return common + (
+            dxf.degree,
+            dxf.get("flags", 0),
+            tuple(_point(point, origin) for point in entity.control_points),
+            tuple(_point(point, origin) for point in entity.fit_points),
+            tuple(_number(knot) for knot in entity.knots),
+            tuple(_number(weight) for weight in entity.weights),
+        )
+    if dxftype == "TEXT":
+        return common + (
+            dxf.text,
+            dxf.get("style", "Standard"),
+            _point(dxf.insert, ocs_origin),
+            _point(dxf.get("align_point", dxf.insert), ocs_origin),
+            _number(dxf.height),
+            _number(dxf.get("rotation", 0.0)),
+            _number(dxf.get("width", 1.0)),
+            dxf.get("halign", 0),
+            dxf.get("valign", 0),
+        )
+    raise _Unsupported(dxftype)
+
+
+def geometry_signature(entities: Iterable[DXFEntity], origin) -> Optional[str]:
+    """
+    归一化几何签名
+
+    各实体的类型、图层、颜色、线型和相对 origin 的坐标（保留6位小数）
+    排序后计算SHA-256，与实体顺序和零件在原文件中的位置无关。
+    含无法归一化的实体（块参照、标注等）时返回None，不参与去重。
+    """
+    origin = Vec3(origin)
+    try:
+        keys: List[str] = sorted(repr(_entity_key(entity, origin)) for entity in entities)
+    except _Unsupported:
+        return None
+    if not keys:
+        return None
+    return hashlib.sha256("\n".join(keys).encode("utf-8")).hexdigest()
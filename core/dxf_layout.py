@@ -0,0 +1,47 @@
+# core/dxf_layout.py
+
+import math
+from typing import List, Sequence, Tuple
+
+
+class ShelfPacker:
+    """
+    货架式矩形排样（FFDH）
+
+    矩形按高度从大到小依次放入第一个剩余宽度足够的货架，放不下时在上方新开一个货架，
+    货架高度由其中第一个（最高的）矩形决定。sheet_width 为0时按总面积取接近正方形的宽度。
+    比目标宽度还宽的矩形单独占一个货架。
+    """
+
+    def __init__(self, sheet_width: float = 0.0, spacing: float = 0.0):
+        self.sheet_width = sheet_width
+        self.spacing = spacing
+
+    def width_for(self, sizes: Sequence[Tuple[float, float]]) -> float:
+        if self.sheet_width > 0:
+            return self.sheet_width
+        area = sum((width + self.spacing) * (height + self.spacing) for width, height in sizes)
+        widest = max((width for width, _height in sizes), default=0.0)
+        return max(math.sqrt(area), widest)
+
+    def pack(self, sizes: Sequence[Tuple[float, float]]) -> List[Tuple[float, float]]:
+        """返回各矩形左下角坐标，顺序与输入相同"""
+        sheet_width = self.width_for(sizes)
+        positions: List[Tuple[float, float]] = [(0.0, 0.0)] * len(sizes)
+        # 每个货架为 [底边y, 已用宽度]
+        shelves: List[List[float]] = []
+        top = 0.0
+        for index in sorted(range(len(sizes)), key=lambda item: sizes[item][1], reverse=True):
+            width, height = sizes[index]
+            for shelf in shelves:
+                x = shelf[1] + self.spacing
+                if x + width <= sheet_width:
+                    positions[index] = (x, shelf[0])
+                    shelf[1] = x + width
+                    break
+            else:
+                y = top + self.spacing if shelves else 0.0
+                shelves.append([y, width])
+                positions[index] = (0.0, y)
+                top = y + height
+        return positions
@@ -0,0 +1,161 @@
+# core/dxf_manifest.py
+
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Collection, Dict, Iterable, List, Optional
+
+from ezdxf.math import BoundingBox
+
+# 修改时间比较容差（与 conversion_deps 相同，网络共享时间精度较粗）
+MTIME_TOLERANCE_SECONDS = 2.0
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class DxfGeometry:
+    """
+    标注阶段得到的单个源DXF几何信息
+
+    范围均为XY范围 [xmin, ymin, xmax, ymax]：extents 为模型空间全部实体的范围，
+    layer_extents 为各图层的范围，无法完整计算时为None；
+    layer_0_extents 为用于放置标注的图层0范围。
+    """
+    source: str
+    size: int
+    mtime: float
+    sha256: str
+    output: str = ""
+    extents: Optional[List[float]] = None
+    layer_0_extents: Optional[List[float]] = None
+    layers: Dict[str, int] = field(default_factory=dict)
+    layer_extents: Dict[str, Optional[List[float]]] = field(default_factory=dict)
+    label: Optional[Dict] = None
+
+    @property
+    def entity_count(self) -> int:
+        return sum(self.layers.values())
+
+    def bounding_box(self, layers: Optional[Collection[str]] = None) -> Optional[BoundingBox]:
+        """
+        全部实体或指定图层的范围
+
+        图层名不区分大小写。有图层的范围未记录时返回None（需重新计算）；
+        指定图层中没有实体时返回空范围
+        """
+        if layers is None:
+            extents = [self.extents]
+        else:
+            wanted = {name.casefold() for name in layers}
+            extents = [self.layer_extents.get(name) for name in self.layers if name.casefold() in wanted]
+        bbox = BoundingBox()
+        for item in extents:
+            if item is None:
+                return None
+            xmin, ymin, xmax, ymax = item
+            bbox.extend([(xmin, ymin, 0.0), (xmax, ymax, 0.0)])
+        return bbox
+
+    @classmethod
+    def from_source(cls, path: Path, **kwargs) -> "DxfGeometry":
+        """记录源文件的大小、修改时间和SHA-256"""
+        stat = path.stat()
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return cls(str(path), stat.st_size, stat.st_mtime, digest.hexdigest(), **kwargs)
+
+
+def xy_extents(bbox) -> Optional[List[float]]:
+    """BoundingBox 转为 [xmin, ymin, xmax, ymax]，没有数据时为None"""
+    if bbox is None or not bbox.has_data:
+        return None
+    extmin, extmax = bbox.extmin, bbox.extmax
+    return [float(extmin[0]), float(extmin[1]), float(extmax[0]), float(extmax[1])]
+
+
+def union_extents(extents: Iterable[Optional[List[float]]]) -> Optional[List[float]]:
+    """合并多个XY范围，任一为None时结果为None"""
+    result: Optional[List[float]] = None
+    for item in extents:
+        if item is None:
+            return None
+        if result is None:
+            result = list(item)
+        else:
+            result = [min(result[0], item[0]), min(result[1], item[1]), max(result[2], item[2]), max(result[3], item[3])]
+    return result
+
+
+class DxfManifest:
+    """
+    一次DXF标注的几何清单
+
+    标注时按源文件记录范围、各图层实体数、内容哈希和标注位置，保存为
+    处理结果目录下的 dxf_manifest.json。合并时源文件大小和修改时间未变
+    即直接使用记录的范围，不再重新计算。
+    """
+
+    FILE_NAME = "dxf_manifest.json"
+    VERSION = 1
+
+    def __init__(self, entries: Iterable[DxfGeometry] = ()):
+        self.entries: Dict[str, DxfGeometry] = {}
+        for geometry in entries:
+            self.add(geometry)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, geometry: DxfGeometry) -> None:
+        self.entries[self._key(Path(geometry.source))] = geometry
+
+    def lookup(self, path: Path) -> Optional[DxfGeometry]:
+        """返回仍有效的记录；文件已修改或没有记录时返回None"""
+        geometry = self.entries.get(self._key(path))
+        if geometry is None:
+            return None
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        if stat.st_size != geometry.size or abs(stat.st_mtime - geometry.mtime) > MTIME_TOLERANCE_SECONDS:
+            return None
+        return geometry
+
+    def for_directory(self, directory: Path) -> "DxfManifest":
+        """只包含某个目录下源文件的子清单（传给子进程时减少序列化量）"""
+        key = self._key(directory)
+        return DxfManifest(
+            geometry for geometry in self.entries.values() if self._key(Path(geometry.source).parent) == key
+        )
+
+    def save(self, directory: Path) -> Path:
+        path = directory / self.FILE_NAME
+        record = {
+            "version": self.VERSION,
+            "files": [asdict(geometry) for geometry in self.entries.values()],
+        }
+        path.write_text(json.dumps(record, ensure_ascii=False, indent=2), encoding="utf-8")
+        return path
+
+    @classmethod
+    def load(cls, directory: Path) -> Optional["DxfManifest"]:
+        """读取清单，不存在、损坏或版本不符时返回None"""
+        try:
+            record = json.loads((directory / cls.FILE_NAME).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if not isinstance(record, dict) or record.get("version") != cls.VERSION:
+            return None
+        try:
+            return cls(DxfGeometry(**entry) for entry in record.get("files", []))
+        except TypeError:
+            return None
+
+    @staticmethod
+    def _key(path: Path) -> str:
+        return os.path.normcase(str(path))
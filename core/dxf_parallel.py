@@ -0,0 +1,152 @@
+# core/dxf_parallel.py
+
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, as_completed, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import psutil
+except ImportError:  # 可选依赖，缺失时不限制内存
+    psutil = None
+
+from config.settings import DxfConfig
+from core.dxf_manifest import DxfGeometry, DxfManifest
+from core.dxf_processor import AnnotationOutcome, DXFProcessor, MergeGroup
+
+# 合并一个组的内存占用约为组内DXF文件总大小的倍数（源文档加合并文档）
+MERGE_MEMORY_FACTOR = 20
+# 未配置内存预算时使用当前可用内存的比例
+AUTO_MEMORY_FRACTION = 0.6
+
+
+@dataclass(frozen=True)
+class AnnotationJob:
+    """一个DXF标注任务"""
+    source: Path
+    quantity: int
+    output_dir: Path
+
+
+# (任务, 是否成功, 日志, 源文件几何信息)
+AnnotationResult = Tuple[AnnotationJob, bool, str, Optional[DxfGeometry]]
+
+
+def resolve_worker_count(configured: int) -> int:
+    """0表示使用全部CPU核心"""
+    if configured > 0:
+        return configured
+    return os.cpu_count() or 1
+
+
+def _annotate_chunk(dxf_config: DxfConfig, jobs: Sequence[AnnotationJob]) -> List[AnnotationResult]:
+    """子进程入口：同一块任务共用一个处理器"""
+    processor = DXFProcessor(dxf_config=dxf_config)
+    return [(job, *processor.annotate_file(job.source, job.output_dir)) for job in jobs]
+
+
+class DXFAnnotationPool:
+    """
+    多进程DXF标注
+
+    ezdxf读取、计算范围和保存都是纯CPU/IO工作，受GIL限制无法用线程并行，
+    因此按块提交到进程池，结果按完成顺序逐个返回，便于实时更新进度。
+    """
+
+    def __init__(self, dxf_config: DxfConfig | None = None, max_workers: int = 0, chunk_size: int = 4):
+        self.dxf_config = dxf_config or DxfConfig()
+        self.max_workers = resolve_worker_count(max_workers)
+        self.chunk_size = max(chunk_size, 1)
+
+    def run(self, jobs: Sequence[AnnotationJob]) -> Iterator[AnnotationResult]:
+        chunks = [list(jobs[i:i + self.chunk_size]) for i in range(0, len(jobs), self.chunk_size)]
+        if self.max_workers == 1 or len(chunks) <= 1:
+            # 单核或任务很少时不值得启动进程池
+            processor = DXFProcessor(dxf_config=self.dxf_config)
+            for job in jobs:
+                yield (job, *processor.annotate_file(job.source, job.output_dir))
+            return
+
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as executor:
+            futures = {executor.submit(_annotate_chunk, self.dxf_config, chunk): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                try:
+                    results = future.result()
+                except Exception as e:
+                    # 子进程崩溃时整块记为失败，其余块继续
+                    results = [(job, False, f"❌ 处理失败 [{job.source.name}]: {e}", None) for job in futures[future]]
+                yield from results
+
+
+# (合并组, 是否成功, 日志, 耗时秒, 单遍处理时各文件的标注结果, 各文件的清理统计日志)
+MergeResult = Tuple[MergeGroup, bool, str, float, List[AnnotationOutcome], List[str]]
+
+
+def resolve_memory_budget(configured_mb: int) -> Optional[int]:
+    """合并内存预算（字节）；0表示按可用内存自动计算，无法获取时不限制"""
+    if configured_mb > 0:
+        return configured_mb * 1024 * 1024
+    if psutil is None:
+        return None
+    return int(psutil.virtual_memory().available * AUTO_MEMORY_FRACTION)
+
+
+def _merge_group(
+    dxf_config: DxfConfig, group: MergeGroup, manifest: Optional[DxfManifest]
+) -> Tuple[bool, str, float, List[AnnotationOutcome], List[str]]:
+    """子进程入口：合并一个组"""
+    started = time.perf_counter()
+    processor = DXFProcessor(dxf_config=dxf_config)
+    success, msg, annotations, notes = processor.merge_group(group, manifest)
+    return success, msg, time.perf_counter() - started, annotations, notes
+
+
+class DXFMergePool:
+    """
+    多进程分组合并
+
+    各材料/厚度组互相独立，按估算内存从大到小提交到进程池；同时运行的组的估算内存
+    之和不超过预算（单个超出预算的组在没有其他组运行时单独执行）。
+    结果按分组原顺序返回，日志顺序与串行合并一致。
+    """
+
+    def __init__(self, dxf_config: DxfConfig | None = None, max_workers: int = 0, memory_budget_mb: int = 0):
+        self.dxf_config = dxf_config or DxfConfig()
+        self.max_workers = resolve_worker_count(max_workers)
+        self.memory_budget = resolve_memory_budget(memory_budget_mb)
+
+    @staticmethod
+    def estimate_memory(group: MergeGroup) -> int:
+        return group.source_bytes * MERGE_MEMORY_FACTOR
+
+    def run(self, groups: Sequence[MergeGroup], manifest: Optional[DxfManifest] = None) -> List[MergeResult]:
+        results: List[Optional[MergeResult]] = [None] * len(groups)
+        pending = sorted(range(len(groups)), key=lambda index: self.estimate_memory(groups[index]), reverse=True)
+        running: Dict[Future, Tuple[int, int]] = {}  # future -> (分组序号, 估算内存)
+
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, len(groups))) as executor:
+            while pending or running:
+                for index in list(pending):
+                    if len(running) >= self.max_workers:
+                        break
+                    estimate = self.estimate_memory(groups[index])
+                    in_use = sum(memory for _index, memory in running.values())
+                    if running and self.memory_budget is not None and in_use + estimate > self.memory_budget:
+                        continue
+                    pending.remove(index)
+                    group_manifest = manifest.for_directory(groups[index].input_dir) if manifest is not None else None
+                    future = executor.submit(_merge_group, self.dxf_config, groups[index], group_manifest)
+                    running[future] = (index, estimate)
+
+                done, _not_done = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, _estimate = running.pop(future)
+                    group = groups[index]
+                    try:
+                        results[index] = (group, *future.result())
+                    except Exception as e:
+                        # 子进程崩溃时该组记为失败，其余组继续
+                        results[index] = (group, False, f"❌ 合并失败 [{group.label}]: {e}", 0.0, [], [])
+        return results
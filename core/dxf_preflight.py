@@ -0,0 +1,153 @@
+# core/dxf_preflight.py
+
+import mmap
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+from ezdxf.lldxf.const import acad_release
+
+BINARY_SENTINEL = b"AutoCAD Binary DXF\r\n\x1a\x00"
+# 二进制DXF以组码0加 "EOF\0" 结尾
+BINARY_EOF = b"EOF\x00"
+# EOF之后允许的空白和DOS文件结束符
+TRAILING_BYTES = b" \t\r\n\x00\x1a"
+REASON_SUFFIX = ".reason.txt"
+
+
+@dataclass
+class PreflightResult:
+    """单个DXF的预检结果，reason 为空表示通过"""
+    path: Path
+    reason: str = ""
+    version: str = ""
+    binary: bool = False
+    entity_count: int = 0
+    quarantined_to: Optional[Path] = None
+
+    @property
+    def ok(self) -> bool:
+        return not self.reason
+
+
+class _Invalid(Exception):
+    """文件结构错误"""
+
+
+def preflight_file(path: Path) -> PreflightResult:
+    """
+    快速检查DXF结构
+
+    内存映射文件后逐行扫描一遍，不建立任何实体对象：组码必须是整数，
+    SECTION/ENDSEC 成对出现，$ACADVER 为已知版本，ENTITIES 段中有实体，
+    最后以 0/EOF 结束。二进制DXF只检查文件头和结束标记。
+    """
+    result = PreflightResult(path)
+    try:
+        size = path.stat().st_size
+        if size == 0:
+            raise _Invalid("文件为空")
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if data[:len(BINARY_SENTINEL)] == BINARY_SENTINEL:
+                result.binary = True
+                if data[-len(BINARY_EOF):] != BINARY_EOF:
+                    raise _Invalid("缺少EOF结束标记（文件可能被截断）")
+            else:
+                _scan_ascii(data, result)
+    except _Invalid as e:
+        result.reason = str(e)
+    except OSError as e:
+        result.reason = f"无法读取: {e}"
+    return result
+
+
+def _scan_ascii(data: mmap.mmap, result: PreflightResult) -> None:
+    readline = data.readline
+    line_number = 0
+    section: Optional[bytes] = None
+    expect_section_name = False
+    expect_version = False
+    has_entities_section = False
+
+    while True:
+        code_line = readline()
+        if not code_line:
+            raise _Invalid("缺少EOF结束标记（文件可能被截断）")
+        value_line = readline()
+        line_number += 2
+        if not value_line:
+            raise _Invalid(f"第 {line_number - 1} 行组码缺少值（文件可能被截断）")
+        try:
+            code = int(code_line)
+        except ValueError:
+            raise _Invalid(f"第 {line_number - 1} 行组码无效: {code_line.strip()[:20]!r}") from None
+        value = value_line.strip()
+
+        if expect_section_name:
+            if code != 2:
+                raise _Invalid(f"第 {line_number - 1} 行: SECTION 后缺少段名")
+            section = value
+            has_entities_section = has_entities_section or value == b"ENTITIES"
+            expect_section_name = False
+        elif expect_version:
+            expect_version = False
+            version = value.decode("ascii", "replace")
+            if version not in acad_release:
+                raise _Invalid(f"未知的DXF版本: {version}")
+            result.version = version
+        elif code == 0:
+            if value == b"SECTION":
+                if section is not None:
+                    raise _Invalid(f"第 {line_number} 行: 段 {section.decode('ascii', 'replace')} 未结束")
+                expect_section_name = True
+            elif value == b"ENDSEC":
+                if section is None:
+                    raise _Invalid(f"第 {line_number} 行: ENDSEC 没有对应的 SECTION")
+                section = None
+            elif value == b"EOF":
+                if section is not None:
+                    raise _Invalid(f"段 {section.decode('ascii', 'replace')} 未结束")
+                break
+            elif section == b"ENTITIES":
+                result.entity_count += 1
+        elif code == 9 and value == b"$ACADVER" and section == b"HEADER":
+            expect_version = True
+
+    if data[data.tell():].strip(TRAILING_BYTES):
+        raise _Invalid(f"第 {line_number} 行: EOF之后还有数据")
+    if not has_entities_section:
+        raise _Invalid("缺少ENTITIES段")
+    if result.entity_count == 0:
+        raise _Invalid("ENTITIES段中没有实体")
+
+
+def quarantine(result: PreflightResult, root: Path, quarantine_dir: Path) -> Path:
+    """把未通过的文件按相对 root 的路径移到隔离目录，并在旁边写出原因文件"""
+    try:
+        relative = result.path.relative_to(root)
+    except ValueError:
+        relative = Path(result.path.name)
+    target = quarantine_dir / relative
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # 上次隔离的同名文件直接覆盖
+    target.unlink(missing_ok=True)
+    shutil.move(str(result.path), str(target))
+    target.with_name(target.name + REASON_SUFFIX).write_text(
+        f"原路径: {result.path}\n原因: {result.reason}\n", encoding="utf-8"
+    )
+    result.quarantined_to = target
+    return target
+
+
+def preflight_directory(directory: Path, quarantine_dir: Path) -> List[PreflightResult]:
+    """预检目录下所有DXF（递归），未通过的移到隔离目录"""
+    results: List[PreflightResult] = []
+    if not directory.is_dir():
+        return results
+    for path in sorted(directory.rglob("*.dxf")):
+        result = preflight_file(path)
+        if not result.ok:
+            quarantine(result, directory, quarantine_dir)
+        results.append(result)
+    return results
@@ -1,13 +1,109 @@
 # core/dxf_processor.py
 
+import glob
+import time
+from collections import defaultdict
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Tuple, List
+from typing import Dict, List, Optional, Sequence, Tuple
 from ezdxf import zoom, addons
 from ezdxf.filemanagement import readfile, new
-from ezdxf.bbox import extents
 from ezdxf.document import Drawing
+from ezdxf.math import BoundingBox, Vec3
 
 from config.settings import DxfConfig
+from core.dxf_bbox import fast_extents
+from core.dxf_cleanup import CleanupStats, DxfCleaner, remove_duplicates
+from core.dxf_dedup import geometry_signature
+from core.dxf_layout import ShelfPacker
+from core.dxf_manifest import DxfGeometry, DxfManifest, union_extents, xy_extents
+from core.dxf_spill import BlockSpill
+from core.dxf_stream import DXFStreamAnnotator, StreamFallback
+
+
+# 合并耗时汇总中列出的最慢分组数
+MERGE_SLOWEST_GROUPS = 3
+# 紧凑排样时按文字高度估算零件名称宽度的系数
+LABEL_WIDTH_FACTOR = 0.7
+
+# 单个文件的标注结果: (是否成功, 日志, 源文件几何信息)
+AnnotationOutcome = Tuple[bool, str, Optional[DxfGeometry]]
+# 合并一个组的结果: (是否成功, 日志, 单遍处理时各文件的标注结果, 各文件的清理统计日志)
+GroupMergeOutcome = Tuple[bool, str, List[AnnotationOutcome], List[str]]
+
+
+@dataclass(frozen=True)
+class MergeGroup:
+    """一个材料/厚度合并组"""
+    label: str
+    input_dir: Path
+    output_file: Path
+    source_bytes: int = 0  # 组内DXF文件总大小，用于估算合并时的内存占用
+    processed_dir: Optional[Path] = None  # 单遍处理时标注副本的输出目录
+
+
+@dataclass(frozen=True)
+class _Placement:
+    """紧凑排样时待摆放的零件"""
+    block_name: str
+    block_origin: Vec3  # 块内几何的XY原点
+    width: float
+    height: float
+    label: str
+
+
+@dataclass
+class _MergeSource:
+    """读取后待导入的源文件"""
+    doc: Drawing
+    entities: List
+    estimated_bytes: int
+    duplicates_removed: int = 0
+    prepared: bool = False  # 已记录删除的重复实体并完成清理
+    _signature: Optional[str] = None
+    _signed: bool = False
+
+    def signature(self, bbox, enabled: bool) -> Optional[str]:
+        if not enabled:
+            return None
+        if not self._signed:
+            self._signature = geometry_signature(self.entities, (bbox.extmin.x, bbox.extmin.y, 0))
+            self._signed = True
+        return self._signature
+
+
+class _MergeShard:
+    """合并输出的一个分片（独立的DXF文档，块定义只在本分片内复用）"""
+
+    def __init__(self, streaming: bool = False):
+        self.doc: Drawing = new()
+        self.msp = self.doc.modelspace()
+        # 流式合并时导入完成的块写到磁盘，保存时再插回
+        self.spill: Optional[BlockSpill] = BlockSpill(self.doc) if streaming else None
+        # 块内容不在内存中时无法用 zoom.extents，按零件摆放位置记录范围
+        self.layout_box = BoundingBox()
+        self.x_offset = 0.0
+        self.part_count = 0
+        self.entity_count = 0
+        self.estimated_bytes = 0
+        # 值为 (块名, 块内几何的XY原点)
+        self.blocks_by_signature: Dict[str, Tuple[str, Vec3]] = {}
+        self.blocks_by_file_hash: Dict[str, Tuple[str, Vec3]] = {}
+        # 紧凑排样时零件在保存前统一摆放
+        self.placements: List[_Placement] = []
+
+    def find_block(self, signature: Optional[str]) -> Optional[Tuple[str, Vec3]]:
+        return self.blocks_by_signature.get(signature) if signature else None
+
+    def register(self, block: Tuple[str, Vec3], signature: Optional[str], geometry: Optional[DxfGeometry]) -> None:
+        if signature:
+            self.blocks_by_signature[signature] = block
+        if geometry is not None:
+            self.blocks_by_file_hash[geometry.sha256] = block
+
+    def close(self) -> None:
+        if self.spill is not None:
+            self.spill.close()
 
 
 class DXFProcessor:
@@ -24,27 +120,131 @@ class DXFProcessor:
         self.text_layer = self.dxf_config.text_layer
         self.text_color = self.dxf_config.text_color
         self.spacing = self.dxf_config.spacing
+        self.annotation_mode = self.dxf_config.annotation_mode
+        self.merge_visible_layers = self.parse_layer_names(self.dxf_config.merge_visible_layers)
+        self.merge_import_visible_only = self.dxf_config.merge_import_visible_only
+        self.merge_dedup_blocks = self.dxf_config.merge_dedup_blocks
+        self.binary_intermediate = self.dxf_config.binary_intermediate
+        self.binary_final = self.dxf_config.binary_final
+        self.merge_streaming = self.dxf_config.merge_streaming
+        self.merge_layout = self.dxf_config.merge_layout
+        tolerance = self.dxf_config.merge_cleanup_tolerance
+        remove_duplicates = self.dxf_config.remove_duplicates
+        # 合并前的几何清理和读取时删除重复实体的容差，未启用时为None；
+        # 读取时已删除重复实体，合并前清理不再重复检测
+        self.merge_cleaner: Optional[DxfCleaner] = (
+            DxfCleaner(tolerance, duplicates=not remove_duplicates) if self.dxf_config.merge_cleanup else None
+        )
+        self.duplicate_tolerance: Optional[float] = tolerance if remove_duplicates else None
+
+    @staticmethod
+    def _dxf_format(binary: bool) -> str:
+        """ezdxf 保存格式；读取时 readfile 自动识别两种格式"""
+        return "bin" if binary else "asc"
+
+    @staticmethod
+    def parse_layer_names(value: Sequence[str] | str) -> List[str]:
+        """解析图层列表配置（英文分号分隔）"""
+        if isinstance(value, str):
+            items = value.replace("；", ";").split(";")
+        else:
+            items = list(value)
+        names: List[str] = []
+        for item in items:
+            name = item.strip()
+            if name and name not in names:
+                names.append(name)
+        return names
     
     def process_dxf_file(self, file_path: Path, num: int, output_dir: Path) -> Tuple[bool, str]:
         """处理DXF文件：在图层0实体上方添加文件名标注"""
+        success, msg, _geometry = self.annotate_file(file_path, output_dir)
+        return success, msg
+
+    def annotate_file(self, file_path: Path, output_dir: Path) -> Tuple[bool, str, Optional[DxfGeometry]]:
+        """
+        添加文件名标注，同时返回供几何清单使用的源文件范围、图层实体数和标注位置
+
+        流式标注只能写出ASCII DXF，要求二进制输出或删除重复实体时使用完整加载方式
+        """
+        if self.annotation_mode != "stream" or self.binary_intermediate or self.duplicate_tolerance is not None:
+            return self._process_dxf_document(file_path, output_dir)
+        
+        output_file = output_dir / f"processed_{file_path.name}"
+        try:
+            result = DXFStreamAnnotator(self.text_layer, self.text_color).annotate(file_path, output_file, file_path.stem)
+            layer_extents = {name: xy_extents(box) for name, box in result.layer_extents.items()}
+            geometry = DxfGeometry.from_source(
+                file_path,
+                output=str(output_file),
+                extents=union_extents(layer_extents.values()),
+                layer_0_extents=xy_extents(result.bbox),
+                layers=result.layers,
+                layer_extents=layer_extents,
+                label=self._label_record(file_path.stem, result.label_insert, result.label_height),
+            )
+            return True, f"✅ 成功处理 | 保存至: {output_file.name}", geometry
+        except StreamFallback as e:
+            success, msg, geometry = self._process_dxf_document(file_path, output_dir)
+            return success, f"{msg}（{e}，已完整加载处理）", geometry
+        except Exception as e:
+            return False, f"❌ 处理失败 [{file_path.name}]: {str(e)}", None
+
+    def _label_record(self, text: str, insert, height: float) -> Dict:
+        return {"text": text, "insert": [float(insert[0]), float(insert[1])], "height": float(height), "layer": self.text_layer}
+    
+    def _process_dxf_document(self, file_path: Path, output_dir: Path) -> Tuple[bool, str, Optional[DxfGeometry]]:
+        """完整加载文档后标注"""
+        try:
+            doc, duplicates = self._load_document(file_path)
+        except Exception as e:
+            return False, f"❌ 处理失败 [{file_path.name}]: {str(e)}", None
+        success, msg, geometry = self._annotate_document(doc, file_path, output_dir)
+        return success, self._duplicates_note(msg, duplicates), geometry
+
+    def _load_document(self, file_path: Path) -> Tuple[Drawing, int]:
+        """读取DXF；启用删除重复实体时同时删除模型空间中重合的直线、圆弧和圆，返回删除数量"""
+        doc: Drawing = readfile(str(file_path))
+        if self.duplicate_tolerance is None:
+            return doc, 0
+        return doc, remove_duplicates(doc, self.duplicate_tolerance)
+
+    @staticmethod
+    def _duplicates_note(msg: str, duplicates: int) -> str:
+        return f"{msg}（删除重复实体 {duplicates} 个）" if duplicates else msg
+
+    def _annotate_document(self, doc: Drawing, file_path: Path, output_dir: Path) -> AnnotationOutcome:
+        """在已加载的文档上添加标注并保存到 output_dir"""
         try:
-            doc: Drawing = readfile(str(file_path))
             msp = doc.modelspace()
             
             if '0' not in doc.layers:
-                return False, f"❌ 文件中不存在图层0: {file_path.name}"
+                return False, f"❌ 文件中不存在图层0: {file_path.name}", None
             
             # 获取图层0实体
-            layer_0_entities = [e for e in msp if hasattr(e.dxf, 'layer') and e.dxf.layer == '0']
+            entities = list(msp)
+            layer_0_entities = [e for e in entities if hasattr(e.dxf, 'layer') and e.dxf.layer == '0']
             if not layer_0_entities:
-                return False, f"❌ 图层0中没有实体: {file_path.name}"
+                return False, f"❌ 图层0中没有实体: {file_path.name}", None
+
+            entities_by_layer: Dict[str, List] = defaultdict(list)
+            for e in entities:
+                entities_by_layer[e.dxf.get('layer', '0')].append(e)
+            layer_extents = {name: xy_extents(fast_extents(items)) for name, items in entities_by_layer.items()}
+            geometry = DxfGeometry.from_source(
+                file_path,
+                extents=union_extents(layer_extents.values()),
+                layers={name: len(items) for name, items in entities_by_layer.items()},
+                layer_extents=layer_extents,
+            )
             
             # 插入文件名标注
             try:
-                entity_extent = extents(layer_0_entities)
+                entity_extent = fast_extents(layer_0_entities)
                 if entity_extent.has_data:
                     text_height = max((entity_extent.extmax.y - entity_extent.extmin.y) * 0.1, 5.0)
                     insert_pos = (0, - text_height * 1.5)
+                    geometry.layer_0_extents = xy_extents(entity_extent)
                 else:
                     text_height = 10
                     insert_pos = (0, 0)
@@ -58,143 +258,451 @@ class DXFProcessor:
                         'color': self.text_color
                     }
                 ).set_placement(insert_pos)
+                geometry.label = self._label_record(file_name_to_insert, insert_pos, text_height)
             except Exception as text_err:
                 print(f"插入文字提示: {text_err}")
             
             # 保存文件
             zoom.extents(msp)
             output_file = output_dir / f"processed_{file_path.name}"
-            doc.saveas(str(output_file))
+            doc.saveas(str(output_file), fmt=self._dxf_format(self.binary_intermediate))
+            geometry.output = str(output_file)
             
-            return True, f"✅ 成功处理 | 保存至: {output_file.name}"
+            return True, f"✅ 成功处理 | 保存至: {output_file.name}", geometry
             
         except Exception as e:
             import traceback
             error_detail = traceback.format_exc()
             print(f"详细错误信息:\n{error_detail}")
-            return False, f"❌ 处理失败 [{file_path.name}]: {str(e)}"
+            return False, f"❌ 处理失败 [{file_path.name}]: {str(e)}", None
 
-    def merge_directory_to_dxf(self, input_dir: Path, output_file: Path) -> Tuple[bool, str]:
-        """合并目录下所有DXF文件到一个文件"""
+    def merge_directory_to_dxf(
+        self, input_dir: Path, output_file: Path, manifest: Optional[DxfManifest] = None
+    ) -> Tuple[bool, str]:
+        """合并目录下所有DXF文件到一个文件（说明见 _merge_directory）"""
+        success, msg, _annotations, _notes = self._merge_directory(input_dir, output_file, manifest)
+        return success, msg
+
+    def merge_group(self, group: MergeGroup, manifest: Optional[DxfManifest] = None) -> GroupMergeOutcome:
+        """合并一个组；组给出 processed_dir 时同时写出各文件的标注副本（单遍处理）"""
+        if group.processed_dir is None and self.merge_cleaner is None and self.duplicate_tolerance is None:
+            # 没有逐文件的结果需要返回
+            success, msg = self.merge_directory_to_dxf(group.input_dir, group.output_file, manifest)
+            return success, msg, [], []
+        if group.processed_dir is not None:
+            group.processed_dir.mkdir(parents=True, exist_ok=True)
+        return self._merge_directory(group.input_dir, group.output_file, manifest, group.processed_dir)
+
+    def _merge_directory(
+        self,
+        input_dir: Path,
+        output_file: Path,
+        manifest: Optional[DxfManifest] = None,
+        annotate_dir: Optional[Path] = None,
+    ) -> GroupMergeOutcome:
+        """
+        合并目录下所有DXF文件到一个文件
+
+        给出几何清单时，源文件未变化的直接使用清单中的范围。
+        merge_import_visible_only 为True时只导入显示图层上的实体；
+        merge_dedup_blocks 为True时几何相同的零件共用一个块定义，只插入多次。
+        超出实体数、文件大小或排版宽度限制时拆分为 <名称>_01.dxf、<名称>_02.dxf ...，
+        每个分片写满即保存；只有一个分片时仍使用原文件名。
+        merge_streaming 为True时每个源文档导入后立即释放，块实体写到磁盘，
+        内存占用取决于最大的单个零件而不是整个组。
+        给出 annotate_dir 时每个源文件只读取一次：标注后保存副本到 annotate_dir，
+        同一个文档再导入合并文件（标注总是完整加载，不使用流式标注），
+        返回的标注结果与 annotate_file 相同。
+        merge_cleanup 为True时导入前先清理重复、零长度和共线分段的几何，
+        每个文件的清理统计作为日志返回。
+        merge_layout 为 "pack" 时零件不再排成一行，而是在分片保存前按 merge_sheet_width
+        做货架式紧凑排样（宽度为0时接近正方形），此时不按排版宽度拆分分片。
+        """
+        annotations: List[AnnotationOutcome] = []
+        notes: List[str] = []
         if not input_dir.is_dir():
-            return False, f"❌ 错误: {input_dir} 不是有效的目录"
+            return False, f"❌ 错误: {input_dir} 不是有效的目录", annotations, notes
 
-        merged_doc: Drawing = new()
-        merged_msp = merged_doc.modelspace()
-        
         dxf_files = sorted(list(input_dir.glob("*.dxf")))
         if not dxf_files:
-            return False, "⚠️ 文件夹内没有 DXF 文件"
+            return False, "⚠️ 文件夹内没有 DXF 文件", annotations, notes
+
+        # DXF图层名不区分大小写
+        visible_layers = {name.casefold() for name in self.merge_visible_layers}
+        imported_layers = self.merge_visible_layers if self.merge_import_visible_only else None
+        layer_filter = visible_layers if imported_layers is not None else None
+        for stale in self._shard_files(output_file):
+            stale.unlink()
 
-        current_x_offset = 0.0
-        spacing = self.spacing
+        shard = _MergeShard(self.merge_streaming)
+        saved_files: List[Path] = []
         success_count = 0
+        reused_count = 0
 
         for dxf_file in dxf_files:
             try:
-                source_doc: Drawing = readfile(str(dxf_file))
-                source_msp = source_doc.modelspace()
-                
-                entities = list(source_msp.query('*'))
-                if not entities:
+                geometry = manifest.lookup(dxf_file) if manifest is not None else None
+                source = None
+                if annotate_dir is not None:
+                    source, geometry, outcome = self._annotate_merge_source(dxf_file, annotate_dir, layer_filter)
+                    annotations.append(outcome)
+                    if source is None:
+                        continue
+                resolved = self._find_block_or_source(shard, dxf_file, geometry, source, imported_layers, layer_filter, notes)
+                if resolved is None:
                     continue
-                
-                bbox = extents(entities)
-                if not bbox.has_data:
-                    continue
-
-                block_name = f"block_{dxf_file.stem}_{success_count}".replace(" ", "_")[:100]
-                
-                new_block = merged_doc.blocks.new(name=block_name)
-                importer = addons.importer.Importer(source_doc, merged_doc)
-                importer.import_entities(entities, target_layout=new_block)
-                importer.finalize()
-
-                insert_point = (current_x_offset, 0, 0)
-                merged_msp.add_blockref(block_name, insert_point)
-                
-                file_label = dxf_file.stem
-                model_height = bbox.extmax.y - bbox.extmin.y
-                text_y = model_height + self.text_height
-                
-                merged_msp.add_text(
-                    file_label,
-                    dxfattribs={
-                        'height': self.text_height,
-                        'layer': self.text_layer,
-                        'color': self.text_color
-                    }
-                ).set_placement((current_x_offset, text_y))
+                block, source, bbox = resolved
 
                 model_width = bbox.extmax.x - bbox.extmin.x
-                current_x_offset += model_width + spacing
+                if shard.part_count and self._shard_full(shard, model_width, source if block is None else None):
+                    saved_files.append(self._save_shard(shard, output_file, len(saved_files) + 1, visible_layers))
+                    shard.close()
+                    shard = _MergeShard(self.merge_streaming)
+                    # 上一分片中复用的块在新分片中不存在，按同样的步骤读取源文件重新导入
+                    resolved = self._find_block_or_source(shard, dxf_file, geometry, source, imported_layers, layer_filter, notes)
+                    if resolved is None:
+                        continue
+                    block, source, bbox = resolved
 
+                if block is None:
+                    block = self._import_source(shard, dxf_file, source, bbox, geometry)
+                else:
+                    reused_count += 1
+                    if self.merge_dedup_blocks and geometry is not None:
+                        shard.blocks_by_file_hash[geometry.sha256] = block
+                # 源文档用完立即释放
+                source = None
+                self._place_block(shard, block, bbox, dxf_file.stem)
                 success_count += 1
 
             except Exception as e:
                 print(f"❌ 处理 {dxf_file.name} 失败: {e}")
 
-        if success_count == 0:
-            return False, "❌ 没有成功合并任何文件"
+        try:
+            if success_count == 0:
+                return False, "❌ 没有成功合并任何文件", annotations, notes
+            if saved_files:
+                saved_files.append(self._save_shard(shard, output_file, len(saved_files) + 1, visible_layers))
+                output_file.unlink(missing_ok=True)
+                target = f"{', '.join(path.name for path in saved_files)}（{len(saved_files)} 个分片）"
+            else:
+                self._save_shard(shard, output_file, 0, visible_layers)
+                target = output_file.name
+            reused_note = f"（复用块定义 {reused_count} 次）" if reused_count else ""
+            return True, f"✅ 成功合并 {success_count} 个文件到: {target}{reused_note}", annotations, notes
+        except Exception as e:
+            return False, f"❌ 保存合并文件失败: {str(e)}", annotations, notes
+        finally:
+            shard.close()
+
+    def _find_block_or_source(
+        self,
+        shard: "_MergeShard",
+        dxf_file: Path,
+        geometry: Optional[DxfGeometry],
+        source: Optional["_MergeSource"],
+        imported_layers: Optional[Sequence[str]],
+        layer_filter: Optional[set],
+        notes: List[str],
+    ) -> Optional[Tuple[Optional[Tuple[str, Vec3]], Optional["_MergeSource"], BoundingBox]]:
+        """
+        在分片中查找可复用的块，找不到时读取并清理源文件
+
+        返回 (块, 源, 范围)，块为None时需要导入源；没有可合并的实体时返回None。
+        内容相同的文件按清单哈希复用，不读取源文件；其余按几何签名复用。
+        源文件的删除重复和清理统计在首次准备时记入 notes，分片拆分后重新读取时同样记录。
+        """
+        bbox = geometry.bounding_box(imported_layers) if geometry is not None else None
+        if self.merge_dedup_blocks and bbox is not None:
+            # 内容完全相同的源文件无需再读取
+            block = shard.blocks_by_file_hash.get(geometry.sha256)
+            if block is not None:
+                return (block, source, bbox) if bbox.has_data else None
+
+        if source is None:
+            source = self._read_merge_source(dxf_file, layer_filter)
+            if source is None:
+                return None
+        if not source.prepared:
+            if source.duplicates_removed:
+                notes.append(f"♻ {dxf_file.name}: 删除重复实体 {source.duplicates_removed} 个")
+            if self.merge_cleaner is not None:
+                notes.append(f"🧹 {dxf_file.name}: {self._clean_source(source).summary()}")
+            source.prepared = True
+        if bbox is None:
+            bbox = fast_extents(source.entities)
+        if not bbox.has_data:
+            return None
+        return shard.find_block(source.signature(bbox, self.merge_dedup_blocks)), source, bbox
+
+    def _import_source(
+        self, shard: "_MergeShard", dxf_file: Path, source: "_MergeSource", bbox, geometry: Optional[DxfGeometry]
+    ) -> Tuple[str, Vec3]:
+        """把源文件导入为分片中的新块，登记供后续复用；流式合并时块实体随即写到磁盘"""
+        block = self._import_block(shard, dxf_file, source, bbox)
+        if self.merge_dedup_blocks:
+            shard.register(block, source.signature(bbox, True), geometry)
+        if shard.spill is not None:
+            shard.spill.spill(block[0])
+        return block
+
+    def _place_block(self, shard: "_MergeShard", block: Tuple[str, Vec3], bbox, label: str) -> None:
+        """插入零件块和名称；紧凑排样时只记录，分片保存前统一摆放"""
+        block_name, block_origin = block
+        model_width = bbox.extmax.x - bbox.extmin.x
+        model_height = bbox.extmax.y - bbox.extmin.y
+        if self.merge_layout == "pack":
+            shard.placements.append(_Placement(block_name, block_origin, model_width, model_height, label))
+        else:
+            # 复用的块按两者原点之差平移，摆放位置与单独建块时一致
+            insert_point = (shard.x_offset + bbox.extmin.x - block_origin.x, bbox.extmin.y - block_origin.y, 0)
+            shard.msp.add_blockref(block_name, insert_point)
+            text_y = model_height + self.text_height
+            self._add_label(shard, label, (shard.x_offset, text_y))
+            shard.layout_box.extend([
+                (shard.x_offset + bbox.extmin.x, bbox.extmin.y, 0),
+                (shard.x_offset + bbox.extmax.x, bbox.extmax.y, 0),
+                (shard.x_offset, text_y + self.text_height, 0),
+            ])
+        shard.x_offset += model_width + self.spacing
+        shard.part_count += 1
+        shard.entity_count += 2
+
+    def _read_merge_source(self, dxf_file: Path, visible_layers: Optional[set]) -> Optional["_MergeSource"]:
+        """读取源文件模型空间实体；visible_layers 不为None时只保留这些图层（小写）的实体"""
+        source_doc, duplicates = self._load_document(dxf_file)
+        source = self._merge_source(source_doc, dxf_file, visible_layers)
+        if source is not None:
+            source.duplicates_removed = duplicates
+        return source
+
+    def _annotate_merge_source(
+        self, dxf_file: Path, annotate_dir: Path, visible_layers: Optional[set]
+    ) -> Tuple[Optional["_MergeSource"], Optional[DxfGeometry], AnnotationOutcome]:
+        """读取一次源文件，标注并保存副本，返回同一文档中待合并的实体"""
+        try:
+            source_doc, duplicates = self._load_document(dxf_file)
+        except Exception as e:
+            return None, None, (False, f"❌ 处理失败 [{dxf_file.name}]: {str(e)}", None)
+        # 在添加标注文字之前取出要合并的实体，合并文件中的文字由合并时另行添加
+        source = self._merge_source(source_doc, dxf_file, visible_layers)
+        success, msg, geometry = self._annotate_document(source_doc, dxf_file, annotate_dir)
+        return source, geometry, (success, self._duplicates_note(msg, duplicates), geometry)
+
+    @staticmethod
+    def _merge_source(source_doc: Drawing, dxf_file: Path, visible_layers: Optional[set]) -> Optional["_MergeSource"]:
+        all_entities = list(source_doc.modelspace().query('*'))
+        entities = all_entities
+        if visible_layers is not None:
+            entities = [e for e in all_entities if e.dxf.get('layer', '0').casefold() in visible_layers]
+        if not entities:
+            return None
+        # 按导入实体所占比例估算写入合并文件的字节数
+        estimated_bytes = dxf_file.stat().st_size * len(entities) // len(all_entities)
+        return _MergeSource(source_doc, entities, estimated_bytes)
+
+    def _clean_source(self, source: "_MergeSource") -> CleanupStats:
+        """清理待导入的实体，按剩余实体比例更新估算的写入字节数"""
+        before = len(source.entities)
+        source.entities, stats = self.merge_cleaner.clean(source.entities)
+        source.estimated_bytes = source.estimated_bytes * len(source.entities) // max(before, 1)
+        return stats
+
+    def _import_block(self, shard: "_MergeShard", dxf_file: Path, source: "_MergeSource", bbox) -> Tuple[str, Vec3]:
+        block_name = f"block_{dxf_file.stem}_{shard.part_count}".replace(" ", "_")[:100]
         
+        new_block = shard.doc.blocks.new(name=block_name)
+        importer = addons.importer.Importer(source.doc, shard.doc)
+        importer.import_entities(source.entities, target_layout=new_block)
+        importer.finalize()
+        shard.entity_count += len(source.entities)
+        shard.estimated_bytes += source.estimated_bytes
+        return block_name, Vec3(bbox.extmin.x, bbox.extmin.y, 0)
+
+    def _add_label(self, shard: "_MergeShard", text: str, position: Tuple[float, float]) -> None:
+        shard.msp.add_text(
+            text,
+            dxfattribs={
+                'height': self.text_height,
+                'layer': self.text_layer,
+                'color': self.text_color
+            }
+        ).set_placement(position)
+
+    def _pack_placements(self, shard: "_MergeShard") -> None:
+        """紧凑排样：零件连同上方的名称一起作为矩形排样，零件范围左下角放在排样位置"""
+        label_gap = 2 * self.text_height
+        sizes = [
+            (max(placement.width, len(placement.label) * self.text_height * LABEL_WIDTH_FACTOR), placement.height + label_gap)
+            for placement in shard.placements
+        ]
+        packer = ShelfPacker(self.dxf_config.merge_sheet_width, self.spacing)
+        for placement, (x, y) in zip(shard.placements, packer.pack(sizes)):
+            shard.msp.add_blockref(placement.block_name, (x - placement.block_origin.x, y - placement.block_origin.y, 0))
+            text_y = y + placement.height + self.text_height
+            self._add_label(shard, placement.label, (x, text_y))
+            shard.layout_box.extend([(x, y, 0), (x + placement.width, text_y + self.text_height, 0)])
+        shard.placements.clear()
+
+    def _shard_full(self, shard: "_MergeShard", model_width: float, source: Optional["_MergeSource"]) -> bool:
+        """加入下一个零件后是否超出分片限制（source 为None表示复用已有块，只新增插入和文字）"""
+        config = self.dxf_config
+        added_entities = 2 + (len(source.entities) if source is not None else 0)
+        added_bytes = source.estimated_bytes if source is not None else 0
+        if config.merge_max_entities > 0 and shard.entity_count + added_entities > config.merge_max_entities:
+            return True
+        if config.merge_max_file_mb > 0 and shard.estimated_bytes + added_bytes > config.merge_max_file_mb * 1024 * 1024:
+            return True
+        if self.merge_layout != "pack" and config.merge_max_width > 0 and shard.x_offset + model_width > config.merge_max_width:
+            return True
+        return False
+
+    def _save_shard(self, shard: "_MergeShard", output_file: Path, index: int, visible_layers: set) -> Path:
+        """保存分片；index 为0时使用原文件名，否则为 <名称>_NN.dxf"""
         # 隐藏其他图层
-        visible_layers = {'0', '细实线层'}
-        for layer in merged_doc.layers:
-            if layer.dxf.name not in visible_layers:
+        for layer in shard.doc.layers:
+            if layer.dxf.name.casefold() not in visible_layers:
                 layer.off()
+        path = output_file if index == 0 else output_file.with_name(f"{output_file.stem}_{index:02d}{output_file.suffix}")
+        if shard.placements:
+            self._pack_placements(shard)
+        if shard.spill is not None:
+            # 流式合并按组码拼接，只能写出ASCII DXF
+            if shard.layout_box.has_data:
+                zoom.window(shard.msp, shard.layout_box.extmin, shard.layout_box.extmax)
+            shard.spill.save(path)
+        else:
+            zoom.extents(shard.msp)
+            shard.doc.saveas(str(path), fmt=self._dxf_format(self.binary_final))
+        return path
 
-        try:
-            zoom.extents(merged_msp)
-            merged_doc.saveas(str(output_file))
-            return True, f"✅ 成功合并 {success_count} 个文件到: {output_file.name}"
-        except Exception as e:
-            return False, f"❌ 保存合并文件失败: {str(e)}"
+    @staticmethod
+    def _shard_files(output_file: Path) -> List[Path]:
+        if not output_file.parent.is_dir():
+            return []
+        pattern = f"{glob.escape(output_file.stem)}_[0-9][0-9]{output_file.suffix}"
+        return sorted(output_file.parent.glob(pattern))
+
+    def merge_by_thickness(
+        self,
+        source_dir: Path,
+        output_dir: Path,
+        manifest: Optional[DxfManifest] = None,
+        max_workers: int = 1,
+    ) -> Tuple[int, int, List[str]]:
+        """
+        按材料/厚度分组合并DXF文件
+
+        manifest 为标注阶段写出的几何清单（可选）。max_workers 大于1时各组在进程池中
+        并行合并，同时运行的组受内存预算限制；日志始终按分组顺序输出。
+        """
+        if not source_dir.exists():
+            return 0, 0, ["❌ 源目录不存在"]
 
-    def merge_by_thickness(self, source_dir: Path, output_dir: Path) -> Tuple[int, int, List[str]]:
-        """按材料/厚度分组合并DXF文件"""
+        groups = self.collect_merge_groups(source_dir, output_dir)
+        success_count, fail_count, logs, _annotations = self._merge_groups(groups, manifest, max_workers)
+        return success_count, fail_count, logs
+
+    def process_and_merge_by_thickness(
+        self,
+        source_dir: Path,
+        processed_dir: Path,
+        output_dir: Path,
+        max_workers: int = 1,
+    ) -> Tuple[int, int, List[str], DxfManifest]:
+        """
+        单遍标注并合并
+
+        每个源DXF只读取一次，标注副本写到 processed_dir 下对应的材料/厚度目录，
+        同一文档直接导入所在组的合并文件。返回的几何清单与单独标注时相同，
+        保存后仍可供之后单独合并使用。
+        """
+        if not source_dir.exists():
+            return 0, 0, ["❌ 源目录不存在"], DxfManifest()
+
+        groups = self.collect_merge_groups(source_dir, output_dir, processed_dir)
+        success_count, fail_count, logs, annotations = self._merge_groups(groups, None, max_workers)
+        manifest = DxfManifest(geometry for _success, _msg, geometry in annotations if geometry is not None)
+        annotated = sum(1 for success, _msg, _geometry in annotations if success)
+        logs.append(f"🏷 标注成功 {annotated}/{len(annotations)} 个文件")
+        return success_count, fail_count, logs, manifest
+
+    def _merge_groups(
+        self, groups: List[MergeGroup], manifest: Optional[DxfManifest], max_workers: int
+    ) -> Tuple[int, int, List[str], List[AnnotationOutcome]]:
+        """合并各组并按分组顺序汇总日志；单遍处理时各文件的标注日志列在所属组下"""
         success_count = 0
         fail_count = 0
         logs: List[str] = []
+        annotations: List[AnnotationOutcome] = []
 
-        if not source_dir.exists():
-            return 0, 0, ["❌ 源目录不存在"]
+        started = time.perf_counter()
+        if max_workers > 1 and len(groups) > 1:
+            from core.dxf_parallel import DXFMergePool
+
+            pool = DXFMergePool(self.dxf_config, max_workers, self.dxf_config.merge_memory_budget_mb)
+            results = pool.run(groups, manifest)
+            workers = min(pool.max_workers, len(groups))
+        else:
+            results = []
+            for group in groups:
+                group_started = time.perf_counter()
+                success, msg, group_annotations, notes = self.merge_group(group, manifest)
+                results.append((group, success, msg, time.perf_counter() - group_started, group_annotations, notes))
+            workers = 1
+
+        for group, success, msg, elapsed, group_annotations, notes in results:
+            logs.append(f"📦 正在合并组: {group.label}")
+            logs.extend(f"  {annotation_msg}" for _success, annotation_msg, _geometry in group_annotations)
+            logs.extend(f"  {note}" for note in notes)
+            logs.append(f"  {msg}（{elapsed:.1f} 秒）")
+            annotations.extend(group_annotations)
+            if success:
+                success_count += 1
+            else:
+                fail_count += 1
+
+        if results:
+            group_total = sum(result[3] for result in results)
+            slowest = sorted(results, key=lambda result: result[3], reverse=True)[:MERGE_SLOWEST_GROUPS]
+            logs.append(
+                f"⏱ 合并耗时 {time.perf_counter() - started:.1f} 秒，各组合计 {group_total:.1f} 秒（{workers} 个进程）"
+            )
+            logs.append("  最慢: " + ", ".join(f"{result[0].label} {result[3]:.1f} 秒" for result in slowest))
+        
+        return success_count, fail_count, logs, annotations
+
+    @staticmethod
+    def collect_merge_groups(source_dir: Path, output_dir: Path, processed_dir: Optional[Path] = None) -> List[MergeGroup]:
+        """
+        按材料目录及其下的厚度目录列出合并组（材料目录下直接存放的DXF单独成组）
 
+        给出 processed_dir 时各组的标注副本写到其下相同的相对目录
+        """
+        groups: List[MergeGroup] = []
         for material_dir in sorted(source_dir.iterdir()):
             if not material_dir.is_dir():
                 continue
 
             direct_dxf_files = list(material_dir.glob("*.dxf"))
             if direct_dxf_files:
-                logs.append(f"📦 正在合并组: {material_dir.name}")
-
-                output_filename = f"{material_dir.name}_merged.dxf"
-                target_file = output_dir / output_filename
-
-                success, msg = self.merge_directory_to_dxf(material_dir, target_file)
-
-                if success:
-                    success_count += 1
-                    logs.append(f"  {msg}")
-                else:
-                    fail_count += 1
-                    logs.append(f"  {msg}")
+                groups.append(MergeGroup(
+                    material_dir.name,
+                    material_dir,
+                    output_dir / f"{material_dir.name}_merged.dxf",
+                    sum(path.stat().st_size for path in direct_dxf_files),
+                    processed_dir / material_dir.name if processed_dir is not None else None,
+                ))
             
             for thickness_dir in sorted(material_dir.iterdir()):
                 if not thickness_dir.is_dir():
                     continue
                 
-                logs.append(f"📦 正在合并组: {material_dir.name} - {thickness_dir.name}")
-                
-                output_filename = f"{material_dir.name}_{thickness_dir.name}_merged.dxf"
-                target_file = output_dir / output_filename
-                
-                success, msg = self.merge_directory_to_dxf(thickness_dir, target_file)
-                
-                if success:
-                    success_count += 1
-                    logs.append(f"  {msg}")
-                else:
-                    fail_count += 1
-                    logs.append(f"  {msg}")
-        
-        return success_count, fail_count, logs
+                groups.append(MergeGroup(
+                    f"{material_dir.name} - {thickness_dir.name}",
+                    thickness_dir,
+                    output_dir / f"{material_dir.name}_{thickness_dir.name}_merged.dxf",
+                    sum(path.stat().st_size for path in thickness_dir.glob("*.dxf")),
+                    processed_dir / material_dir.name / thickness_dir.name if processed_dir is not None else None,
+                ))
+        return groups
@@ -0,0 +1,102 @@
+# core/dxf_spill.py
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional
+
+from ezdxf.document import Drawing
+from ezdxf.lldxf.tagwriter import TagWriter
+
+# 可以写到磁盘的实体：导出组码只引用块名、图层等表项，不引用OBJECTS段对象
+SPILLABLE_ENTITIES = {
+    "LINE", "ARC", "CIRCLE", "LWPOLYLINE", "POLYLINE", "POINT", "SPLINE",
+    "ELLIPSE", "TEXT", "MTEXT", "SOLID", "INSERT",
+}
+
+
+class BlockSpill:
+    """
+    块实体落盘
+
+    合并文档中某个块导入完成后，把块内实体按ASCII组码写入临时文件并从文档中删除，
+    只保留块记录本身；保存时先由 ezdxf 写出文档，再在对应块的 ENDBLK 之前插回
+    落盘的组码。这样合并文档的内存占用不随零件数量增长。
+    实体句柄由合并文档分配且不会复用，所有者句柄即块记录，插回后仍然有效。
+    含扩展字典、反应器或不在 SPILLABLE_ENTITIES 中的实体的块保留在内存中。
+    """
+
+    def __init__(self, doc: Drawing, directory: Optional[Path] = None):
+        self.doc = doc
+        self._temp_dir = tempfile.mkdtemp(prefix="fastbom_spill_", dir=directory)
+        self.files: Dict[str, Path] = {}
+        self.spilled_entities = 0
+
+    def spill(self, block_name: str) -> bool:
+        """把块内实体写到磁盘，块不能落盘时返回False"""
+        block = self.doc.blocks.get(block_name)
+        entities = list(block)
+        if not entities or not all(self._spillable(entity) for entity in entities):
+            return False
+        path = Path(self._temp_dir) / f"{len(self.files)}.tags"
+        with open(path, "wt", encoding=self.doc.output_encoding, errors="dxfreplace") as stream:
+            tagwriter = TagWriter(stream, dxfversion=self.doc.dxfversion, write_handles=True)
+            for entity in entities:
+                entity.export_dxf(tagwriter)
+        block.delete_all_entities()
+        self.files[block_name] = path
+        self.spilled_entities += len(entities)
+        return True
+
+    @staticmethod
+    def _spillable(entity) -> bool:
+        if entity.dxftype() not in SPILLABLE_ENTITIES:
+            return False
+        return not entity.has_extension_dict and not entity.reactors
+
+    def save(self, output: Path) -> None:
+        """写出完整文档（只支持ASCII DXF）"""
+        temp_path = output.with_name(f".{output.name}.tmp")
+        assembled = output.with_name(f".{output.name}.spill")
+        try:
+            self.doc.saveas(str(temp_path))
+            with open(temp_path, "rb") as src, open(assembled, "wb") as dst:
+                self._splice(src, dst)
+            os.replace(assembled, output)
+        finally:
+            temp_path.unlink(missing_ok=True)
+            assembled.unlink(missing_ok=True)
+
+    def _splice(self, src, dst) -> None:
+        spilled = {name.encode(self.doc.output_encoding): path for name, path in self.files.items()}
+        section = None
+        expect_section_name = False
+        expect_block_name = False
+        block_name = None
+        while True:
+            code_line = src.readline()
+            if not code_line:
+                break
+            value_line = src.readline()
+            code = int(code_line)
+            value = value_line.strip()
+            if expect_section_name:
+                section = value if code == 2 else None
+                expect_section_name = False
+            elif code == 0:
+                if value == b"SECTION":
+                    expect_section_name = True
+                elif section == b"BLOCKS" and value == b"BLOCK":
+                    expect_block_name = True
+                elif section == b"BLOCKS" and value == b"ENDBLK" and block_name in spilled:
+                    with open(spilled[block_name], "rb") as part:
+                        shutil.copyfileobj(part, dst)
+            elif expect_block_name and code == 2:
+                block_name = value
+                expect_block_name = False
+            dst.write(code_line)
+            dst.write(value_line)
+
+    def close(self) -> None:
+        shutil.rmtree(self._temp_dir, ignore_errors=True)
@@ -0,0 +1,353 @@
+# core/dxf_stream.py
+
+import math
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from ezdxf.math import bulge_to_arc
+from ezdxf.tools.codepage import toencoding
+
+BINARY_DXF_SENTINEL = b"AutoCAD Binary DXF"
+# AC1015 = R2000，更早的版本没有子类标记和所有者句柄
+MIN_DXF_VERSION = "AC1015"
+# AC1021 = R2007，起使用UTF-8编码
+UTF8_DXF_VERSION = "AC1021"
+
+# 可在流中直接计算范围的实体
+SUPPORTED_ENTITIES = {"LINE", "ARC", "CIRCLE", "LWPOLYLINE", "POINT"}
+# 附属于父实体的子实体，由父实体决定是否支持
+CHILD_ENTITIES = {"VERTEX", "SEQEND", "ATTRIB"}
+
+Tag = Tuple[int, bytes]
+
+
+class StreamFallback(Exception):
+    """流式标注无法处理该文件，需退回完整加载"""
+
+
+class BoundingBox2d:
+    def __init__(self):
+        self.extmin = [math.inf, math.inf]
+        self.extmax = [-math.inf, -math.inf]
+
+    @property
+    def has_data(self) -> bool:
+        return self.extmin[0] <= self.extmax[0]
+
+    def extend(self, x: float, y: float) -> None:
+        self.extmin[0] = min(self.extmin[0], x)
+        self.extmin[1] = min(self.extmin[1], y)
+        self.extmax[0] = max(self.extmax[0], x)
+        self.extmax[1] = max(self.extmax[1], y)
+
+    def extend_arc(self, cx: float, cy: float, radius: float, start: float, end: float) -> None:
+        """圆弧的精确范围（角度为弧度，逆时针从start到end）"""
+        start %= math.tau
+        sweep = (end - start) % math.tau or math.tau
+        self.extend(cx + radius * math.cos(start), cy + radius * math.sin(start))
+        self.extend(cx + radius * math.cos(start + sweep), cy + radius * math.sin(start + sweep))
+        for quadrant in range(4):
+            angle = quadrant * math.pi / 2
+            if (angle - start) % math.tau <= sweep:
+                self.extend(cx + radius * math.cos(angle), cy + radius * math.sin(angle))
+
+
+@dataclass
+class StreamAnnotation:
+    """一次流式标注得到的几何信息"""
+    bbox: BoundingBox2d  # 图层0范围
+    layers: Dict[str, int]
+    # 各图层范围，图层中含无法计算范围的实体时为None
+    layer_extents: Dict[str, Optional[BoundingBox2d]]
+    label_insert: Tuple[float, float]
+    label_height: float
+
+
+class DXFStreamAnnotator:
+    """
+    流式DXF标注
+
+    按组码逐个读取ASCII DXF并原样写出，同时计算图层0实体的范围；
+    到ENTITIES段结尾时插入文字实体。内存占用与文件大小无关，
+    只缓存当前实体的组码。新文字的句柄取自$HANDSEED，并把$HANDSEED加一。
+    遇到二进制DXF、R12等旧版本、图层0上的块参照/样条等实体时抛出StreamFallback。
+    """
+
+    def __init__(self, text_layer: str = "0", text_color: int = 2):
+        self.text_layer = text_layer
+        self.text_color = text_color
+
+    def annotate(self, source: Path, output: Path, label: str) -> StreamAnnotation:
+        """写出带标注的DXF，返回图层0范围、整体范围和各图层实体数"""
+        with open(source, "rb") as src:
+            if src.read(len(BINARY_DXF_SENTINEL)) == BINARY_DXF_SENTINEL:
+                raise StreamFallback("二进制DXF")
+            src.seek(0)
+            temp_path = output.with_name(f".{output.name}.tmp")
+            try:
+                with open(temp_path, "wb") as dst:
+                    result = _StreamPass(self, src, dst, label).run()
+                os.replace(temp_path, output)
+            except BaseException:
+                temp_path.unlink(missing_ok=True)
+                raise
+        return result
+
+
+class _StreamPass:
+    """一次流式标注的状态"""
+
+    def __init__(self, annotator: DXFStreamAnnotator, src: BinaryIO, dst: BinaryIO, label: str):
+        self.annotator = annotator
+        self.src = src
+        self.dst = dst
+        self.label = label
+        self.newline = b"\r\n"
+        self.section: Optional[bytes] = None
+        self.header_variable: Optional[bytes] = None
+        self.acadver = ""
+        self.codepage = "ANSI_1252"
+        self.text_handle: Optional[str] = None
+        self.owner: Optional[bytes] = None
+        self.bbox = BoundingBox2d()
+        self.layers: Dict[bytes, int] = {}
+        self.layer_boxes: Dict[bytes, Optional[BoundingBox2d]] = {b"0": self.bbox}
+        self.layer_0_count = 0
+        self.label_insert = (0.0, 0.0)
+        self.label_height = 0.0
+        self.entity_tags: List[Tag] = []
+        self.annotated = False
+
+    def run(self) -> StreamAnnotation:
+        expect_section_name = False
+        while True:
+            code_line = self.src.readline()
+            if not code_line:
+                break
+            value_line = self.src.readline()
+            if self.newline == b"\r\n" and not code_line.endswith(b"\r\n"):
+                self.newline = b"\n"
+            try:
+                code = int(code_line)
+            except ValueError:
+                raise StreamFallback("无法解析的组码")
+            value = value_line.rstrip(b"\r\n")
+
+            if expect_section_name:
+                self.section = value.strip() if code == 2 else None
+                expect_section_name = False
+            elif code == 0:
+                stripped = value.strip()
+                if self.section == b"ENTITIES":
+                    self._finish_entity()
+                if stripped == b"SECTION":
+                    expect_section_name = True
+                elif stripped == b"ENDSEC":
+                    if self.section == b"ENTITIES":
+                        self._write_text()
+                    self.section = None
+                elif self.section == b"ENTITIES":
+                    self.entity_tags = [(code, stripped)]
+            elif self.section == b"HEADER":
+                value_line = self._header_tag(code, value, value_line)
+            elif self.section == b"ENTITIES" and self.entity_tags:
+                self.entity_tags.append((code, value.strip()))
+
+            self.dst.write(code_line)
+            self.dst.write(value_line)
+
+        if not self.annotated:
+            raise StreamFallback("未找到ENTITIES段")
+        encoding = self._encoding()
+        layers = {name.decode(encoding, errors="replace"): count for name, count in self.layers.items()}
+        layer_extents = {
+            name.decode(encoding, errors="replace"): self.layer_boxes[name] for name in self.layers
+        }
+        return StreamAnnotation(self.bbox, layers, layer_extents, self.label_insert, self.label_height)
+
+    def _header_tag(self, code: int, value: bytes, value_line: bytes) -> bytes:
+        if code == 9:
+            self.header_variable = value.strip()
+        elif self.header_variable == b"$ACADVER" and code == 1:
+            self.acadver = value.strip().decode("ascii", errors="replace")
+            if self.acadver < MIN_DXF_VERSION:
+                raise StreamFallback(f"不支持的DXF版本 {self.acadver}")
+        elif self.header_variable == b"$DWGCODEPAGE" and code == 3:
+            self.codepage = value.strip().decode("ascii", errors="replace")
+        elif self.header_variable == b"$HANDSEED" and code == 5:
+            # 原值留给新文字，写出加一后的值
+            handle = int(value.strip(), 16)
+            self.text_handle = f"{handle:X}"
+            return f"{handle + 1:X}".encode("ascii") + value_line[len(value):]
+        return value_line
+
+    def _finish_entity(self) -> None:
+        tags = self.entity_tags
+        self.entity_tags = []
+        if not tags:
+            return
+        entity_type = tags[0][1].decode("ascii", errors="replace")
+        values: Dict[int, bytes] = {}
+        for code, value in tags[1:]:
+            values.setdefault(code, value)
+        if values.get(67) == b"1":
+            return  # 图纸空间实体
+        if entity_type in CHILD_ENTITIES:
+            return
+        if self.owner is None and 330 in values:
+            self.owner = values[330]
+        layer = values.get(8, b"0")
+        self.layers[layer] = self.layers.get(layer, 0) + 1
+
+        if layer != b"0":
+            # 其他图层只记录范围，含无法计算的实体时该图层范围记为None
+            layer_box = self.layer_boxes.setdefault(layer, BoundingBox2d())
+            if layer_box is not None:
+                try:
+                    box = self._entity_box(entity_type, values, tags)
+                except StreamFallback:
+                    box = None
+                if box is None:
+                    self.layer_boxes[layer] = None
+                else:
+                    self._merge_box(layer_box, box)
+            return
+
+        box = self._entity_box(entity_type, values, tags)
+        if box is None:
+            raise StreamFallback(f"图层0包含{entity_type}实体")
+        self.layer_0_count += 1
+        self._merge_box(self.bbox, box)
+
+    def _entity_box(self, entity_type: str, values: Dict[int, bytes], tags: List[Tag]) -> Optional[BoundingBox2d]:
+        """单个实体的WCS范围，不支持的实体返回None"""
+        if entity_type not in SUPPORTED_ENTITIES:
+            return None
+        mirror_x = self._ocs_mirror(values)
+        box = BoundingBox2d()
+        if entity_type == "LINE":
+            box.extend(_float(values, 10), _float(values, 20))
+            box.extend(_float(values, 11), _float(values, 21))
+        elif entity_type == "POINT":
+            box.extend(_float(values, 10), _float(values, 20))
+        elif entity_type == "CIRCLE":
+            cx, cy, radius = _float(values, 10) * mirror_x, _float(values, 20), _float(values, 40)
+            box.extend(cx - radius, cy - radius)
+            box.extend(cx + radius, cy + radius)
+        elif entity_type == "ARC":
+            arc_box = BoundingBox2d()
+            arc_box.extend_arc(
+                _float(values, 10),
+                _float(values, 20),
+                _float(values, 40),
+                math.radians(_float(values, 50)),
+                math.radians(_float(values, 51)),
+            )
+            self._extend_ocs(box, arc_box, mirror_x)
+        elif entity_type == "LWPOLYLINE":
+            self._extend_ocs(box, self._polyline_box(tags), mirror_x)
+        return box
+
+    @staticmethod
+    def _ocs_mirror(values: Dict[int, bytes]) -> float:
+        """只支持法向为 +Z 或 -Z（OCS的X轴镜像）"""
+        extrusion = (_float(values, 210, 0.0), _float(values, 220, 0.0), _float(values, 230, 1.0))
+        if abs(extrusion[0]) > 1e-9 or abs(extrusion[1]) > 1e-9:
+            raise StreamFallback("实体不在XY平面内")
+        return -1.0 if extrusion[2] < 0 else 1.0
+
+    @staticmethod
+    def _extend_ocs(target: BoundingBox2d, box: BoundingBox2d, mirror_x: float) -> None:
+        if not box.has_data:
+            return
+        target.extend(box.extmin[0] * mirror_x, box.extmin[1])
+        target.extend(box.extmax[0] * mirror_x, box.extmax[1])
+
+    @staticmethod
+    def _merge_box(target: BoundingBox2d, box: BoundingBox2d) -> None:
+        if box.has_data:
+            target.extend(*box.extmin)
+            target.extend(*box.extmax)
+
+    @staticmethod
+    def _polyline_box(tags: List[Tag]) -> BoundingBox2d:
+        vertices: List[List[float]] = []  # [x, y, bulge]
+        closed = False
+        for code, value in tags[1:]:
+            if code == 10:
+                vertices.append([float(value), 0.0, 0.0])
+            elif code == 20 and vertices:
+                vertices[-1][1] = float(value)
+            elif code == 42 and vertices:
+                vertices[-1][2] = float(value)
+            elif code == 70:
+                closed = bool(int(value) & 1)
+
+        box = BoundingBox2d()
+        for index, (x, y, bulge) in enumerate(vertices):
+            box.extend(x, y)
+            if index + 1 < len(vertices):
+                end = vertices[index + 1]
+            elif closed and len(vertices) > 1:
+                end = vertices[0]
+            else:
+                continue
+            if bulge:
+                center, start_angle, end_angle, radius = bulge_to_arc((x, y), (end[0], end[1]), bulge)
+                box.extend_arc(center.x, center.y, radius, start_angle, end_angle)
+        return box
+
+    def _write_text(self) -> None:
+        if self.layer_0_count == 0:
+            raise StreamFallback("图层0中没有实体")
+        if self.text_handle is None or self.owner is None:
+            raise StreamFallback("缺少$HANDSEED或模型空间所有者句柄")
+
+        if self.bbox.has_data:
+            text_height = max((self.bbox.extmax[1] - self.bbox.extmin[1]) * 0.1, 5.0)
+            insert = (0.0, -text_height * 1.5)
+        else:
+            text_height = 10.0
+            insert = (0.0, 0.0)
+
+        self.label_insert, self.label_height = insert, text_height
+        encoding = self._encoding()
+        tags: List[Tuple[int, bytes]] = [
+            (0, b"TEXT"),
+            (5, self.text_handle.encode("ascii")),
+            (330, self.owner),
+            (100, b"AcDbEntity"),
+            (8, _encode_text(self.annotator.text_layer, encoding)),
+            (62, str(self.annotator.text_color).encode("ascii")),
+            (100, b"AcDbText"),
+            (10, repr(insert[0]).encode("ascii")),
+            (20, repr(insert[1]).encode("ascii")),
+            (30, b"0.0"),
+            (40, repr(text_height).encode("ascii")),
+            (1, _encode_text(self.label, encoding)),
+            (100, b"AcDbText"),
+        ]
+        for code, value in tags:
+            self.dst.write(f"{code:>3}".encode("ascii") + self.newline + value + self.newline)
+        self.annotated = True
+
+    def _encoding(self) -> str:
+        return "utf-8" if self.acadver >= UTF8_DXF_VERSION else toencoding(self.codepage)
+
+
+def _float(values: Dict[int, bytes], code: int, default: float = 0.0) -> float:
+    value = values.get(code)
+    return float(value) if value is not None else default
+
+
+def _encode_text(text: str, encoding: str) -> bytes:
+    """按文件编码写出字符串，无法编码的字符使用DXF的 \\U+XXXX 转义"""
+    encoded = []
+    for char in text:
+        try:
+            encoded.append(char.encode(encoding))
+        except UnicodeEncodeError:
+            encoded.append(f"\\U+{ord(char):04X}".encode("ascii"))
+    return b"".join(encoded)
@@ -0,0 +1,33 @@
+# core/run_report.py
+
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict
+
+
+class RunReport:
+    """单次任务运行报告（JSON）"""
+
+    def __init__(self, task_type: str):
+        self.task_type = task_type
+        self.started_at = datetime.now()
+        self.sections: Dict[str, Any] = {}
+
+    def add_section(self, name: str, data: Any) -> None:
+        """添加或覆盖报告小节"""
+        self.sections[name] = data
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "task_type": self.task_type,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            **self.sections,
+        }
+
+    def write(self, path: Path) -> Path:
+        """写入报告文件，返回写入路径"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), ensure_ascii=False, indent=2), encoding="utf-8")
+        return path
@@ -0,0 +1,129 @@
+# core/staging_cache.py
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# SMB/FAT的修改时间精度较粗，在此范围内视为未修改
+MTIME_TOLERANCE_SECONDS = 2.0
+
+
+@dataclass
+class StagedDrawing:
+    """已暂存到本地的工程图"""
+    source: Path
+    local_path: Path
+    copied_files: int = 0
+    reused_files: int = 0
+    copied_bytes: int = 0
+
+
+@dataclass
+class _FileCopy:
+    local_path: Path
+    copied: bool
+    size: int
+
+
+class StagingHandle:
+    """一个工程图的暂存进度，result()等待工程图及其参考文件全部就绪"""
+
+    def __init__(self, source: Path, file_futures: List[Tuple[Future, bool]]):
+        self.source = source
+        # (复制任务, 是否由本工程图发起)；共享的参考文件只在发起者处计为复制
+        self._file_futures = file_futures
+
+    def result(self, timeout: Optional[float] = None) -> StagedDrawing:
+        drawing_copy: _FileCopy = self._file_futures[0][0].result(timeout)
+        staged = StagedDrawing(self.source, drawing_copy.local_path)
+        for future, owned in self._file_futures:
+            file_copy: _FileCopy = future.result(timeout)
+            if file_copy.copied and owned:
+                staged.copied_files += 1
+                staged.copied_bytes += file_copy.size
+            else:
+                staged.reused_files += 1
+        return staged
+
+
+class DrawingStagingCache:
+    """
+    本地SSD暂存缓存
+
+    在转换前用有限线程池把网络共享上的工程图和参考的零件/装配体复制到本地目录，
+    SolidWorks从本地打开；缓存按文件大小和修改时间校验，跨运行复用。
+    项目目录内的文件按相对路径镜像到缓存目录，不同文件夹中的同名文件互不覆盖，
+    SolidWorks按参考文档的相对位置找到它们；项目目录外的参考文件按所在文件夹的
+    哈希放入 EXTERNAL_DIR_NAME 下的子目录。
+    """
+
+    DEFAULT_DIR_NAME = "FastBOM-staging"
+    EXTERNAL_DIR_NAME = "_external"
+
+    def __init__(self, source_root: Path, cache_root: Optional[Path] = None, max_workers: int = 4):
+        self.source_root = source_root
+        self._resolved_root = source_root.resolve()
+        cache_root = cache_root or Path(tempfile.gettempdir()) / self.DEFAULT_DIR_NAME
+        root_key = hashlib.sha1(str(source_root.resolve()).lower().encode("utf-8")).hexdigest()[:10]
+        self.cache_dir = cache_root / f"{source_root.name}-{root_key}"
+        self._executor = ThreadPoolExecutor(max_workers=max(max_workers, 1), thread_name_prefix="staging")
+        self._file_futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def stage_async(self, drawing: Path, references: Sequence[Path] = ()) -> StagingHandle:
+        """提交暂存任务（同一文件在一次运行中只复制一次）"""
+        file_futures = [self._copy_future(drawing)]
+        file_futures.extend(self._copy_future(reference) for reference in references if reference != drawing)
+        return StagingHandle(drawing, file_futures)
+
+    def stage(self, drawing: Path, references: Sequence[Path] = ()) -> StagedDrawing:
+        return self.stage_async(drawing, references).result()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def local_path_for(self, source: Path) -> Path:
+        """源文件在缓存中的位置"""
+        resolved = source.resolve()
+        try:
+            return self.cache_dir / resolved.relative_to(self._resolved_root)
+        except ValueError:
+            folder_key = hashlib.sha1(os.path.normcase(str(resolved.parent)).encode("utf-8")).hexdigest()[:10]
+            return self.cache_dir / self.EXTERNAL_DIR_NAME / folder_key / resolved.name
+
+    def _copy_future(self, source: Path) -> Tuple[Future, bool]:
+        key = os.path.normcase(str(source))
+        with self._lock:
+            future = self._file_futures.get(key)
+            if future is not None:
+                return future, False
+            future = self._executor.submit(self._copy_if_stale, source)
+            self._file_futures[key] = future
+            return future, True
+
+    def _copy_if_stale(self, source: Path) -> _FileCopy:
+        source_stat = source.stat()
+        local_path = self.local_path_for(source)
+        if self.is_current(local_path, source_stat.st_size, source_stat.st_mtime):
+            return _FileCopy(local_path, False, source_stat.st_size)
+
+        local_path.parent.mkdir(parents=True, exist_ok=True)
+        # 先写临时文件再替换，避免中断后留下不完整的缓存
+        temp_path = local_path.with_name(f".{local_path.name}.{threading.get_ident()}.tmp")
+        shutil.copy2(source, temp_path)
+        os.replace(temp_path, local_path)
+        return _FileCopy(local_path, True, source_stat.st_size)
+
+    @staticmethod
+    def is_current(local_path: Path, size: int, mtime: float) -> bool:
+        try:
+            local_stat = local_path.stat()
+        except OSError:
+            return False
+        return local_stat.st_size == size and abs(local_stat.st_mtime - mtime) <= MTIME_TOLERANCE_SECONDS
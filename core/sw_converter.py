@@ -1,13 +1,46 @@
 # core/sw_converter.py
 import os
 import sys
+import time
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
 
 from config.settings import SolidWorksConfig
+from core.com_trace import ComCallTrace
 from utils import logger
 
 
+# swDocumentTypes_e
+DOC_TYPE_PART = 1  # swDocPART
+DOC_TYPE_DRAWING = 3  # swDocDRAWING
+
+# swOpenDocOptions_e
+OPEN_OPTION_SILENT = 1
+OPEN_MODE_OPTIONS = {
+    "normal": 0,
+    "read_only": 2,  # swOpenDocOptions_ReadOnly
+    "view_only": 4,  # swOpenDocOptions_ViewOnly
+    "detailing": 1024,  # swOpenDocOptions_DetailingMode（不加载参考模型）
+}
+# 仅查看方式打开的工程图不能修改，不设置视图比例、不替换模板，按原样导出
+UNEDITABLE_OPEN_MODES = ("view_only",)
+# swOpenDocOptions_OverrideDefaultLoadLightweight | swOpenDocOptions_LoadLightweight
+OPEN_OPTION_LIGHTWEIGHT = 64 | 128
+
+# SaveAs2按扩展名决定导出格式
+SUPPORTED_EXPORT_FORMATS = ("dxf", "dwg", "pdf")
+
+# PDF导出：SaveAs2只导出当前图纸，多图纸工程图需通过导出数据指定全部图纸
+EXPORT_PDF_DATA = 1  # swExportPdfData
+EXPORT_ALL_SHEETS = 1  # swExportData_ExportAllSheets
+SAVE_AS_CURRENT_VERSION = 0  # swSaveAsCurrentVersion
+SAVE_AS_SILENT = 1  # swSaveAsOptions_Silent
+
+EXPORT_TO_DWG_SHEET_METAL = 1  # swExportToDWG_ExportSheetMetal
+# 钣金展开图导出选项：Bit0 展开几何 + Bit4 合并共面面（不导出折弯线、草图等）
+FLAT_PATTERN_SHEET_METAL_OPTIONS = 1 | 16
+
+
 class SWConverter:
     """SolidWorks DXF转换器"""
     
@@ -15,22 +48,41 @@ class SWConverter:
         self.solidworks_config = solidworks_config or SolidWorksConfig()
         self.sw_app = None
         self.visible = self.solidworks_config.visible
+        self.early_binding = self.solidworks_config.early_binding
+        self.open_mode = self._resolve_open_mode(self.solidworks_config.open_mode)
+        self.lightweight_references = self.solidworks_config.lightweight_references
+        # COM调用及转换步骤耗时（关闭时不计时）
+        self.com_trace = ComCallTrace(enabled=self.solidworks_config.com_trace)
         self.template_dir: Path
         self._initialize_template_dir()
     
-    def _initialize_template_dir(self):
-        """初始化模板目录"""
+    @staticmethod
+    def _resolve_open_mode(open_mode: str) -> str:
+        if open_mode not in OPEN_MODE_OPTIONS:
+            logger.warning(f"未知的工程图打开模式 {open_mode!r}，按 normal 打开")
+            return "normal"
+        if open_mode in UNEDITABLE_OPEN_MODES:
+            logger.warning(f"工程图打开模式 {open_mode} 不能修改文档，导出时不设置视图比例、不替换模板")
+        elif open_mode == "read_only":
+            logger.info("只读模式：视图比例和模板替换只作用于导出结果，不保存回工程图")
+        return open_mode
+
+    @staticmethod
+    def _base_path() -> Path:
         if getattr(sys, 'frozen', False):
-            base_path = Path(sys.executable).parent
-        else:
-            base_path = Path(__file__).parent.parent
+            return Path(sys.executable).parent
+        return Path(__file__).parent.parent
 
-        logger.info(f"程序目录: {base_path}")
-        
-        template_dir = Path(self.solidworks_config.template_dir)
-        if not template_dir.is_absolute():
-            template_dir = base_path / template_dir
-        self.template_dir = template_dir
+    @classmethod
+    def resolve_template_dir(cls, template_dir: str) -> Path:
+        """相对路径的模板目录按程序目录解析"""
+        path = Path(template_dir)
+        return path if path.is_absolute() else cls._base_path() / path
+
+    def _initialize_template_dir(self):
+        """初始化模板目录"""
+        logger.info(f"程序目录: {self._base_path()}")
+        self.template_dir = self.resolve_template_dir(self.solidworks_config.template_dir)
 
         if not self.template_dir.exists():
             raise FileNotFoundError(f"未找到模板文件夹：{self.template_dir}")
@@ -55,11 +107,27 @@ class SWConverter:
             except:
                 self.sw_app = win32.Dispatch("SldWorks.Application")
                 self.sw_app.Visible = self.visible
+
+            if self.early_binding:
+                self.sw_app = self._ensure_early_bound(self.sw_app)
             return True
         except Exception as e:
             print(f"初始化SolidWorks失败: {e}")
             return False
     
+    @staticmethod
+    def _ensure_early_bound(sw_app):
+        """使用makepy/gencache生成的早绑定包装（缓存DISPID），失败时保持晚绑定"""
+        try:
+            from win32com.client import gencache
+
+            early_app = gencache.EnsureDispatch(sw_app._oleobj_)
+            logger.info("已启用早绑定COM接口")
+            return early_app
+        except Exception as e:
+            logger.warning(f"早绑定COM接口不可用，继续使用晚绑定: {e}")
+            return sw_app
+
     def shutdown(self):
         """关闭SolidWorks连接"""
         try:
@@ -70,6 +138,16 @@ class SWConverter:
         except:
             pass
     
+    def is_alive(self) -> bool:
+        """健康检查：SolidWorks连接是否仍可响应"""
+        if not self.sw_app:
+            return False
+        try:
+            self._com_get(self.sw_app, "RevisionNumber")
+            return True
+        except Exception:
+            return False
+    
     def convert_to_dxf(self, slddrw_path: Path, output_path: Path) -> Tuple[bool, str]:
         """
         将SLDDRW文件转换为DXF
@@ -81,68 +159,247 @@ class SWConverter:
         Returns:
             (成功标志, 消息)
         """
+        saved_formats, msg = self.export_drawing(slddrw_path, {"dxf": output_path})
+        return "dxf" in saved_formats, msg
+    
+    def export_drawing(self, slddrw_path: Path, outputs: Mapping[str, Path]) -> Tuple[List[str], str]:
+        """
+        打开一次工程图，依次导出多种格式
+        
+        某种格式导出失败不影响其余格式，调用方按返回的格式分别记录结果。
+        
+        Args:
+            slddrw_path: SLDDRW文件路径
+            outputs: {格式: 输出路径}，如 {"dxf": ..., "pdf": ...}
+        
+        Returns:
+            (导出成功的格式列表, 消息；有格式失败时只列出失败的格式)
+        """
         if not self.sw_app:
-            return False, "SolidWorks未初始化"
+            return [], "SolidWorks未初始化"
         
         logger.info(f"正在处理: {os.path.basename(slddrw_path)}")
         logger.info(f"完整路径: {slddrw_path}")
         
         try:
             # 打开文档
-            errors = self._create_ref_int()
-            warnings = self._create_ref_int()
-            
-            sw_model = self.sw_app.OpenDoc6(
-                str(slddrw_path),
-                3,  # swDocDRAWING
-                1,  # swOpenDocOptions_Silent
-                "",
-                errors,
-                warnings
-            )
+            with self.com_trace.step("open"):
+                sw_model = self._open_doc(slddrw_path, DOC_TYPE_DRAWING, self.drawing_open_options())
             
             if sw_model is None:
                 logger.error("无法打开文件")
-                return False, f"无法打开文件: {slddrw_path.name}"
-            
-            title = sw_model.GetTitle
-            logger.info(f"连接到文档：{title}")
+                return [], f"无法打开文件: {slddrw_path.name}"
             
-            # 执行处理步骤
-            # 1. 设置视图比例
-            self._set_views_to_sheet_scale(sw_model)
+            # 常驻会话中失败的文档也必须关闭，否则会一直留在SolidWorks中
+            try:
+                title = self._com_get(sw_model, "GetTitle")
+                logger.info(f"连接到文档：{title}")
+                
+                # 执行处理步骤（仅查看模式不能修改文档，按原样导出）
+                if self.open_mode not in UNEDITABLE_OPEN_MODES:
+                    # 1. 设置视图比例
+                    with self.com_trace.step("sheet_scale"):
+                        self._set_views_to_sheet_scale(sw_model)
+                    
+                    # 2. 替换模板
+                    with self.com_trace.step("template"):
+                        self._replace_template(sw_model)
+                
+                # 3. 逐个格式导出
+                saved_formats = []
+                failed_formats = []
+                for export_format, output_path in outputs.items():
+                    try:
+                        with self.com_trace.step(f"save[{export_format}]"):
+                            saved = self._save_as(sw_model, export_format, output_path)
+                    except Exception as e:
+                        logger.error(f"导出 {export_format.upper()} 失败: {e}")
+                        failed_formats.append(f"{export_format.upper()} ({e})")
+                        continue
+                    if saved:
+                        saved_formats.append(export_format)
+                    else:
+                        failed_formats.append(export_format.upper())
+            finally:
+                self._close_doc(slddrw_path)
             
-            # 2. 替换模板
-            self._replace_template(sw_model)
+            if failed_formats:
+                return saved_formats, f"❌ 导出失败 [{slddrw_path.name}]: {', '.join(failed_formats)}"
+            return saved_formats, f"✅ 成功转换: {slddrw_path.name}"
             
-            # 3. 导出DXF
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            sw_model.SaveAs2(str(output_path), 0, True, False)
+        except Exception as e:
+            return [], f"❌ 转换失败 [{slddrw_path.name}]: {str(e)}"
+    
+    def _close_doc(self, doc_path: Path) -> None:
+        """关闭文档；关闭失败只记录日志，不掩盖原来的结果或异常"""
+        try:
+            with self.com_trace.step("close"):
+                self._com_call(self.sw_app, "CloseDoc", str(doc_path))
+        except Exception as e:
+            logger.warning(f"关闭文档失败 [{doc_path.name}]: {e}")
+
+    def _save_as(self, sw_model, export_format: str, output_path: Path) -> bool:
+        """另存为指定格式，按格式记录写出耗时"""
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        previous_mtime = output_path.stat().st_mtime_ns if output_path.exists() else None
+        
+        started = time.perf_counter()
+        if export_format == "pdf":
+            self._save_pdf(sw_model, output_path)
+        else:
+            self._com_call(
+                sw_model,
+                "SaveAs2",
+                str(output_path),
+                SAVE_AS_CURRENT_VERSION,
+                True,
+                False,
+                timing_name=f"SaveAs2[{export_format}]",
+            )
+        logger.info(f"导出 {export_format.upper()} 耗时 {time.perf_counter() - started:.2f} 秒")
+        
+        if not output_path.exists():
+            logger.error(f"未生成输出文件: {output_path}")
+            return False
+        return previous_mtime is None or output_path.stat().st_mtime_ns != previous_mtime
+    
+    def _save_pdf(self, sw_model, output_path: Path) -> None:
+        """所有图纸导出到一个PDF"""
+        export_data = self._com_call(self.sw_app, "GetExportFileData", EXPORT_PDF_DATA)
+        sheet_names = self._com_get(sw_model, "GetSheetNames") or ()
+        self._com_call(export_data, "SetSheets", EXPORT_ALL_SHEETS, self._create_string_array(sheet_names))
+        self._com_call(
+            self._com_get(sw_model, "Extension"),
+            "SaveAs",
+            str(output_path),
+            SAVE_AS_CURRENT_VERSION,
+            SAVE_AS_SILENT,
+            export_data,
+            self._create_ref_int(),
+            self._create_ref_int(),
+            timing_name="SaveAs[pdf]",
+        )
+
+    @staticmethod
+    def parse_export_formats(value: Sequence[str] | str) -> List[str]:
+        """解析导出格式配置（英文分号分隔），DXF始终包含在内且排在首位"""
+        if isinstance(value, str):
+            items = value.replace("；", ";").split(";")
+        else:
+            items = list(value)
+        formats = ["dxf"]
+        for item in items:
+            export_format = item.strip().lower().lstrip(".")
+            if export_format in SUPPORTED_EXPORT_FORMATS and export_format not in formats:
+                formats.append(export_format)
+        return formats
+    
+    def drawing_open_options(self) -> int:
+        """按配置的打开模式组合OpenDoc6选项"""
+        options = OPEN_OPTION_SILENT | OPEN_MODE_OPTIONS[self.open_mode]
+        if self.lightweight_references:
+            options |= OPEN_OPTION_LIGHTWEIGHT
+        return options
+    
+    def _open_doc(self, doc_path: Path, doc_type: int, options: int):
+        """打开文档并按打开模式记录耗时"""
+        errors = self._create_ref_int()
+        warnings = self._create_ref_int()
+        
+        mode_label = self.open_mode if doc_type == DOC_TYPE_DRAWING else "part"
+        if doc_type == DOC_TYPE_DRAWING and self.lightweight_references:
+            mode_label += "+lightweight"
+        started = time.perf_counter()
+        sw_model = self._com_call(
+            self.sw_app,
+            "OpenDoc6",
+            str(doc_path),
+            doc_type,
+            options,
+            "",
+            errors,
+            warnings,
+            timing_name=f"OpenDoc6[{mode_label}]",
+        )
+        logger.info(f"打开模式 {mode_label} 耗时 {time.perf_counter() - started:.2f} 秒")
+        # 早绑定时输出参数随返回值一起以元组返回
+        if isinstance(sw_model, tuple):
+            sw_model = sw_model[0]
+        return sw_model
+    
+    def export_flat_pattern(self, part_path: Path, output_path: Path) -> Tuple[bool, str]:
+        """
+        直接从钣金零件导出展开图DXF（不打开工程图、不替换模板）
+        
+        Args:
+            part_path: SLDPRT文件路径
+            output_path: DXF输出路径
+        
+        Returns:
+            (成功标志, 消息)
+        """
+        if not self.sw_app:
+            return False, "SolidWorks未初始化"
+        
+        logger.info(f"正在导出展开图: {os.path.basename(part_path)}")
+        
+        try:
+            with self.com_trace.step("open_part"):
+                sw_model = self._open_doc(part_path, DOC_TYPE_PART, OPEN_OPTION_SILENT)
             
-            # 关闭文档
-            self.sw_app.CloseDoc(str(slddrw_path))
+            if sw_model is None:
+                return False, f"无法打开零件: {part_path.name}"
             
-            return True, f"✅ 成功转换: {slddrw_path.name}"
+            try:
+                if not self._is_sheet_metal(sw_model):
+                    return False, f"不是钣金零件: {part_path.name}"
+                
+                output_path.parent.mkdir(parents=True, exist_ok=True)
+                with self.com_trace.step("flat_pattern"):
+                    exported = self._com_call(
+                        sw_model,
+                        "ExportToDWG2",
+                        str(output_path),
+                        str(part_path),
+                        EXPORT_TO_DWG_SHEET_METAL,
+                        True,  # 单文件
+                        self._create_nothing(),  # 对齐
+                        False,
+                        False,
+                        FLAT_PATTERN_SHEET_METAL_OPTIONS,
+                        self._create_nothing(),  # 视图
+                    )
+            finally:
+                with self.com_trace.step("close"):
+                    self._com_call(self.sw_app, "CloseDoc", str(part_path))
             
+            if not exported:
+                return False, f"❌ 展开图导出失败: {part_path.name}"
+            return True, f"✅ 成功导出展开图: {part_path.name}"
+        
         except Exception as e:
-            return False, f"❌ 转换失败 [{slddrw_path.name}]: {str(e)}"
+            return False, f"❌ 展开图导出失败 [{part_path.name}]: {str(e)}"
+    
+    def _is_sheet_metal(self, sw_part) -> bool:
+        """零件中是否存在钣金实体"""
+        bodies = self._com_call(sw_part, "GetBodies2", 0, False)  # swSolidBody, 包含隐藏实体
+        return any(self._com_get(body, "IsSheetMetal") for body in bodies or ())
     
     def _set_views_to_sheet_scale(self, sw_model) -> bool:
-        """设置所有视图按图纸比例"""
+        """设置所有视图按图纸比例（已使用图纸比例的视图保持不变）"""
         try:
-            sw_view = sw_model.GetFirstView
-            
-            if sw_view is not None:
-                sw_view = sw_view.GetNextView
+            views = self._collect_views(sw_model)
             
             view_count = 0
-            while sw_view is not None:
-                sw_view.UseSheetScale = True
+            for sw_view in views:
+                if self._com_get(sw_view, "UseSheetScale"):
+                    continue
+                self._com_set(sw_view, "UseSheetScale", True)
                 view_count += 1
-                sw_view = sw_view.GetNextView
             
-            sw_model.EditRebuild3
-            logger.info(f"已设置 {view_count} 个视图使用图纸比例")
+            if view_count:
+                self._com_get(sw_model, "EditRebuild3")
+            logger.info(f"已设置 {view_count} 个视图使用图纸比例（共 {len(views)} 个视图）")
             logger.info("设置视图比例完成")
 
             return True
@@ -150,6 +407,25 @@ class SWConverter:
         except Exception as e:
             logger.error(f"错误: {str(e)}")
             return False
+
+    def _collect_views(self, sw_model) -> List[Any]:
+        """一次性获取所有图纸的视图（跳过图纸本身），不支持时逐个遍历"""
+        try:
+            sheets = self._com_get(sw_model, "GetViews")
+        except Exception:
+            sheets = None
+
+        if sheets:
+            return [view for sheet_views in sheets if sheet_views for view in list(sheet_views)[1:]]
+
+        views = []
+        sw_view = self._com_get(sw_model, "GetFirstView")
+        if sw_view is not None:
+            sw_view = self._com_get(sw_view, "GetNextView")
+        while sw_view is not None:
+            views.append(sw_view)
+            sw_view = self._com_get(sw_view, "GetNextView")
+        return views
     
     def _replace_template(self, sw_model) -> bool:
         """替换图纸模板"""
@@ -169,7 +445,7 @@ class SWConverter:
             logger.info("开始替换模板")
 
             # 检查是否为工程图
-            if sw_model.GetType != 3:
+            if self._com_get(sw_model, "GetType") != DOC_TYPE_DRAWING:
                 logger.error("当前文档不是工程图！")
                 return False
             
@@ -177,8 +453,8 @@ class SWConverter:
             logger.info(f"模板目录: {self.template_dir}")
             
             # 获取当前图纸
-            sheet = sw_model.GetCurrentSheet
-            sheet_props = sheet.GetProperties
+            sheet = self._com_get(sw_model, "GetCurrentSheet")
+            sheet_props = self._com_get(sheet, "GetProperties")
             
             width = sheet_props[5]
             height = sheet_props[6]
@@ -193,22 +469,98 @@ class SWConverter:
                     break
             
             if format_file and format_file.exists():
-                sheet.SetTemplateName(str(format_file))
+                self._com_call(sheet, "SetTemplateName", str(format_file))
             else:
                 logger.error(f"未识别的图纸尺寸或文件不存在: {width} x {height}")
             
             draft_std = self.template_dir / "GB-3.5新-小箭头.sldstd"
             if draft_std.exists():
-                sw_model.Extension.LoadDraftingStandard(str(draft_std))
+                extension = self._com_get(sw_model, "Extension")
+                self._com_call(extension, "LoadDraftingStandard", str(draft_std))
             else:
                 logger.error(f"绘图标准文件不存在: {draft_std}")
             
-            sheet.ReloadTemplate(False)
+            self._com_call(sheet, "ReloadTemplate", False)
             
             return True
         except:
             return False
     
+    def _com_get(self, com_object, name: str) -> Any:
+        """读取COM属性或调用无参方法，并记录耗时
+
+        晚绑定时无参方法按属性访问即被调用；早绑定包装中方法需要显式调用。
+        """
+        if not self.com_trace.enabled:
+            return self._get_value(com_object, name)
+        started = time.perf_counter()
+        try:
+            return self._get_value(com_object, name)
+        finally:
+            self.com_trace.record(name, time.perf_counter() - started)
+
+    def _get_value(self, com_object, name: str) -> Any:
+        value = getattr(com_object, name)
+        if self._is_early_bound(com_object) and callable(value) and hasattr(value, "__self__"):
+            value = value()
+        return value
+
+    def _com_set(self, com_object, name: str, value: Any) -> None:
+        """设置COM属性并记录耗时"""
+        if not self.com_trace.enabled:
+            setattr(com_object, name, value)
+            return
+        started = time.perf_counter()
+        try:
+            setattr(com_object, name, value)
+        finally:
+            self.com_trace.record(f"{name}=", time.perf_counter() - started)
+
+    def _com_call(self, com_object, name: str, *args, timing_name: Optional[str] = None) -> Any:
+        """调用COM方法并记录耗时"""
+        if not self.com_trace.enabled:
+            return getattr(com_object, name)(*args)
+        started = time.perf_counter()
+        try:
+            return getattr(com_object, name)(*args)
+        finally:
+            self.com_trace.record(timing_name or name, time.perf_counter() - started)
+
+    @staticmethod
+    def _is_early_bound(com_object) -> bool:
+        try:
+            from win32com.client import DispatchBaseClass
+        except ImportError:
+            return False
+        return isinstance(com_object, DispatchBaseClass)
+
+    def timing_summary(self) -> Dict[str, Dict[str, Any]]:
+        """按调用名汇总COM耗时（含耗时直方图）"""
+        return self.com_trace.call_summary()
+
+    def step_summary(self) -> Dict[str, Dict[str, Any]]:
+        """按转换步骤汇总耗时"""
+        return self.com_trace.step_summary()
+
+    def reset_timings(self) -> None:
+        self.com_trace.reset()
+
+    @staticmethod
+    def _create_nothing():
+        """创建COM空对象参数（对应VBA中的Nothing）"""
+        import pythoncom
+        import win32com.client
+
+        return win32com.client.VARIANT(pythoncom.VT_DISPATCH, None)
+
+    @staticmethod
+    def _create_string_array(values: Sequence[str]):
+        """创建COM字符串数组参数"""
+        import pythoncom
+        import win32com.client
+
+        return win32com.client.VARIANT(pythoncom.VT_ARRAY | pythoncom.VT_BSTR, list(values))
+
     @staticmethod
     def _create_ref_int():
         """创建COM引用类型"""
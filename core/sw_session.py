@@ -0,0 +1,156 @@
+# core/sw_session.py
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+
+from config.settings import SolidWorksConfig
+from utils import logger
+
+_STOP = object()
+
+
+class SolidWorksSessionService:
+    """
+    常驻SolidWorks会话服务
+
+    在专用COM线程中持有一个已初始化的SWConverter，任何页面都可以提交任务；
+    每个任务执行前做健康检查，空闲超时或应用关闭时才释放连接。
+    """
+
+    def __init__(
+        self,
+        solidworks_config: Optional[SolidWorksConfig] = None,
+        idle_timeout_seconds: float = 900.0,
+        converter_factory: Optional[Callable[[SolidWorksConfig], Any]] = None,
+    ):
+        self.solidworks_config = solidworks_config or SolidWorksConfig()
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self._converter_factory = converter_factory or self._default_converter_factory
+        self._jobs: "queue.Queue[Any]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._config_changed = False
+        self._closed = False
+        self.started_count = 0
+
+    @staticmethod
+    def _default_converter_factory(solidworks_config: SolidWorksConfig):
+        from core.sw_converter import SWConverter
+
+        return SWConverter(solidworks_config=solidworks_config)
+
+    @property
+    def is_running(self) -> bool:
+        with self._lock:
+            return self._thread is not None and self._thread.is_alive()
+
+    def submit(self, job: Callable[[Any], Any]) -> Future:
+        """提交任务，job在COM线程中以SWConverter为参数执行"""
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("SolidWorks会话服务已关闭")
+            self._jobs.put((future, job))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="SolidWorksSession", daemon=True)
+                self._thread.start()
+        return future
+
+    def run(self, job: Callable[[Any], Any]) -> Any:
+        """提交任务并等待结果"""
+        return self.submit(job).result()
+
+    def update_config(self, solidworks_config: SolidWorksConfig) -> None:
+        """更新配置，下一个任务开始前重建转换器"""
+        with self._lock:
+            if solidworks_config != self.solidworks_config:
+                self.solidworks_config = solidworks_config
+                self._config_changed = True
+
+    def shutdown(self, timeout: Optional[float] = 10.0) -> None:
+        """停止服务并释放SolidWorks连接（当前任务完成后）"""
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+            if thread is not None and thread.is_alive():
+                self._jobs.put(_STOP)
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def _run(self) -> None:
+        converter = None
+        try:
+            while True:
+                try:
+                    item = self._jobs.get(timeout=self.idle_timeout_seconds)
+                except queue.Empty:
+                    with self._lock:
+                        if self._jobs.empty():
+                            logger.info("SolidWorks会话空闲超时，释放连接")
+                            self._thread = None
+                            return
+                    continue
+
+                if item is _STOP:
+                    return
+
+                future, job = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    if converter is not None and self._needs_rebuild(converter):
+                        logger.info("SolidWorks会话需要重建（配置变更或健康检查失败）")
+                        # 先清空引用：新转换器启动失败时，下一个任务不会再关闭已关闭的转换器
+                        stale, converter = converter, None
+                        stale.shutdown()
+                    if converter is None:
+                        converter = self._start_converter()
+                    future.set_result(job(converter))
+                except BaseException as e:
+                    future.set_exception(e)
+        finally:
+            if converter is not None:
+                converter.shutdown()
+            if self._closed:
+                self._fail_pending()
+
+    def _needs_rebuild(self, converter) -> bool:
+        with self._lock:
+            config_changed = self._config_changed
+            self._config_changed = False
+        return config_changed or not converter.is_alive()
+
+    def _start_converter(self):
+        """创建并初始化转换器；初始化失败时释放已获取的资源后抛出异常"""
+        with self._lock:
+            self._config_changed = False
+            solidworks_config = self.solidworks_config
+        started = time.perf_counter()
+        converter = self._converter_factory(solidworks_config)
+        try:
+            initialized = converter.initialize()
+        except BaseException:
+            converter.shutdown()
+            raise
+        if not initialized:
+            converter.shutdown()
+            raise RuntimeError("SolidWorks初始化失败")
+        self.started_count += 1
+        logger.info(f"SolidWorks会话已启动，耗时 {time.perf_counter() - started:.1f} 秒")
+        return converter
+
+    def _fail_pending(self) -> None:
+        """服务停止后，未执行的任务直接失败"""
+        while True:
+            try:
+                item = self._jobs.get_nowait()
+            except queue.Empty:
+                return
+            if item is _STOP:
+                continue
+            future, _job = item
+            if future.set_running_or_notify_cancel():
+                future.set_exception(RuntimeError("SolidWorks会话服务已关闭"))
@@ -21,6 +21,7 @@ from PySide6.QtWidgets import (
 from auth import AuthSession
 from config import AppSettings, load_settings
 from config.app_metadata import WINDOW_TITLE, APP_NAME, APP_VERSION, window_title_with_version
+from core.sw_session import SolidWorksSessionService
 from gui.pages.local_processing_page import LocalProcessingPage
 from gui.pages.residual_material_page import ResidualMaterialPage
 from gui.pages.settings_page import SettingsPage
@@ -45,6 +46,10 @@ class MainWindow(QMainWindow):
         self.platform_capabilities = platform_capabilities or detect_platform_capabilities()
         self.remote_api_client_factory = remote_api_client_factory
         self._logout_attempted = False
+        self.sw_session = SolidWorksSessionService(
+            self.settings.solidworks,
+            idle_timeout_seconds=self.settings.solidworks.session_idle_minutes * 60,
+        )
 
         self.setWindowTitle(window_title_with_version())
         self.setMinimumSize(1360, 820)
@@ -98,6 +103,7 @@ class MainWindow(QMainWindow):
         self.local_processing_page = LocalProcessingPage(
             settings=self.settings,
             platform_capabilities=self.platform_capabilities,
+            sw_session=self.sw_session,
         )
         self.user_management_page = UserManagementPage(
             settings=self.settings,
@@ -120,12 +126,15 @@ class MainWindow(QMainWindow):
     def _on_settings_saved(self, settings: AppSettings) -> None:
         self.settings = settings
         self.local_processing_page.update_settings(settings)
+        self.sw_session.update_config(settings.solidworks)
+        self.sw_session.idle_timeout_seconds = settings.solidworks.session_idle_minutes * 60
         self.user_management_page.update_settings(settings)
         self.residual_material_page.update_settings(settings)
 
     def closeEvent(self, event) -> None:
         self.user_management_page.shutdown()
         self.residual_material_page.shutdown()
+        self.sw_session.shutdown()
         self._logout_backend_session()
         super().closeEvent(event)
 
@@ -24,6 +24,7 @@ from PySide6.QtWidgets import (
 
 from config import AppSettings
 from core import BOMClassifier
+from core.sw_session import SolidWorksSessionService
 from gui.worker_thread import WorkerThread
 from utils.platform_capabilities import PlatformCapabilities, detect_platform_capabilities
 
@@ -33,10 +34,12 @@ class LocalProcessingPage(QWidget):
         self,
         settings: AppSettings,
         platform_capabilities: Optional[PlatformCapabilities] = None,
+        sw_session: Optional[SolidWorksSessionService] = None,
     ):
         super().__init__()
         self.settings = settings
         self.platform_capabilities = platform_capabilities or detect_platform_capabilities()
+        self.sw_session = sw_session
         self.classifier = BOMClassifier(output_config=self.settings.output)
         self.config: Dict[str, str] = {
             "part": self.settings.bom.part_column,
@@ -288,6 +291,11 @@ class LocalProcessingPage(QWidget):
         btn = QPushButton("开始合并DXF文件")
         btn.clicked.connect(self._on_merge_dxf)
 
+        # 每个DXF只读取一次，同时完成第四步的标注和本步的合并
+        single_pass_btn = QPushButton("标注并合并（单遍处理）")
+        single_pass_btn.setToolTip("每个DXF只读取一次：添加标注、保存处理结果并直接合并")
+        single_pass_btn.clicked.connect(self._on_process_and_merge_dxf)
+
         self.progress3 = QProgressBar()
         self.log3 = QTextEdit()
         self.log3.setReadOnly(True)
@@ -299,7 +307,10 @@ class LocalProcessingPage(QWidget):
         )
 
         group_layout.addWidget(info)
-        group_layout.addWidget(btn)
+        buttons_layout = QHBoxLayout()
+        buttons_layout.addWidget(btn)
+        buttons_layout.addWidget(single_pass_btn)
+        group_layout.addLayout(buttons_layout)
         group_layout.addWidget(self.progress3)
         group_layout.addWidget(self.log3, 1)
         group_layout.addLayout(actions_layout)
@@ -425,7 +436,13 @@ class LocalProcessingPage(QWidget):
         self.classify_output_dir = None
         self.open_classify_dir_btn.setEnabled(False)
 
-        self.worker = WorkerThread("classify_and_convert", self.classifier, self.config, self.settings)
+        self.worker = WorkerThread(
+            "classify_and_convert",
+            self.classifier,
+            self.config,
+            self.settings,
+            sw_session=self.sw_session,
+        )
         self.worker.progress.connect(self.progress1.setValue)
         self.worker.log_message.connect(lambda msg: self.log1.append(msg))
         self.worker.finished.connect(self._on_classify_finished)
@@ -478,6 +495,29 @@ class LocalProcessingPage(QWidget):
         self.worker.finished.connect(self._on_merge_dxf_finished)
         self.worker.start()
 
+    def _on_process_and_merge_dxf(self) -> None:
+        if not self.classifier.classified_dir or not self.classifier.classified_dir.exists():
+            QMessageBox.warning(self, "提示", "请先完成智能处理（步骤3）")
+            return
+
+        self.log3.clear()
+        self.progress3.setValue(0)
+        self.processed_dxf_output_dir = None
+        self.open_processed_dxf_dir_btn.setEnabled(False)
+        self.merged_dxf_output_dir = None
+        self.open_merged_dxf_dir_btn.setEnabled(False)
+
+        self.worker = WorkerThread("process_and_merge", self.classifier, app_settings=self.settings)
+        self.worker.log_message.connect(lambda msg: self.log3.append(msg))
+        self.worker.finished.connect(self._on_process_and_merge_dxf_finished)
+        self.worker.start()
+
+    def _on_process_and_merge_dxf_finished(self, success: bool, msg: str) -> None:
+        if self.classifier.processed_dxf_dir and self.classifier.processed_dxf_dir.exists():
+            self.processed_dxf_output_dir = self.classifier.processed_dxf_dir
+            self.open_processed_dxf_dir_btn.setEnabled(True)
+        self._on_merge_dxf_finished(success, msg)
+
     def _on_merge_dxf_finished(self, success: bool, msg: str) -> None:
         self.progress3.setValue(100)
         if success and self.classifier.merged_dir:
@@ -5,6 +5,7 @@ from dataclasses import replace
 from PySide6.QtCore import Signal
 from PySide6.QtWidgets import (
     QCheckBox,
+    QComboBox,
     QDoubleSpinBox,
     QFormLayout,
     QGroupBox,
@@ -89,10 +90,12 @@ class SettingsPage(QWidget):
         self.classified_dir_edit = QLineEdit(self.settings.output.classified_dir)
         self.processed_dxf_dir_edit = QLineEdit(self.settings.output.processed_dxf_dir)
         self.merged_dir_edit = QLineEdit(self.settings.output.merged_dir)
+        self.quarantine_dir_edit = QLineEdit(self.settings.output.quarantine_dir)
         form.addRow("结果目录", self.result_dir_edit)
         form.addRow("分类目录", self.classified_dir_edit)
         form.addRow("DXF处理目录", self.processed_dxf_dir_edit)
         form.addRow("合并目录", self.merged_dir_edit)
+        form.addRow("隔离目录", self.quarantine_dir_edit)
         layout.addWidget(self._group("输出目录", form))
 
     def _create_inventory_group(self, layout: QVBoxLayout) -> None:
@@ -109,8 +112,53 @@ class SettingsPage(QWidget):
         self.template_dir_edit = QLineEdit(self.settings.solidworks.template_dir)
         self.solidworks_visible_check = QCheckBox("启动新实例时显示 SolidWorks")
         self.solidworks_visible_check.setChecked(self.settings.solidworks.visible)
+        self.solidworks_early_binding_check = QCheckBox("使用早绑定 COM 接口（makepy 缓存）")
+        self.solidworks_early_binding_check.setChecked(self.settings.solidworks.early_binding)
+        self.solidworks_com_trace_check = QCheckBox("记录 COM 调用及转换步骤耗时")
+        self.solidworks_com_trace_check.setChecked(self.settings.solidworks.com_trace)
         form.addRow("模板目录", self.template_dir_edit)
         form.addRow("可见性", self.solidworks_visible_check)
+        self.solidworks_export_mode_combo = QComboBox()
+        self.solidworks_export_mode_combo.addItem("工程图整页导出", "drawing")
+        self.solidworks_export_mode_combo.addItem("钣金零件直接导出展开图", "flat_pattern")
+        self._select_combo_data(self.solidworks_export_mode_combo, self.settings.solidworks.export_mode)
+        form.addRow("COM 接口", self.solidworks_early_binding_check)
+        form.addRow("耗时跟踪", self.solidworks_com_trace_check)
+        self.solidworks_export_formats_edit = QLineEdit(self.settings.solidworks.export_formats)
+        self.solidworks_export_formats_edit.setPlaceholderText("dxf;pdf;dwg")
+        self.solidworks_open_mode_combo = QComboBox()
+        self.solidworks_open_mode_combo.addItem("常规", "normal")
+        self.solidworks_open_mode_combo.addItem("只读", "read_only")
+        self.solidworks_open_mode_combo.addItem("仅查看（不替换模板）", "view_only")
+        self.solidworks_open_mode_combo.addItem("出详图模式（不加载模型）", "detailing")
+        self._select_combo_data(self.solidworks_open_mode_combo, self.settings.solidworks.open_mode)
+        self.solidworks_lightweight_check = QCheckBox("以轻化方式加载参考模型")
+        self.solidworks_lightweight_check.setChecked(self.settings.solidworks.lightweight_references)
+        self.solidworks_metadata_check = QCheckBox("排程前读取工程图元数据（参考文件、图幅、图纸数量）")
+        self.solidworks_metadata_check.setChecked(self.settings.solidworks.read_drawing_metadata)
+        self.solidworks_skip_unchanged_check = QCheckBox("工程图及参考文件未变化时跳过转换")
+        self.solidworks_skip_unchanged_check.setChecked(self.settings.solidworks.skip_unchanged)
+        self.solidworks_staging_check = QCheckBox("转换前复制工程图及参考文件到本地缓存")
+        self.solidworks_staging_check.setChecked(self.settings.solidworks.staging_enabled)
+        self.solidworks_staging_dir_edit = QLineEdit(self.settings.solidworks.staging_dir)
+        self.solidworks_staging_dir_edit.setPlaceholderText("留空使用系统临时目录")
+        self.solidworks_staging_workers_spin = QSpinBox()
+        self.solidworks_staging_workers_spin.setRange(1, 32)
+        self.solidworks_staging_workers_spin.setValue(self.settings.solidworks.staging_workers)
+        self.solidworks_session_idle_spin = QSpinBox()
+        self.solidworks_session_idle_spin.setRange(1, 24 * 60)
+        self.solidworks_session_idle_spin.setSuffix(" 分钟")
+        self.solidworks_session_idle_spin.setValue(self.settings.solidworks.session_idle_minutes)
+        form.addRow("导出方式", self.solidworks_export_mode_combo)
+        form.addRow("导出格式", self.solidworks_export_formats_edit)
+        form.addRow("工程图打开模式", self.solidworks_open_mode_combo)
+        form.addRow("参考模型", self.solidworks_lightweight_check)
+        form.addRow("工程图元数据", self.solidworks_metadata_check)
+        form.addRow("增量转换", self.solidworks_skip_unchanged_check)
+        form.addRow("本地暂存", self.solidworks_staging_check)
+        form.addRow("暂存目录", self.solidworks_staging_dir_edit)
+        form.addRow("暂存复制线程", self.solidworks_staging_workers_spin)
+        form.addRow("空闲释放连接", self.solidworks_session_idle_spin)
         layout.addWidget(self._group("SolidWorks", form))
 
     def _create_dxf_group(self, layout: QVBoxLayout) -> None:
@@ -125,10 +173,94 @@ class SettingsPage(QWidget):
         self.dxf_spacing_spin = QDoubleSpinBox()
         self.dxf_spacing_spin.setRange(0.0, 100000.0)
         self.dxf_spacing_spin.setValue(self.settings.dxf.spacing)
+        self.dxf_annotation_mode_combo = QComboBox()
+        self.dxf_annotation_mode_combo.addItem("完整加载文档", "dom")
+        self.dxf_annotation_mode_combo.addItem("流式处理（大文件更快）", "stream")
+        self._select_combo_data(self.dxf_annotation_mode_combo, self.settings.dxf.annotation_mode)
+        self.dxf_annotation_workers_spin = QSpinBox()
+        self.dxf_annotation_workers_spin.setRange(0, 64)
+        self.dxf_annotation_workers_spin.setSpecialValueText("全部CPU核心")
+        self.dxf_annotation_workers_spin.setValue(self.settings.dxf.annotation_workers)
+        self.dxf_annotation_chunk_spin = QSpinBox()
+        self.dxf_annotation_chunk_spin.setRange(1, 100)
+        self.dxf_annotation_chunk_spin.setValue(self.settings.dxf.annotation_chunk_size)
+        self.dxf_merge_visible_layers_edit = QLineEdit(self.settings.dxf.merge_visible_layers)
+        self.dxf_merge_visible_layers_edit.setPlaceholderText("0;细实线层")
+        self.dxf_merge_import_visible_only_check = QCheckBox("合并时只导入显示图层的实体")
+        self.dxf_merge_import_visible_only_check.setChecked(self.settings.dxf.merge_import_visible_only)
+        self.dxf_merge_dedup_check = QCheckBox("几何相同的零件共用一个块定义")
+        self.dxf_merge_dedup_check.setChecked(self.settings.dxf.merge_dedup_blocks)
+        self.dxf_merge_workers_spin = QSpinBox()
+        self.dxf_merge_workers_spin.setRange(0, 64)
+        self.dxf_merge_workers_spin.setSpecialValueText("全部CPU核心")
+        self.dxf_merge_workers_spin.setValue(self.settings.dxf.merge_workers)
+        self.dxf_merge_memory_spin = QSpinBox()
+        self.dxf_merge_memory_spin.setRange(0, 1024 * 1024)
+        self.dxf_merge_memory_spin.setSuffix(" MB")
+        self.dxf_merge_memory_spin.setSpecialValueText("按可用内存自动")
+        self.dxf_merge_memory_spin.setValue(self.settings.dxf.merge_memory_budget_mb)
+        self.dxf_merge_max_entities_spin = QSpinBox()
+        self.dxf_merge_max_entities_spin.setRange(0, 100_000_000)
+        self.dxf_merge_max_entities_spin.setSpecialValueText("不限制")
+        self.dxf_merge_max_entities_spin.setValue(self.settings.dxf.merge_max_entities)
+        self.dxf_merge_max_file_spin = QSpinBox()
+        self.dxf_merge_max_file_spin.setRange(0, 100_000)
+        self.dxf_merge_max_file_spin.setSuffix(" MB")
+        self.dxf_merge_max_file_spin.setSpecialValueText("不限制")
+        self.dxf_merge_max_file_spin.setValue(self.settings.dxf.merge_max_file_mb)
+        self.dxf_merge_max_width_spin = QDoubleSpinBox()
+        self.dxf_merge_max_width_spin.setRange(0.0, 100_000_000.0)
+        self.dxf_merge_max_width_spin.setSpecialValueText("不限制")
+        self.dxf_merge_max_width_spin.setValue(self.settings.dxf.merge_max_width)
+        self.dxf_binary_intermediate_check = QCheckBox("标注结果写出为二进制DXF（体积更小、读取更快）")
+        self.dxf_binary_intermediate_check.setChecked(self.settings.dxf.binary_intermediate)
+        self.dxf_binary_final_check = QCheckBox("合并结果写出为二进制DXF")
+        self.dxf_binary_final_check.setChecked(self.settings.dxf.binary_final)
+        self.dxf_merge_streaming_check = QCheckBox("块实体写到临时文件，大组合并时内存占用不随零件数增长（仅ASCII）")
+        self.dxf_merge_streaming_check.setChecked(self.settings.dxf.merge_streaming)
+        self.dxf_preflight_check = QCheckBox("标注/合并前检查DXF结构，损坏的文件移到隔离目录")
+        self.dxf_preflight_check.setChecked(self.settings.dxf.preflight)
+        self.dxf_merge_cleanup_check = QCheckBox("合并前删除重复和零长度实体，合并共线线段")
+        self.dxf_merge_cleanup_check.setChecked(self.settings.dxf.merge_cleanup)
+        self.dxf_merge_cleanup_tolerance_spin = QDoubleSpinBox()
+        self.dxf_merge_cleanup_tolerance_spin.setDecimals(4)
+        self.dxf_merge_cleanup_tolerance_spin.setRange(0.0001, 10.0)
+        self.dxf_merge_cleanup_tolerance_spin.setSingleStep(0.001)
+        self.dxf_merge_cleanup_tolerance_spin.setValue(self.settings.dxf.merge_cleanup_tolerance)
+        self.dxf_merge_layout_combo = QComboBox()
+        self.dxf_merge_layout_combo.addItem("单行排列", "strip")
+        self.dxf_merge_layout_combo.addItem("紧凑排样", "pack")
+        self._select_combo_data(self.dxf_merge_layout_combo, self.settings.dxf.merge_layout)
+        self.dxf_merge_sheet_width_spin = QDoubleSpinBox()
+        self.dxf_merge_sheet_width_spin.setRange(0.0, 100_000_000.0)
+        self.dxf_merge_sheet_width_spin.setSpecialValueText("自动（接近正方形）")
+        self.dxf_merge_sheet_width_spin.setValue(self.settings.dxf.merge_sheet_width)
+        self.dxf_remove_duplicates_check = QCheckBox("读取时删除重合的直线、圆弧和圆（标注和合并结果都生效，使用清理容差）")
+        self.dxf_remove_duplicates_check.setChecked(self.settings.dxf.remove_duplicates)
         form.addRow("文字图层", self.dxf_text_layer_edit)
         form.addRow("文字颜色", self.dxf_text_color_spin)
         form.addRow("文字高度", self.dxf_text_height_spin)
         form.addRow("合并间距", self.dxf_spacing_spin)
+        form.addRow("标注方式", self.dxf_annotation_mode_combo)
+        form.addRow("标注进程数", self.dxf_annotation_workers_spin)
+        form.addRow("每批文件数", self.dxf_annotation_chunk_spin)
+        form.addRow("合并显示图层", self.dxf_merge_visible_layers_edit)
+        form.addRow("图层过滤", self.dxf_merge_import_visible_only_check)
+        form.addRow("块去重", self.dxf_merge_dedup_check)
+        form.addRow("合并进程数", self.dxf_merge_workers_spin)
+        form.addRow("合并内存预算", self.dxf_merge_memory_spin)
+        form.addRow("分片实体数上限", self.dxf_merge_max_entities_spin)
+        form.addRow("分片文件大小上限", self.dxf_merge_max_file_spin)
+        form.addRow("分片排版宽度上限", self.dxf_merge_max_width_spin)
+        form.addRow("二进制DXF", self.dxf_binary_intermediate_check)
+        form.addRow("", self.dxf_binary_final_check)
+        form.addRow("流式合并", self.dxf_merge_streaming_check)
+        form.addRow("DXF预检", self.dxf_preflight_check)
+        form.addRow("几何清理", self.dxf_merge_cleanup_check)
+        form.addRow("清理容差", self.dxf_merge_cleanup_tolerance_spin)
+        form.addRow("合并排版", self.dxf_merge_layout_combo)
+        form.addRow("排样目标宽度", self.dxf_merge_sheet_width_spin)
+        form.addRow("删除重复实体", self.dxf_remove_duplicates_check)
         layout.addWidget(self._group("DXF", form))
 
     def _create_auth_group(self, layout: QVBoxLayout) -> None:
@@ -158,6 +290,7 @@ class SettingsPage(QWidget):
                 classified_dir=self.classified_dir_edit.text().strip(),
                 processed_dxf_dir=self.processed_dxf_dir_edit.text().strip(),
                 merged_dir=self.merged_dir_edit.text().strip(),
+                quarantine_dir=self.quarantine_dir_edit.text().strip(),
             ),
             inventory=replace(
                 self.settings.inventory,
@@ -167,6 +300,18 @@ class SettingsPage(QWidget):
                 self.settings.solidworks,
                 template_dir=self.template_dir_edit.text().strip(),
                 visible=self.solidworks_visible_check.isChecked(),
+                early_binding=self.solidworks_early_binding_check.isChecked(),
+                com_trace=self.solidworks_com_trace_check.isChecked(),
+                export_mode=self.solidworks_export_mode_combo.currentData(),
+                export_formats=self.solidworks_export_formats_edit.text().strip() or "dxf",
+                open_mode=self.solidworks_open_mode_combo.currentData(),
+                lightweight_references=self.solidworks_lightweight_check.isChecked(),
+                read_drawing_metadata=self.solidworks_metadata_check.isChecked(),
+                skip_unchanged=self.solidworks_skip_unchanged_check.isChecked(),
+                staging_enabled=self.solidworks_staging_check.isChecked(),
+                staging_dir=self.solidworks_staging_dir_edit.text().strip(),
+                staging_workers=self.solidworks_staging_workers_spin.value(),
+                session_idle_minutes=self.solidworks_session_idle_spin.value(),
             ),
             dxf=replace(
                 self.settings.dxf,
@@ -174,6 +319,26 @@ class SettingsPage(QWidget):
                 text_color=self.dxf_text_color_spin.value(),
                 text_height=self.dxf_text_height_spin.value(),
                 spacing=self.dxf_spacing_spin.value(),
+                annotation_mode=self.dxf_annotation_mode_combo.currentData(),
+                annotation_workers=self.dxf_annotation_workers_spin.value(),
+                annotation_chunk_size=self.dxf_annotation_chunk_spin.value(),
+                merge_visible_layers=self.dxf_merge_visible_layers_edit.text().strip() or "0;细实线层",
+                merge_import_visible_only=self.dxf_merge_import_visible_only_check.isChecked(),
+                merge_dedup_blocks=self.dxf_merge_dedup_check.isChecked(),
+                merge_workers=self.dxf_merge_workers_spin.value(),
+                merge_memory_budget_mb=self.dxf_merge_memory_spin.value(),
+                merge_max_entities=self.dxf_merge_max_entities_spin.value(),
+                merge_max_file_mb=self.dxf_merge_max_file_spin.value(),
+                merge_max_width=self.dxf_merge_max_width_spin.value(),
+                binary_intermediate=self.dxf_binary_intermediate_check.isChecked(),
+                binary_final=self.dxf_binary_final_check.isChecked(),
+                merge_streaming=self.dxf_merge_streaming_check.isChecked(),
+                preflight=self.dxf_preflight_check.isChecked(),
+                merge_cleanup=self.dxf_merge_cleanup_check.isChecked(),
+                merge_cleanup_tolerance=self.dxf_merge_cleanup_tolerance_spin.value(),
+                merge_layout=self.dxf_merge_layout_combo.currentData(),
+                merge_sheet_width=self.dxf_merge_sheet_width_spin.value(),
+                remove_duplicates=self.dxf_remove_duplicates_check.isChecked(),
             ),
             remote_api=self.settings.remote_api,
             auth=replace(
@@ -189,6 +354,12 @@ class SettingsPage(QWidget):
             QMessageBox.information(self, "设置", "设置已保存，部分设置将在重启后生效。")
         return self.settings
 
+    @staticmethod
+    def _select_combo_data(combo: QComboBox, value: str) -> None:
+        index = combo.findData(value)
+        if index >= 0:
+            combo.setCurrentIndex(index)
+
     @staticmethod
     def _group(title: str, layout: QFormLayout) -> QGroupBox:
         group = QGroupBox(title)
@@ -1,13 +1,24 @@
 # gui/worker_thread.py
 
+import re
 import shutil
+import time
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 import pandas as pd
 from PySide6.QtCore import QThread, Signal
 
 from config import AppSettings, load_settings
-from core import BOMClassifier, DXFProcessor, SWConverter
+from core import BOMClassifier, ConversionScheduler, DXFProcessor, SWConverter
+from core.conversion_deps import ConversionDependencies
+from core.conversion_scheduler import ConversionCostModel, ConversionHistory
+from core.drawing_metadata import DrawingMetadata, DrawingMetadataReader
+from core.dxf_manifest import DxfManifest
+from core.dxf_parallel import AnnotationJob, DXFAnnotationPool, resolve_worker_count
+from core.dxf_preflight import preflight_directory
+from core.run_report import RunReport
+from core.staging_cache import DrawingStagingCache, StagingHandle
+from core.sw_session import SolidWorksSessionService
 from utils import logger
 from utils.platform_capabilities import detect_platform_capabilities
 
@@ -24,12 +35,14 @@ class WorkerThread(QThread):
         classifier: BOMClassifier,
         config: Optional[Dict[str, str]] = None,
         app_settings: Optional[AppSettings] = None,
+        sw_session: Optional[SolidWorksSessionService] = None,
     ):
         super().__init__()
         self.task_type = task_type
         self.classifier = classifier
         self.config = config or {}
         self.app_settings = app_settings or load_settings()
+        self.sw_session = sw_session
     
     def run(self) -> None:
         try:
@@ -39,6 +52,8 @@ class WorkerThread(QThread):
                 self._run_dxf_processing()
             elif self.task_type == "merge_dxf":
                 self._run_dxf_merge()
+            elif self.task_type == "process_and_merge":
+                self._run_dxf_process_and_merge()
         except Exception as e:
             self.log_message.emit(f"执行出错: {str(e)}")
             self.finished.emit(False, str(e))
@@ -145,42 +160,107 @@ class WorkerThread(QThread):
             self.finished.emit(False, capabilities.solidworks_local_processing_reason)
             return
 
-        self.log_message.emit("正在初始化 SolidWorks...")
-        sw_converter = SWConverter(solidworks_config=self.app_settings.solidworks)
-        if not sw_converter.initialize():
-            self.finished.emit(False, "SolidWorks初始化失败")
-            return
+        export_formats = SWConverter.parse_export_formats(self.app_settings.solidworks.export_formats)
+        if len(export_formats) > 1:
+            self.log_message.emit(f"导出格式: {', '.join(fmt.upper() for fmt in export_formats)}")
+        
+        report = RunReport(self.task_type)
+        drawing_metadata = self._read_drawing_metadata([task['matched_file'] for task in tasks_to_process], report)
+        for task in tasks_to_process:
+            task['references'] = self._reference_files(task['matched_file'], drawing_metadata)
+            task['outputs'] = self._task_outputs(task, export_formats)
+        
+        # 工程图及参考文件都未变化时沿用上次的转换结果
+        dependencies = ConversionDependencies(self._conversion_signature())
+        unchanged_count = 0
+        if self.app_settings.solidworks.skip_unchanged:
+            tasks_to_process, unchanged_count = self._drop_unchanged(tasks_to_process, dependencies)
+            total_to_process = len(tasks_to_process)
+            report.add_section("dependencies", {
+                "unchanged": unchanged_count,
+                "to_convert": total_to_process,
+                "hashed_files": dependencies.hashed_files,
+            })
+            if total_to_process == 0:
+                report.write(self.classifier.result_dir / "conversion_report.json")
+                self.finished.emit(True, f"全部 {unchanged_count} 个工程图均未变化，无需转换")
+                return
+
+        sw_converter: Optional[SWConverter] = None
+        if self.sw_session is not None:
+            # 常驻会话：在会话的COM线程中执行每个任务
+            self.log_message.emit("正在连接 SolidWorks 常驻会话...")
+            run_job = self.sw_session.run
+            try:
+                run_job(lambda converter: converter.reset_timings())
+            except RuntimeError as e:
+                self.finished.emit(False, str(e))
+                return
+        else:
+            self.log_message.emit("正在初始化 SolidWorks...")
+            sw_converter = SWConverter(solidworks_config=self.app_settings.solidworks)
+            if not sw_converter.initialize():
+                self.finished.emit(False, "SolidWorks初始化失败")
+                return
+            run_job = lambda job: job(sw_converter)
+        
+        # 按预计耗时从长到短排程（单个SolidWorks实例即单个工作者）
+        history = ConversionHistory(self.classifier.result_dir / ConversionHistory.FILE_NAME)
+        scheduler = ConversionScheduler(ConversionCostModel(history), worker_count=1)
+        plan = scheduler.plan(
+            tasks_to_process,
+            lambda task: task['matched_file'],
+            lambda task: drawing_metadata[task['matched_file']].sheet_count if task['matched_file'] in drawing_metadata else 1,
+        )
+        scheduled = [item for queue in plan for item in queue]
+        self.log_message.emit(f"预计转换耗时: {scheduler.predicted_makespan:.1f} 秒")
+        
+        # 按转换顺序提前把工程图和参考文件暂存到本地
+        staging_cache = self._create_staging_cache()
+        staging_handles: Dict[int, StagingHandle] = {}
+        staging_totals = {'copied_files': 0, 'reused_files': 0, 'copied_bytes': 0, 'failed': 0}
+        if staging_cache is not None:
+            self.log_message.emit(f"本地暂存目录: {staging_cache.cache_dir}")
+            for item in scheduled:
+                staging_handles[id(item)] = staging_cache.stage_async(
+                    item.task['matched_file'], item.task['references']
+                )
         
         try:
             success_count = 0
             fail_count = 0
             
-            for idx, task in enumerate(tasks_to_process):
+            for idx, item in enumerate(scheduled):
+                task = item.task
                 part_name = task['part_name']
                 material = task['material']
                 subfolder = task['subfolder']
-                quantity = task['quantity']
                 matched_file = task['matched_file']
+                outputs = task['outputs']
                 
-                # 准备输出目录
-                dest_dir = self.classifier.classified_dir / material
-                if subfolder:
-                    dest_dir = dest_dir / subfolder
-                dest_dir.mkdir(parents=True, exist_ok=True)
-                
-                qty_prefix = quantity if quantity != 'nan' else '1'
-                dxf_filename = f"({qty_prefix}){matched_file.stem}.dxf"
-                dxf_output = dest_dir / dxf_filename
+                # 准备输出目录（每种导出格式一棵分类目录）
+                for output_path in outputs.values():
+                    output_path.parent.mkdir(parents=True, exist_ok=True)
                 
                 # 转换为DXF
                 current_progress = idx + 1
                 self.log_message.emit(f"[{current_progress}/{total_to_process}] {part_name} → 正在转换...")
-                success, msg = sw_converter.convert_to_dxf(matched_file, dxf_output)
+                source_file = self._wait_for_staging(staging_handles.get(id(item)), matched_file, staging_totals)
+                started = time.perf_counter()
+                saved_formats, msg = run_job(
+                    lambda converter: self._convert_drawing(converter, source_file, outputs)
+                )
+                success = len(saved_formats) == len(outputs)
+                scheduler.record_actual(item, time.perf_counter() - started, success)
                 
+                # 已导出的格式各自记录依赖，只有失败的格式下次需要重新导出
+                self._write_dependencies(dependencies, task, saved_formats)
+                for export_format in saved_formats:
+                    output_name = outputs[export_format].name
+                    relative_output = f"{material}/{subfolder}/{output_name}" if subfolder else f"{material}/{output_name}"
+                    self.log_message.emit(f"[{current_progress}/{total_to_process}] {part_name} → {relative_output}")
                 if success:
                     success_count += 1
-                    relative_output = f"{material}/{subfolder}/{dxf_filename}" if subfolder else f"{material}/{dxf_filename}"
-                    self.log_message.emit(f"[{current_progress}/{total_to_process}] {part_name} → {relative_output}")
                 else:
                     fail_count += 1
                     self.log_message.emit(f"[{current_progress}/{total_to_process}] {msg}")
@@ -193,16 +273,187 @@ class WorkerThread(QThread):
             self.log_message.emit(f"   成功转换: {success_count} 个文件")
             if fail_count > 0:
                 self.log_message.emit(f"   转换失败: {fail_count} 个文件")
+            if unchanged_count > 0:
+                self.log_message.emit(f"   未变化沿用: {unchanged_count} 个文件")
             if total_skipped > 0:
                 self.log_message.emit(f"   已跳过: {total_skipped} 个零件")
-            self.log_message.emit(f"   总计处理: {success_count + fail_count}/{len(df)} (有效率: {(success_count + fail_count)/len(df)*100:.1f}%)")
+            handled_count = success_count + fail_count + unchanged_count
+            self.log_message.emit(f"   总计处理: {handled_count}/{len(df)} (有效率: {handled_count/len(df)*100:.1f}%)")
+            for line in scheduler.summary_lines():
+                self.log_message.emit(line)
+            com_timings = run_job(lambda converter: converter.timing_summary())
+            slowest_calls = sorted(com_timings.items(), key=lambda entry: entry[1]["total_seconds"], reverse=True)[:5]
+            if slowest_calls:
+                self.log_message.emit("   COM调用耗时:")
+                for name, stats in slowest_calls:
+                    self.log_message.emit(
+                        f"      - {name}: {stats['count']} 次, 共 {stats['total_seconds']:.2f} 秒, 平均 {stats['avg_ms']:.1f} 毫秒"
+                    )
+            step_timings = run_job(lambda converter: converter.step_summary())
+            if step_timings:
+                self.log_message.emit("   转换步骤耗时:")
+                for name, stats in sorted(step_timings.items(), key=lambda entry: entry[1]["total_seconds"], reverse=True):
+                    self.log_message.emit(
+                        f"      - {name}: 共 {stats['total_seconds']:.2f} 秒, 平均 {stats['avg_ms']:.1f} 毫秒, 最长 {stats['max_ms']:.1f} 毫秒"
+                    )
+            
+            if staging_cache is not None:
+                self.log_message.emit(
+                    f"   本地暂存: 复制 {staging_totals['copied_files']} 个文件"
+                    f" ({staging_totals['copied_bytes'] / 1024 / 1024:.1f} MB), 复用 {staging_totals['reused_files']} 个"
+                )
+                report.add_section("staging", staging_totals)
+            
+            scheduler.save_history()
+            report.add_section("schedule", scheduler.summary())
+            report.add_section("com_calls", com_timings)
+            report.add_section("conversion_steps", step_timings)
+            report.write(self.classifier.result_dir / "conversion_report.json")
             
             self.finished.emit(True, f"成功转换并归档 {success_count} 个文件")
             
         finally:
-            # 关闭SolidWorks
-            self.log_message.emit("正在关闭 SolidWorks...")
-            sw_converter.shutdown()
+            if staging_cache is not None:
+                staging_cache.shutdown()
+            if sw_converter is not None:
+                # 关闭SolidWorks
+                self.log_message.emit("正在关闭 SolidWorks...")
+                sw_converter.shutdown()
+            else:
+                idle_minutes = self.app_settings.solidworks.session_idle_minutes
+                self.log_message.emit(f"SolidWorks 会话保持运行，空闲 {idle_minutes} 分钟后释放")
+    
+    def _task_outputs(self, task: Dict, export_formats: List[str]) -> Dict[str, Path]:
+        """各导出格式的输出路径：分类目录/材料/子目录/(数量)文件名.格式"""
+        material = task['material']
+        subfolder = task['subfolder']
+        relative_dir = Path(material) / subfolder if subfolder else Path(material)
+        qty_prefix = task['quantity'] if task['quantity'] != 'nan' else '1'
+        return {
+            export_format: self.classifier.classified_dir_for(export_format)
+            / relative_dir
+            / f"({qty_prefix}){task['matched_file'].stem}.{export_format}"
+            for export_format in export_formats
+        }
+    
+    def _conversion_signature(self) -> Dict[str, Any]:
+        """影响转换结果的设置和模板文件，变化后全部重新转换"""
+        solidworks = self.app_settings.solidworks
+        template_dir = SWConverter.resolve_template_dir(solidworks.template_dir)
+        return {
+            "template_dir": solidworks.template_dir,
+            "export_mode": solidworks.export_mode,
+            "open_mode": solidworks.open_mode,
+            "lightweight_references": solidworks.lightweight_references,
+            "template_files": ConversionDependencies.directory_signature(template_dir),
+        }
+    
+    def _drop_unchanged(self, tasks: List[Dict], dependencies: ConversionDependencies) -> Tuple[List[Dict], int]:
+        """去掉所有输出都仍为最新的任务；其余任务只保留需要重新导出的格式"""
+        changed_tasks = []
+        for task in tasks:
+            stale_outputs = {}
+            reasons = []
+            for export_format, output_path in task['outputs'].items():
+                up_to_date, reason = dependencies.check(output_path, task['matched_file'], task['references'])
+                if not up_to_date:
+                    stale_outputs[export_format] = output_path
+                    reasons.append(f"{export_format.upper()} {reason}")
+            if stale_outputs:
+                task['outputs'] = stale_outputs
+                changed_tasks.append(task)
+                self.log_message.emit(f"需要转换 - {task['part_name']}: {'; '.join(reasons)}")
+        unchanged_count = len(tasks) - len(changed_tasks)
+        if unchanged_count:
+            self.log_message.emit(f"未变化沿用: {unchanged_count} 个, 需要转换: {len(changed_tasks)} 个")
+        return changed_tasks, unchanged_count
+    
+    def _write_dependencies(self, dependencies: ConversionDependencies, task: Dict, export_formats: List[str]) -> None:
+        if not self.app_settings.solidworks.skip_unchanged:
+            return
+        try:
+            for export_format in export_formats:
+                dependencies.write(task['outputs'][export_format], task['matched_file'], task['references'])
+        except OSError as e:
+            self.log_message.emit(f"   写入依赖记录失败: {e}")
+    
+    def _read_drawing_metadata(self, drawings: List[Path], report: RunReport) -> Dict[Path, DrawingMetadata]:
+        """不经SolidWorks批量读取工程图元数据（图纸数量用于排程，参考文件用于暂存）"""
+        if not self.app_settings.solidworks.read_drawing_metadata:
+            return {}
+        started = time.perf_counter()
+        drawing_metadata = DrawingMetadataReader().read_many(drawings)
+        elapsed = time.perf_counter() - started
+        
+        sheet_sizes: Dict[str, int] = {}
+        for metadata in drawing_metadata.values():
+            sheet_size = metadata.sheet_size or "未识别"
+            sheet_sizes[sheet_size] = sheet_sizes.get(sheet_size, 0) + 1
+        failed = sum(1 for metadata in drawing_metadata.values() if metadata.error)
+        sizes_text = ", ".join(f"{size}×{count}" for size, count in sorted(sheet_sizes.items()))
+        self.log_message.emit(f"读取工程图元数据: {len(drawing_metadata)} 个, 耗时 {elapsed:.1f} 秒, 图幅: {sizes_text}")
+        if sheet_sizes.get("未识别"):
+            self.log_message.emit(f"   {sheet_sizes['未识别']} 个工程图未识别图幅，打开后按实际尺寸匹配模板")
+        if failed:
+            self.log_message.emit(f"   {failed} 个工程图读取失败")
+        
+        report.add_section("drawing_metadata", {
+            "files": len(drawing_metadata),
+            "seconds": round(elapsed, 3),
+            "failed": failed,
+            "sheet_sizes": sheet_sizes,
+            "sheets": sum(metadata.sheet_count for metadata in drawing_metadata.values()),
+            "references": sum(len(metadata.references) for metadata in drawing_metadata.values()),
+        })
+        return drawing_metadata
+    
+    def _reference_files(self, drawing: Path, drawing_metadata: Dict[Path, DrawingMetadata]) -> List[Path]:
+        """同名零件/装配体，加上元数据中记录的参考文件"""
+        references = self.classifier.find_reference_files(drawing)
+        metadata = drawing_metadata.get(drawing)
+        if metadata is not None:
+            references.extend(reference for reference in metadata.resolve_references() if reference not in references)
+        return references
+    
+    def _create_staging_cache(self) -> Optional[DrawingStagingCache]:
+        solidworks = self.app_settings.solidworks
+        if not solidworks.staging_enabled or not self.classifier.project_dir:
+            return None
+        cache_root = Path(solidworks.staging_dir) if solidworks.staging_dir else None
+        return DrawingStagingCache(self.classifier.project_dir, cache_root, solidworks.staging_workers)
+    
+    def _wait_for_staging(self, handle: Optional[StagingHandle], drawing: Path, totals: Dict[str, int]) -> Path:
+        """等待工程图暂存完成，失败时直接使用原路径"""
+        if handle is None:
+            return drawing
+        try:
+            staged = handle.result()
+        except Exception as e:
+            totals['failed'] += 1
+            self.log_message.emit(f"   本地暂存失败，直接从原路径打开: {e}")
+            return drawing
+        totals['copied_files'] += staged.copied_files
+        totals['reused_files'] += staged.reused_files
+        totals['copied_bytes'] += staged.copied_bytes
+        return staged.local_path
+    
+    def _convert_drawing(self, sw_converter: SWConverter, drawing: Path, outputs: Dict[str, Path]) -> Tuple[List[str], str]:
+        """按导出模式转换，返回导出成功的格式；展开图模式找不到钣金零件时退回工程图导出"""
+        if self.app_settings.solidworks.export_mode == "flat_pattern" and "dxf" in outputs:
+            part_file = self.classifier.find_part_file(drawing)
+            if part_file is None:
+                self.log_message.emit(f"   未找到同名零件，改用工程图导出: {drawing.name}")
+            else:
+                success, msg = sw_converter.export_flat_pattern(part_file, outputs["dxf"])
+                if success:
+                    # DXF已由零件导出，其余格式仍从工程图导出
+                    remaining = {fmt: path for fmt, path in outputs.items() if fmt != "dxf"}
+                    if remaining:
+                        saved_formats, msg = sw_converter.export_drawing(drawing, remaining)
+                        return ["dxf"] + saved_formats, msg
+                    return ["dxf"], msg
+                self.log_message.emit(f"   {msg}，改用工程图导出")
+        return sw_converter.export_drawing(drawing, outputs)
     
     def _fuzzy_match_file(self, part_name: str, file_dict: Dict[str, Path]) -> Optional[Path]:
         """
@@ -228,6 +479,19 @@ class WorkerThread(QThread):
         
         return None
     
+    def _preflight_dxf(self) -> None:
+        """预检分类目录下的DXF，截断或损坏的文件移到隔离目录，不进入后续处理"""
+        if not self.app_settings.dxf.preflight:
+            return
+        started = time.perf_counter()
+        results = preflight_directory(self.classifier.classified_dir, self.classifier.quarantine_dir)
+        rejected = [result for result in results if not result.ok]
+        self.log_message.emit(
+            f"DXF预检: {len(results)} 个文件，隔离 {len(rejected)} 个，耗时 {time.perf_counter() - started:.1f} 秒"
+        )
+        for result in rejected:
+            self.log_message.emit(f"  ⚠️ 已隔离 {result.path.name}: {result.reason}")
+    
     def _run_dxf_processing(self) -> None:
         """DXF处理任务"""
         self.log_message.emit("开始处理DXF文件...")
@@ -235,32 +499,44 @@ class WorkerThread(QThread):
         if self.classifier.processed_dxf_dir.exists():
             shutil.rmtree(self.classifier.processed_dxf_dir)
         self.classifier.processed_dxf_dir.mkdir(parents=True)
+        self._preflight_dxf()
         
         dxf_files = list(self.classifier.classified_dir.rglob("*.dxf"))
         self.log_message.emit(f"找到 {len(dxf_files)} 个DXF文件")
         
-        success_count = 0
-        processor = DXFProcessor(dxf_config=self.app_settings.dxf)
-        
-        for idx, dxf_file in enumerate(dxf_files):
-            import re
+        jobs: List[AnnotationJob] = []
+        for dxf_file in dxf_files:
             match = re.search(r'\((\d+)\)', dxf_file.name)
             quantity = int(match.group(1)) if match else 1
             
             rel_path = dxf_file.parent.relative_to(self.classifier.classified_dir)
             output_dir = self.classifier.processed_dxf_dir / rel_path
             output_dir.mkdir(parents=True, exist_ok=True)
-            
-            success, msg = processor.process_dxf_file(dxf_file, quantity, output_dir)
+            jobs.append(AnnotationJob(dxf_file, quantity, output_dir))
+        
+        dxf_config = self.app_settings.dxf
+        pool = DXFAnnotationPool(dxf_config, dxf_config.annotation_workers, dxf_config.annotation_chunk_size)
+        self.log_message.emit(f"并行处理进程: {min(pool.max_workers, len(jobs)) or 1} 个")
+        
+        success_count = 0
+        manifest = DxfManifest()
+        started = time.perf_counter()
+        # 结果按完成顺序返回
+        for idx, (_job, success, msg, geometry) in enumerate(pool.run(jobs)):
             self.log_message.emit(msg)
             
             if success:
                 success_count += 1
+            if geometry is not None:
+                manifest.add(geometry)
             
-            self.progress.emit(int((idx + 1) / len(dxf_files) * 100))
+            self.progress.emit(int((idx + 1) / len(jobs) * 100))
         
         self.log_message.emit("=" * 60)
-        self.log_message.emit(f"DXF处理完成。成功: {success_count}/{len(dxf_files)}")
+        self.log_message.emit(f"DXF处理完成。成功: {success_count}/{len(dxf_files)}, 耗时 {time.perf_counter() - started:.1f} 秒")
+        manifest_path = manifest.save(self.classifier.processed_dxf_dir)
+        entity_total = sum(geometry.entity_count for geometry in manifest.entries.values())
+        self.log_message.emit(f"几何清单: {manifest_path.name}（{len(manifest)} 个文件，{entity_total} 个实体）")
         self.finished.emit(True, f"成功处理 {success_count} 个文件")
     
     def _run_dxf_merge(self) -> None:
@@ -268,11 +544,18 @@ class WorkerThread(QThread):
         self.log_message.emit("开始按材料/厚度合并DXF文件...")
         self.log_message.emit("=" * 60)
         
+        self._preflight_dxf()
         processor = DXFProcessor(dxf_config=self.app_settings.dxf)
         source_dir = self.classifier.classified_dir
         output_dir = self.classifier.merged_dir
         
-        success_count, fail_count, logs = processor.merge_by_thickness(source_dir, output_dir)
+        # 标注阶段写出的几何清单，源文件未变化时合并不再重新计算范围
+        manifest = DxfManifest.load(self.classifier.processed_dxf_dir)
+        if manifest is not None:
+            self.log_message.emit(f"使用几何清单: {len(manifest)} 个文件")
+        
+        max_workers = resolve_worker_count(self.app_settings.dxf.merge_workers)
+        success_count, fail_count, logs = processor.merge_by_thickness(source_dir, output_dir, manifest, max_workers)
         
         for log in logs:
             self.log_message.emit(log)
@@ -284,3 +567,35 @@ class WorkerThread(QThread):
             self.finished.emit(True, f"成功合并 {success_count} 组文件")
         else:
             self.finished.emit(False, "没有成功合并任何文件")
+
+    def _run_dxf_process_and_merge(self) -> None:
+        """DXF单遍标注+合并任务：每个文件只读取一次"""
+        self.log_message.emit("开始单遍标注并按材料/厚度合并DXF文件...")
+        self.log_message.emit("=" * 60)
+        
+        if self.classifier.processed_dxf_dir.exists():
+            shutil.rmtree(self.classifier.processed_dxf_dir)
+        self.classifier.processed_dxf_dir.mkdir(parents=True)
+        self._preflight_dxf()
+        
+        processor = DXFProcessor(dxf_config=self.app_settings.dxf)
+        max_workers = resolve_worker_count(self.app_settings.dxf.merge_workers)
+        success_count, fail_count, logs, manifest = processor.process_and_merge_by_thickness(
+            self.classifier.classified_dir,
+            self.classifier.processed_dxf_dir,
+            self.classifier.merged_dir,
+            max_workers,
+        )
+        
+        for log in logs:
+            self.log_message.emit(log)
+        
+        manifest_path = manifest.save(self.classifier.processed_dxf_dir)
+        self.log_message.emit("=" * 60)
+        self.log_message.emit(f"几何清单: {manifest_path.name}（{len(manifest)} 个文件）")
+        self.log_message.emit(f"标注并合并完成。成功: {success_count} 组, 失败: {fail_count} 组")
+        
+        if success_count > 0:
+            self.finished.emit(True, f"成功标注并合并 {success_count} 组文件")
+        else:
+            self.finished.emit(False, "没有成功合并任何文件")
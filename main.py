@@ -1,4 +1,5 @@
 # main.py
+import multiprocessing
 import sys
 from PySide6.QtWidgets import QApplication
 from qt_material import apply_stylesheet
@@ -33,4 +34,6 @@ def main():
 
 
 if __name__ == '__main__':
+    # 打包后的DXF处理子进程从这里直接返回
+    multiprocessing.freeze_support()
     main()
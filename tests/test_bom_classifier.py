@@ -1,4 +1,6 @@
+import tempfile
 import unittest
+from pathlib import Path
 
 from core.bom_classifier import BOMClassifier
 
@@ -29,5 +31,32 @@ class BOMClassifierMaterialParsingTests(unittest.TestCase):
         self.assertIsNone(subfolder)
 
 
+class BOMClassifierPartLookupTests(unittest.TestCase):
+    def test_find_part_file_returns_sibling_part_with_same_stem(self):
+        classifier = BOMClassifier()
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            base = Path(temp_dir)
+            drawing = base / "P-001.SLDDRW"
+            drawing.write_bytes(b"")
+            (base / "P-001.SLDPRT").write_bytes(b"")
+
+            part = classifier.find_part_file(drawing)
+            missing = classifier.find_part_file(base / "P-002.SLDDRW")
+
+        self.assertEqual(part.name, "P-001.SLDPRT")
+        self.assertIsNone(missing)
+
+    def test_classified_dir_for_other_formats_is_a_sibling_tree(self):
+        classifier = BOMClassifier()
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            classifier.set_project_dir(temp_dir)
+
+            self.assertEqual(classifier.classified_dir_for("dxf"), classifier.classified_dir)
+            self.assertEqual(classifier.classified_dir_for("pdf").name, "1_分类结果_PDF")
+            self.assertEqual(classifier.classified_dir_for("pdf").parent, classifier.result_dir)
+
+
 if __name__ == "__main__":
     unittest.main()
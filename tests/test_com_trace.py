@@ -0,0 +1,42 @@
+import unittest
+
+from core.com_trace import ComCallTrace
+
+
+class ComCallTraceTests(unittest.TestCase):
+    def test_calls_are_aggregated_into_histogram_buckets(self):
+        trace = ComCallTrace()
+
+        for seconds in (0.0005, 0.002, 0.003, 1.5, 12.0):
+            trace.record("OpenDoc6[normal]", seconds)
+
+        stats = trace.call_summary()["OpenDoc6[normal]"]
+        self.assertEqual(stats["count"], 5)
+        self.assertEqual(stats["min_ms"], 0.5)
+        self.assertEqual(stats["max_ms"], 12000.0)
+        self.assertEqual(stats["histogram"], {"<1ms": 1, "<5ms": 2, "<5000ms": 1, ">=10000ms": 1})
+
+    def test_steps_are_timed_and_reset(self):
+        trace = ComCallTrace()
+
+        with trace.step("open"):
+            pass
+        with self.assertRaises(ValueError):
+            with trace.step("open"):
+                raise ValueError("failed")
+
+        self.assertEqual(trace.step_summary()["open"]["count"], 2)
+        trace.reset()
+        self.assertEqual(trace.step_summary(), {})
+
+    def test_disabled_trace_skips_steps(self):
+        trace = ComCallTrace(enabled=False)
+
+        with trace.step("open"):
+            pass
+
+        self.assertEqual(trace.step_summary(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from core.conversion_deps import ConversionDependencies
+
+
+class ConversionDependenciesTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        base = Path(self.temp_dir.name)
+        self.drawing = base / "P-001.SLDDRW"
+        self.part = base / "P-001.SLDPRT"
+        self.output = base / "out" / "(2)P-001.dxf"
+        self.drawing.write_bytes(b"drawing")
+        self.part.write_bytes(b"part")
+        self.output.parent.mkdir()
+        self.output.write_text("dxf", encoding="utf-8")
+        self.signature = {"export_mode": "drawing"}
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _record(self):
+        ConversionDependencies(self.signature).write(self.output, self.drawing, [self.part])
+
+    def _touch(self, path, content=None):
+        if content is not None:
+            path.write_bytes(content)
+        later = path.stat().st_mtime + 60
+        os.utime(path, (later, later))
+
+    def test_template_edits_and_open_mode_change_the_signature(self):
+        template_dir = Path(self.temp_dir.name) / "template"
+        template_dir.mkdir()
+        (template_dir / "A3.drwdot").write_bytes(b"template")
+        self.signature = {
+            "export_mode": "drawing",
+            "open_mode": "normal",
+            "template_files": ConversionDependencies.directory_signature(template_dir),
+        }
+        self._record()
+
+        self._touch(template_dir / "A3.drwdot", b"edited")
+        edited = dict(self.signature, template_files=ConversionDependencies.directory_signature(template_dir))
+        reopened = dict(self.signature, open_mode="read_only")
+
+        self.assertEqual(ConversionDependencies(self.signature).check(self.output, self.drawing, [self.part]), (True, ""))
+        self.assertEqual(ConversionDependencies(edited).check(self.output, self.drawing, [self.part]), (False, "转换设置已变更"))
+        self.assertEqual(ConversionDependencies(reopened).check(self.output, self.drawing, [self.part]), (False, "转换设置已变更"))
+
+    def test_unchanged_dependencies_are_up_to_date_without_hashing(self):
+        self._record()
+        dependencies = ConversionDependencies(self.signature)
+
+        self.assertEqual(dependencies.check(self.output, self.drawing, [self.part]), (True, ""))
+        self.assertEqual(dependencies.hashed_files, 0)
+        self.assertTrue(ConversionDependencies.sidecar_path(self.output).exists())
+
+    def test_changed_reference_makes_output_stale(self):
+        self._record()
+        self._touch(self.part, b"part v2")
+
+        up_to_date, reason = ConversionDependencies(self.signature).check(self.output, self.drawing, [self.part])
+
+        self.assertFalse(up_to_date)
+        self.assertIn("P-001.SLDPRT", reason)
+
+    def test_touched_file_with_same_content_is_still_up_to_date(self):
+        self._record()
+        self._touch(self.drawing)
+        dependencies = ConversionDependencies(self.signature)
+
+        self.assertTrue(dependencies.check(self.output, self.drawing, [self.part])[0])
+        self.assertEqual(dependencies.hashed_files, 1)
+
+    def test_missing_record_settings_change_or_new_reference_are_stale(self):
+        dependencies = ConversionDependencies(self.signature)
+        self.assertFalse(dependencies.check(self.output, self.drawing, [self.part])[0])
+
+        self._record()
+        other_settings = ConversionDependencies({"export_mode": "flat_pattern"})
+        self.assertFalse(other_settings.check(self.output, self.drawing, [self.part])[0])
+
+        assembly = self.drawing.with_suffix(".SLDASM")
+        assembly.write_bytes(b"asm")
+        self.assertFalse(dependencies.check(self.output, self.drawing, [self.part, assembly])[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from core.conversion_scheduler import (
+    MB,
+    ConversionCostModel,
+    ConversionHistory,
+    ConversionScheduler,
+)
+
+
+class ConversionSchedulerTests(unittest.TestCase):
+    def test_plan_dispatches_longest_expected_first_across_workers(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            base = Path(temp_dir)
+            sizes = {"a.SLDDRW": 1, "b.SLDDRW": 8, "c.SLDDRW": 4, "d.SLDDRW": 5}
+            for name, size_mb in sizes.items():
+                (base / name).write_bytes(b"\0" * (size_mb * MB))
+
+            scheduler = ConversionScheduler(worker_count=2)
+            queues = scheduler.plan(sorted(base.iterdir()), lambda path: path)
+
+        self.assertEqual([item.path.name for item in queues[0]], ["b.SLDDRW", "a.SLDDRW"])
+        self.assertEqual([item.path.name for item in queues[1]], ["d.SLDDRW", "c.SLDDRW"])
+        loads = [sum(item.predicted_seconds for item in queue) for queue in queues]
+        self.assertAlmostEqual(scheduler.predicted_makespan, max(loads))
+
+    def test_history_overrides_size_estimate_and_persists(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            base = Path(temp_dir)
+            drawing = base / "part.SLDDRW"
+            drawing.write_bytes(b"\0" * MB)
+            history_path = base / ConversionHistory.FILE_NAME
+
+            scheduler = ConversionScheduler(ConversionCostModel(ConversionHistory(history_path)))
+            [[item]] = scheduler.plan([drawing], lambda path: path)
+            scheduler.record_actual(item, 42.0)
+            scheduler.save_history()
+
+            model = ConversionCostModel(ConversionHistory(history_path))
+            estimate = model.estimate(drawing)
+
+        self.assertEqual(estimate, 42.0)
+        self.assertEqual(scheduler.summary()["tasks"][0]["actual_seconds"], 42.0)
+
+    def test_history_is_keyed_by_full_path(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            base = Path(temp_dir)
+            history = ConversionHistory()
+            first, second = base / "A" / "bracket.SLDDRW", base / "B" / "bracket.SLDDRW"
+            history.record(first, MB, 30.0)
+
+            self.assertEqual(history.get(first)["seconds"], 30.0)
+            self.assertIsNone(history.get(second))
+
+    def test_size_rate_excludes_fixed_overhead(self):
+        history = ConversionHistory()
+        for index, size_mb in enumerate((1, 2, 4)):
+            history.record(Path(f"/project/{index}.SLDDRW"), size_mb * MB, ConversionCostModel.BASE_SECONDS + 5.0 * size_mb)
+        model = ConversionCostModel(history)
+
+        estimate = model.estimate(Path("/project/new.SLDDRW"), 3 * MB)
+
+        self.assertAlmostEqual(estimate, ConversionCostModel.BASE_SECONDS + 15.0)
+
+    def test_sheet_count_increases_estimate(self):
+        model = ConversionCostModel()
+        path = Path("missing.SLDDRW")
+
+        self.assertGreater(model.estimate(path, MB, sheet_count=3), model.estimate(path, MB, sheet_count=1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -24,6 +24,7 @@ class CoreSettingsInjectionTests(unittest.TestCase):
                 classified_dir="classified",
                 processed_dxf_dir="processed",
                 merged_dir="merged",
+                quarantine_dir="quarantine",
             )
         )
 
@@ -35,6 +36,7 @@ class CoreSettingsInjectionTests(unittest.TestCase):
         self.assertEqual(classifier.classified_dir, base / "out" / "classified")
         self.assertEqual(classifier.processed_dxf_dir, base / "out" / "processed")
         self.assertEqual(classifier.merged_dir, base / "out" / "merged")
+        self.assertEqual(classifier.quarantine_dir, base / "out" / "quarantine")
 
     def test_sw_converter_uses_configured_template_dir_and_visibility(self):
         win32com_module = types.ModuleType("win32com")
@@ -0,0 +1,91 @@
+import struct
+import tempfile
+import unittest
+from pathlib import Path
+
+from core.drawing_metadata import DrawingMetadataReader
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def utf16_record(text):
+    encoded = text.encode("utf-16-le")
+    return struct.pack("<I", len(text)) + encoded
+
+
+class DrawingMetadataReaderTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base = Path(self.temp_dir.name)
+        self.drawing = self.base / "P-001.SLDDRW"
+        self.drawing.write_bytes(
+            b"\x00\x01garbage"
+            + utf16_record("D:\\设计\\钣金\\P-001.SLDPRT")
+            + b"\xff\xfe\x00"
+            + utf16_record("C:\\SW\\模板\\a3图纸格式.slddrt")
+            + b"\x10\x00"
+            + utf16_record("C:\\SW\\模板\\a3图纸格式.slddrt")
+            + b"\x00\x00"
+            + b"\x05C:\\work\\ASM-01.SLDASM\x00"
+            + utf16_record("D:\\设计\\钣金\\P-001.SLDPRT")
+        )
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_reads_references_sheet_size_and_sheet_count(self):
+        metadata = DrawingMetadataReader().read(self.drawing)
+
+        self.assertIsNone(metadata.error)
+        self.assertEqual(metadata.references, ["D:\\设计\\钣金\\P-001.SLDPRT", "C:\\work\\ASM-01.SLDASM"])
+        self.assertEqual(metadata.sheet_formats, ["C:\\SW\\模板\\a3图纸格式.slddrt"])
+        self.assertEqual(metadata.sheet_count, 1)
+        self.assertEqual(metadata.sheet_size, "A3")
+        self.assertFalse(metadata.is_ole)
+
+    def test_reads_ole_streams(self):
+        # 三个流的扇区交错存放，a3图纸格式路径跨越 Contents 流的扇区边界，
+        # 只有按流读取才能得到完整路径；a3路径保存了两次，另有一个a4格式；
+        # PreviewPNG 流中的路径不读取
+        drawing = FIXTURES / "ole_drawing.SLDDRW"
+
+        metadata = DrawingMetadataReader().read(drawing)
+
+        self.assertIsNone(metadata.error)
+        self.assertTrue(metadata.is_ole)
+        self.assertEqual(metadata.references, ["D:\\设计\\钣金\\P-002.SLDPRT"])
+        self.assertEqual(metadata.sheet_formats, ["C:\\SW\\模板\\a3图纸格式.slddrt", "C:\\SW\\模板\\a4图纸格式.slddrt"])
+        self.assertEqual(metadata.sheet_count, 2)
+        self.assertEqual(metadata.sheet_size, "A3")
+        raw_formats = DrawingMetadataReader._find_paths(drawing.read_bytes(), ".slddrt")
+        # 直接扫描文件字节时跨扇区的路径被截断
+        self.assertIn("\\a3图纸格式.slddrt", raw_formats)
+        self.assertIn("C:\\SW\\模板\\a0预览格式.slddrt", raw_formats)
+
+    def test_references_fall_back_to_drawing_folder(self):
+        part = self.base / "P-001.SLDPRT"
+        part.write_bytes(b"part")
+
+        metadata = DrawingMetadataReader().read(self.drawing)
+
+        self.assertEqual(metadata.resolve_references(), [part])
+
+    def test_read_many_reports_unreadable_files_without_failing(self):
+        missing = self.base / "missing.SLDDRW"
+
+        results = DrawingMetadataReader(max_workers=2).read_many([self.drawing, missing, self.drawing])
+
+        self.assertEqual(list(results), [self.drawing, missing])
+        self.assertIsNone(results[self.drawing].error)
+        self.assertIsNotNone(results[missing].error)
+        self.assertEqual(results[missing].sheet_count, 1)
+
+    def test_sheet_size_from_format_names(self):
+        sheet_size_of = DrawingMetadataReader.sheet_size_of
+
+        self.assertEqual(sheet_size_of(["C:\\formats\\A4 - landscape.slddrt"]), "A4")
+        self.assertEqual(sheet_size_of(["C:\\a3\\custom.slddrt"]), None)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import math
+import unittest
+
+import ezdxf
+from ezdxf.bbox import extents
+from ezdxf.math import BoundingBox
+
+from core.dxf_bbox import fast_extents
+
+
+def dense_extents(entities):
+    """圆弧按极小弦高展开后的范围，作为精确参考值"""
+    bbox = BoundingBox()
+    for entity in entities:
+        if entity.dxftype() == "LWPOLYLINE":
+            parts = list(entity.virtual_entities())
+        else:
+            parts = [entity]
+        for part in parts:
+            if part.dxftype() in ("ARC", "CIRCLE"):
+                bbox.extend(part.flattening(1e-7))
+            else:
+                bbox.extend([part.dxf.start, part.dxf.end])
+    return bbox
+
+
+class FastExtentsTests(unittest.TestCase):
+    def setUp(self):
+        self.doc = ezdxf.new()
+        self.msp = self.doc.modelspace()
+
+    def assertBoxAlmostEqual(self, actual, expected, places=6):
+        for a, b in zip((*actual.extmin, *actual.extmax), (*expected.extmin, *expected.extmax)):
+            self.assertAlmostEqual(a, b, places=places)
+
+    def test_arcs_and_bulges_are_exact(self):
+        entities = [
+            self.msp.add_line((0, 0), (200, 0)),
+            self.msp.add_arc((200, 50), 50, -90, 90),
+            self.msp.add_arc((10, 20), 15, 300, 30),
+            self.msp.add_arc((-20, 40), 10, 0, 180, dxfattribs={"extrusion": (0, 0, -1)}),
+            self.msp.add_circle((100, 50), 20),
+            self.msp.add_lwpolyline(
+                [(0, 100, 0, 0, 1), (200, 100, 0, 0, -0.4), (220, 140, 0, 0, 0)],
+                format="xyseb",
+                close=True,
+            ),
+        ]
+
+        self.assertBoxAlmostEqual(fast_extents(entities), dense_extents(entities))
+
+    def test_mirrored_polyline_uses_wcs(self):
+        polyline = self.msp.add_lwpolyline(
+            [(10, 0, 0, 0, 0.5), (30, 0)],
+            format="xyseb",
+            dxfattribs={"extrusion": (0, 0, -1), "elevation": 2.0},
+        )
+
+        bbox = fast_extents([polyline])
+
+        self.assertBoxAlmostEqual(bbox, dense_extents([polyline]))
+        self.assertAlmostEqual(bbox.extmin.x, -30)
+        self.assertAlmostEqual(bbox.extmin.z, -2.0)
+
+    def test_spline_uses_control_hull(self):
+        control_points = [(0, 0), (10, 10), (20, -10), (30, 0)]
+        spline = self.msp.add_open_spline(control_points)
+        hull = BoundingBox(control_points)
+
+        bbox = fast_extents([spline])
+
+        self.assertBoxAlmostEqual(bbox, hull)
+        exact = extents([spline])
+        self.assertTrue(bbox.inside(exact.extmin) and bbox.inside(exact.extmax))
+
+    def test_other_entities_fall_back_to_ezdxf(self):
+        entities = [
+            self.msp.add_text("零件", dxfattribs={"height": 5}).set_placement((500, 500)),
+            self.msp.add_arc((0, 0), 10, 0, 90, dxfattribs={"extrusion": (0, 1, 0)}),
+            self.msp.add_line((0, 0), (1, 1)),
+        ]
+
+        bbox = fast_extents(entities)
+        expected = extents(entities)
+
+        self.assertAlmostEqual(bbox.extmax.x, expected.extmax.x, places=3)
+        self.assertAlmostEqual(bbox.extmax.y, expected.extmax.y, places=3)
+        self.assertAlmostEqual(bbox.extmin.z, expected.extmin.z, places=3)
+
+    def test_empty_input_has_no_data(self):
+        self.assertFalse(fast_extents([]).has_data)
+        self.assertFalse(fast_extents([self.msp.add_lwpolyline([])]).has_data)
+
+    def test_full_circle_arc(self):
+        arc = self.msp.add_arc((0, 0), 5, 45, 45 + 360)
+
+        bbox = fast_extents([arc])
+
+        self.assertAlmostEqual(bbox.extmax.x, 5)
+        self.assertAlmostEqual(bbox.extmin.y, -5)
+        self.assertTrue(math.isclose(bbox.size.x, 10))
+
+
+if __name__ == "__main__":
+    unittest.main()
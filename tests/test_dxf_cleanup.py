@@ -0,0 +1,229 @@
+import random
+import tempfile
+import unittest
+from pathlib import Path
+
+import ezdxf
+
+from config.settings import DxfConfig
+from core.dxf_cleanup import DxfCleaner, find_duplicates
+from core.dxf_processor import DXFProcessor
+
+
+def line_set(entities):
+    return sorted(
+        tuple(sorted((tuple(round(v, 6) for v in entity.dxf.start), tuple(round(v, 6) for v in entity.dxf.end))))
+        for entity in entities
+        if entity.dxftype() == "LINE"
+    )
+
+
+class DxfCleanerTests(unittest.TestCase):
+    def setUp(self):
+        self.doc = ezdxf.new()
+        self.msp = self.doc.modelspace()
+
+    def test_duplicates_overlaps_and_collinear_chains_are_joined(self):
+        msp = self.msp
+        # 一条边被拆成10段，其中一段反向
+        for index in range(10):
+            start, end = (index * 10, 0), (index * 10 + 10, 0)
+            msp.add_line(*(reversed((start, end)) if index == 3 else (start, end)))
+        msp.add_line((20, 0.0004), (30, 0.0004))  # 容差内的近似重复
+        msp.add_line((0, 50), (40, 50))
+        msp.add_line((10, 50), (20, 50))  # 被完全覆盖
+        msp.add_line((40.0005, 50), (60, 50))  # 间隙在容差内
+        msp.add_line((5, 5), (5, 5))  # 零长度
+        msp.add_line((0, 80), (10, 80), dxfattribs={"layer": "折弯线"})
+        msp.add_line((10, 80), (20, 80))  # 图层不同，不合并
+
+        kept, stats = DxfCleaner().clean(list(msp))
+
+        self.assertEqual(line_set(kept), [
+            ((0, 0, 0), (100, 0, 0)),
+            ((0, 50, 0), (60, 50, 0)),
+            ((0, 80, 0), (10, 80, 0)),
+            ((10, 80, 0), (20, 80, 0)),
+        ])
+        self.assertEqual((stats.before, stats.after), (17, 4))
+        self.assertEqual(stats.degenerate, 1)
+        self.assertEqual(stats.duplicates, 2)
+        self.assertEqual(stats.joined, 10)
+        self.assertEqual(stats.summary(), "实体 17 → 4（重复 2，零长度 1，共线合并 10）")
+
+    def test_parallel_lines_and_gaps_are_kept(self):
+        self.msp.add_line((0, 0), (10, 0))
+        self.msp.add_line((0, 0.01), (10, 0.01))
+        self.msp.add_line((10.01, 0), (20, 0))
+        self.msp.add_line((0, 0), (10, 10))
+
+        kept, stats = DxfCleaner().clean(list(self.msp))
+
+        self.assertEqual(len(kept), 4)
+        self.assertEqual(stats.summary(), "实体 4 → 4")
+
+    def test_collinear_lines_near_zero_and_pi_directions(self):
+        # 方向角分别在 0 和 π 附近，哈希格首尾相接时仍能找到
+        self.msp.add_line((0, 3), (1000, 3.0000001))
+        self.msp.add_line((2000, 3.0000002), (1000, 3.0000001))
+
+        kept, _stats = DxfCleaner().clean(list(self.msp))
+
+        self.assertEqual(len(kept), 1)
+        self.assertAlmostEqual(kept[0].dxf.start.distance(kept[0].dxf.end), 2000, places=4)
+
+    def test_nearly_collinear_lines_far_from_origin(self):
+        # 夹角约2e-4，到范围中心约1.4万：两条直线到中心的距离相差约2.5，超出相邻格
+        self.msp.add_line((0, 0), (0, 1))
+        self.msp.add_line((20000, 20000), (20100, 20000))
+        self.msp.add_line((20100, 19999.9991), (20110, 20000.0009))
+        short = self.msp.add_line((20050.3, 20000.0009), (20050.4, 19999.9991))  # 被覆盖的短线段，夹角约0.018
+
+        kept, stats = DxfCleaner().clean(list(self.msp))
+
+        self.assertEqual(len(kept), 2)
+        self.assertNotIn(short, kept)
+        self.assertEqual((stats.joined, stats.duplicates), (1, 1))
+        self.assertAlmostEqual(kept[1].dxf.start.distance(kept[1].dxf.end), 110, places=3)
+
+    def test_closed_polyline_collinear_vertices_around_the_seam(self):
+        starts_mid_edge = self.msp.add_lwpolyline([(5, 0), (10, 0), (10, 10), (0, 10), (0, 0)], close=True)
+        ends_mid_edge = self.msp.add_lwpolyline([(0, 0), (10, 0), (10, 10), (0, 10), (0, 5)], close=True)
+        open_polyline = self.msp.add_lwpolyline([(5, 0), (10, 0), (10, 10), (0, 10), (0, 0)])
+
+        _kept, stats = DxfCleaner().clean(list(self.msp))
+
+        self.assertEqual(starts_mid_edge.get_points("xy"), [(10, 0), (10, 10), (0, 10), (0, 0)])
+        self.assertEqual(ends_mid_edge.get_points("xy"), [(0, 0), (10, 0), (10, 10), (0, 10)])
+        self.assertEqual(len(open_polyline), 5)
+        self.assertEqual(stats.vertices, 2)
+
+    def test_circles_arcs_and_polylines(self):
+        msp = self.msp
+        msp.add_circle((10, 10), 5)
+        msp.add_circle((10.0002, 10), 5.0001)
+        msp.add_circle((30, 10), 0.0001)
+        msp.add_arc((0, 0), 20, 0, 90)
+        msp.add_arc((0, 0), 20, 360, 90.00001)
+        msp.add_arc((0, 0), 20, 0, 45)
+        polyline = msp.add_lwpolyline(
+            [(0, 0, 0, 0, 0), (10, 0, 0, 0, 0), (10, 0, 0, 0, 0), (20, 0, 0, 0, 0.5), (30, 10, 0, 0, 0), (40, 20, 0, 0, 0), (50, 30, 0, 0, 0)],
+            format="xyseb",
+        )
+        msp.add_lwpolyline([(5, 5), (5.0001, 5)])
+
+        kept, stats = DxfCleaner().clean(list(msp))
+
+        self.assertEqual([entity.dxftype() for entity in kept], ["CIRCLE", "ARC", "ARC", "LWPOLYLINE"])
+        self.assertEqual(polyline.get_points("xyb"), [(0, 0, 0), (20, 0, 0.5), (30, 10, 0), (50, 30, 0)])
+        self.assertEqual((stats.duplicates, stats.degenerate, stats.vertices), (2, 2, 3))
+
+
+class FindDuplicatesTests(unittest.TestCase):
+    def test_coincident_lines_arcs_and_circles(self):
+        msp = ezdxf.new().modelspace()
+        msp.add_line((0, 0), (100, 0))
+        msp.add_line((100, 0.0003), (0, 0))  # 反向且在容差内
+        msp.add_line((0, 0), (100, 0), dxfattribs={"layer": "折弯线"})  # 图层不同，保留
+        msp.add_line((0, 0), (100, 0.01))
+        msp.add_arc((0, 0), 20, 0, 90)
+        msp.add_arc((0, 0), 20, 360, 90)
+        msp.add_arc((0, 0), 20, 0, 45)
+        msp.add_circle((10, 10), 5)
+        msp.add_circle((10.0002, 10), 5)
+        msp.add_circle((10, 10), 6)
+
+        self.assertEqual(find_duplicates(list(msp)), [1, 5, 8])
+
+    def test_near_duplicates_across_grid_cells(self):
+        msp = ezdxf.new().modelspace()
+        # 坐标恰好跨过量化格边界
+        msp.add_line((0.0099996, 0), (50, 50))
+        msp.add_line((0.0100004, 0), (50, 50))
+
+        self.assertEqual(find_duplicates(list(msp), tolerance=0.01), [1])
+
+    def test_near_duplicates_split_by_cell_edges_in_every_column(self):
+        msp = ezdxf.new().modelspace()
+        # x 和 y 分别跨过不同的格边界
+        msp.add_line((0.0019, 0.0009), (10.0019, 0.0009))
+        msp.add_line((0.0021, 0.0011), (10.0021, 0.0011))
+        msp.add_circle((0.0159, 0.0161), 5)
+        msp.add_circle((0.0161, 0.0159), 5.0009)
+
+        self.assertEqual(find_duplicates(list(msp), tolerance=1e-3), [1, 3])
+
+    def test_removed_entities_stay_within_tolerance_of_a_kept_one(self):
+        # 间距略小于容差的一串平行线：重复只能相对保留的实体判断，不能首尾串联
+        generator = random.Random(3)
+        msp = ezdxf.new().modelspace()
+        for _index in range(400):
+            y = generator.uniform(0, 0.02)
+            msp.add_line((0, y), (100, y))
+        entities = list(msp)
+
+        removed = set(find_duplicates(entities, tolerance=0.001))
+
+        kept_y = [entity.dxf.start.y for index, entity in enumerate(entities) if index not in removed]
+        self.assertTrue(removed)
+        for index in removed:
+            y = entities[index].dxf.start.y
+            self.assertLessEqual(min(abs(y - other) for other in kept_y), 0.001)
+
+
+class DXFProcessorCleanupTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base = Path(self.temp_dir.name)
+        self.source_dir = self.base / "classified"
+        self.group_dir = self.source_dir / "不锈钢板" / "T=2.0"
+        self.output_dir = self.base / "merged"
+        self.group_dir.mkdir(parents=True)
+        self.output_dir.mkdir()
+        doc = ezdxf.new()
+        msp = doc.modelspace()
+        for index in range(20):
+            msp.add_line((index * 5, 0), (index * 5 + 5, 0))
+            msp.add_line((index * 5, 0), (index * 5 + 5, 0))
+        msp.add_line((0, 0), (0, 40))
+        doc.saveas(self.group_dir / "a.dxf")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_merge_reports_counts_and_imports_cleaned_geometry(self):
+        processor = DXFProcessor(dxf_config=DxfConfig(merge_cleanup=True))
+
+        success, fail, logs = processor.merge_by_thickness(self.source_dir, self.output_dir)
+
+        self.assertEqual((success, fail), (1, 0))
+        self.assertIn("  🧹 a.dxf: 实体 41 → 2（重复 20，共线合并 19）", logs)
+        merged = ezdxf.readfile(self.output_dir / "不锈钢板_T=2.0_merged.dxf")
+        block = merged.blocks.get("block_a_0")
+        self.assertEqual(line_set(block), [((0, 0, 0), (0, 40, 0)), ((0, 0, 0), (100, 0, 0))])
+
+    def test_cleanup_is_off_by_default(self):
+        _success, _fail, logs = DXFProcessor().merge_by_thickness(self.source_dir, self.output_dir)
+
+        self.assertFalse(any("🧹" in line for line in logs))
+        merged = ezdxf.readfile(self.output_dir / "不锈钢板_T=2.0_merged.dxf")
+        self.assertEqual(len(merged.blocks.get("block_a_0")), 41)
+
+    def test_duplicate_removal_applies_to_annotation_and_merge(self):
+        processor = DXFProcessor(dxf_config=DxfConfig(remove_duplicates=True))
+        processed_dir = self.base / "processed"
+        processed_dir.mkdir()
+
+        _success, _fail, logs = processor.merge_by_thickness(self.source_dir, self.output_dir)
+        annotated, message, _geometry = processor.annotate_file(self.group_dir / "a.dxf", processed_dir)
+
+        self.assertIn("  ♻ a.dxf: 删除重复实体 20 个", logs)
+        merged = ezdxf.readfile(self.output_dir / "不锈钢板_T=2.0_merged.dxf")
+        self.assertEqual(len(merged.blocks.get("block_a_0")), 21)
+        self.assertTrue(annotated, message)
+        self.assertIn("删除重复实体 20 个", message)
+        self.assertEqual(len(ezdxf.readfile(processed_dir / "processed_a.dxf").modelspace().query("LINE")), 21)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import random
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import ezdxf
+from ezdxf.bbox import extents
+
+from config.settings import DxfConfig
+from core.dxf_layout import ShelfPacker
+from core.dxf_processor import DXFProcessor
+
+
+def rectangles(sizes, positions):
+    return [(x, y, x + width, y + height) for (width, height), (x, y) in zip(sizes, positions)]
+
+
+def overlapping(rects, spacing):
+    ordered = sorted(rects)
+    for index, (x0, y0, x1, y1) in enumerate(ordered):
+        for other in ordered[index + 1:]:
+            if other[0] >= x1 + spacing - 1e-9:
+                break
+            if other[1] < y1 + spacing - 1e-9 and y0 < other[3] + spacing - 1e-9:
+                return True
+    return False
+
+
+class ShelfPackerTests(unittest.TestCase):
+    def setUp(self):
+        generator = random.Random(7)
+        self.sizes = [(generator.uniform(20, 800), generator.uniform(20, 400)) for _index in range(3000)]
+
+    def test_fixed_width_packing_has_no_overlaps(self):
+        packer = ShelfPacker(sheet_width=3000, spacing=10)
+
+        positions = packer.pack(self.sizes)
+
+        rects = rectangles(self.sizes, positions)
+        self.assertLessEqual(max(rect[2] for rect in rects), 3000)
+        self.assertFalse(overlapping(rects, 10))
+
+    def test_auto_width_is_near_square_and_fast(self):
+        started = time.perf_counter()
+        positions = ShelfPacker(spacing=10).pack(self.sizes)
+        elapsed = time.perf_counter() - started
+
+        rects = rectangles(self.sizes, positions)
+        width = max(rect[2] for rect in rects)
+        height = max(rect[3] for rect in rects)
+        self.assertFalse(overlapping(rects, 10))
+        self.assertLess(max(width, height) / min(width, height), 1.5)
+        used = sum(w * h for w, h in self.sizes)
+        self.assertGreater(used / (width * height), 0.6)
+        self.assertLess(elapsed, 0.5)
+
+    def test_oversized_part_gets_own_shelf(self):
+        positions = ShelfPacker(sheet_width=100, spacing=5).pack([(50, 10), (300, 20), (40, 10)])
+
+        self.assertEqual(positions, [(0.0, 25.0), (0.0, 0.0), (55.0, 25.0)])
+
+
+class DXFProcessorPackLayoutTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base = Path(self.temp_dir.name)
+        self.source_dir = self.base / "classified"
+        self.source_dir.mkdir()
+        for index in range(12):
+            doc = ezdxf.new()
+            msp = doc.modelspace()
+            # 零件不在原点附近，排样时按范围左下角对齐
+            msp.add_lwpolyline([(500, 300), (700 + index * 20, 300), (700 + index * 20, 400), (500, 400)], close=True)
+            doc.saveas(self.source_dir / f"p{index:02d}.dxf")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _merge(self, **config):
+        output = self.base / "merged.dxf"
+        success, msg = DXFProcessor(dxf_config=DxfConfig(merge_dedup_blocks=False, **config)).merge_directory_to_dxf(
+            self.source_dir, output
+        )
+        self.assertTrue(success, msg)
+        return ezdxf.readfile(output).modelspace()
+
+    def _part_boxes(self, msp):
+        boxes = []
+        for insert in msp.query("INSERT"):
+            bbox = extents(insert.virtual_entities())
+            boxes.append((bbox.extmin.x, bbox.extmin.y, bbox.extmax.x, bbox.extmax.y))
+        return boxes
+
+    def test_pack_layout_is_compact_and_keeps_labels_above_parts(self):
+        strip = self._part_boxes(self._merge())
+        packed_msp = self._merge(merge_layout="pack", text_height=10, spacing=20)
+        packed = self._part_boxes(packed_msp)
+
+        self.assertEqual(len(packed), 12)
+        self.assertFalse(overlapping(packed, 20))
+        packed_width = max(box[2] for box in packed) - min(box[0] for box in packed)
+        packed_height = max(box[3] for box in packed) - min(box[1] for box in packed)
+        self.assertLess(packed_width, (max(box[2] for box in strip) - min(box[0] for box in strip)) / 3)
+        self.assertLess(max(packed_width, packed_height) / min(packed_width, packed_height), 2.0)
+        self.assertEqual(min(box[0] for box in packed), 0)
+        labels = {text.dxf.text: text.dxf.insert for text in packed_msp.query("TEXT")}
+        for box, insert in zip(packed, packed_msp.query("INSERT")):
+            label = labels[insert.dxf.name.split("_")[1]]
+            self.assertEqual((label.x, label.y), (box[0], box[3] + 10))
+
+    def test_sheet_width_limits_packed_width(self):
+        packed = self._part_boxes(self._merge(merge_layout="pack", merge_sheet_width=1000, text_height=10))
+
+        self.assertLessEqual(max(box[2] for box in packed), 1000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import ezdxf
+
+from config.settings import DxfConfig
+from core.dxf_manifest import DxfGeometry, DxfManifest
+from core.dxf_processor import DXFProcessor
+
+
+class DxfManifestTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base = Path(self.temp_dir.name)
+        self.source_dir = self.base / "classified"
+        self.output_dir = self.base / "processed"
+        self.source_dir.mkdir()
+        self.output_dir.mkdir()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _flat_pattern(self, name="part-01.dxf"):
+        doc = ezdxf.new()
+        msp = doc.modelspace()
+        msp.add_line((0, 0), (200, 0))
+        msp.add_arc((200, 50), 50, -90, 90)
+        msp.add_circle((100, 50), 20, dxfattribs={"layer": "细实线层"})
+        msp.add_line((0, 0), (400, 300), dxfattribs={"layer": "折弯线"})
+        path = self.source_dir / name
+        doc.saveas(path)
+        return path
+
+    def test_stream_and_document_modes_record_same_geometry(self):
+        source = self._flat_pattern()
+        records = {}
+        for mode in ("dom", "stream"):
+            processor = DXFProcessor(dxf_config=DxfConfig(annotation_mode=mode))
+            success, _msg, geometry = processor.annotate_file(source, self.output_dir)
+            self.assertTrue(success)
+            records[mode] = geometry
+
+        for geometry in records.values():
+            self.assertEqual(geometry.layers, {"0": 2, "细实线层": 1, "折弯线": 1})
+            for actual, expected in zip(geometry.extents, [0, 0, 400, 300]):
+                self.assertAlmostEqual(actual, expected)
+            for actual, expected in zip(geometry.layer_0_extents, [0, 0, 250, 100]):
+                self.assertAlmostEqual(actual, expected)
+            self.assertEqual(geometry.label["text"], "part-01")
+            self.assertAlmostEqual(geometry.label["height"], 10.0)
+            self.assertEqual(geometry.output, str(self.output_dir / "processed_part-01.dxf"))
+        self.assertEqual(records["dom"].sha256, records["stream"].sha256)
+
+    def test_stream_extents_unknown_when_other_layer_has_unsupported_entity(self):
+        source = self._flat_pattern()
+        doc = ezdxf.readfile(source)
+        doc.modelspace().add_text("注释", dxfattribs={"layer": "标注"})
+        doc.saveas(source)
+
+        processor = DXFProcessor(dxf_config=DxfConfig(annotation_mode="stream"))
+        success, _msg, geometry = processor.annotate_file(source, self.output_dir)
+
+        self.assertTrue(success)
+        self.assertIsNone(geometry.extents)
+        self.assertEqual(geometry.layers["标注"], 1)
+
+    def test_round_trip_and_invalidation(self):
+        source = self._flat_pattern()
+        _success, _msg, geometry = DXFProcessor().annotate_file(source, self.output_dir)
+        DxfManifest([geometry]).save(self.output_dir)
+
+        manifest = DxfManifest.load(self.output_dir)
+        self.assertEqual(manifest.lookup(source), geometry)
+
+        source.write_bytes(source.read_bytes() + b"\n")
+        self.assertIsNone(manifest.lookup(source))
+        (self.output_dir / DxfManifest.FILE_NAME).write_text("{}", encoding="utf-8")
+        self.assertIsNone(DxfManifest.load(self.output_dir))
+
+    def test_merge_uses_recorded_extents(self):
+        first = self._flat_pattern("a.dxf")
+        self._flat_pattern("b.dxf")
+        stat = first.stat()
+        # 故意记录与实际不同的宽度，验证合并不再重新计算
+        recorded = DxfGeometry(str(first), stat.st_size, stat.st_mtime, "", extents=[0, 0, 1000, 300])
+        output = self.base / "merged.dxf"
+
+        success, _msg = DXFProcessor().merge_directory_to_dxf(self.source_dir, output, DxfManifest([recorded]))
+
+        self.assertTrue(success)
+        inserts = ezdxf.readfile(output).modelspace().query("INSERT")
+        offsets = sorted(insert.dxf.insert.x for insert in inserts)
+        self.assertEqual(offsets, [0, 1000 + DxfConfig().spacing])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import ezdxf
+
+from config.settings import DxfConfig
+from core.dxf_parallel import (
+    AnnotationJob,
+    DXFAnnotationPool,
+    DXFMergePool,
+    resolve_memory_budget,
+    resolve_worker_count,
+)
+from core.dxf_processor import DXFProcessor
+
+
+def write_part(path, width):
+    doc = ezdxf.new()
+    doc.modelspace().add_line((0, 0), (width, 10), dxfattribs={"layer": "0"})
+    doc.saveas(path)
+
+
+class DXFAnnotationPoolTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        base = Path(self.temp_dir.name)
+        self.output_dir = base / "processed"
+        self.output_dir.mkdir()
+        self.jobs = []
+        for index in range(5):
+            source = base / f"(2)part-{index}.dxf"
+            write_part(source, 100 + index)
+            self.jobs.append(AnnotationJob(source, 2, self.output_dir))
+        broken = base / "broken.dxf"
+        broken.write_text("not a dxf", encoding="utf-8")
+        self.jobs.append(AnnotationJob(broken, 1, self.output_dir))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _assert_results(self, results):
+        self.assertEqual(sorted(job.source.name for job, _success, _msg, _geometry in results), sorted(job.source.name for job in self.jobs))
+        failed = [job.source.name for job, success, _msg, _geometry in results if not success]
+        self.assertEqual(failed, ["broken.dxf"])
+        processed = ezdxf.readfile(self.output_dir / "processed_(2)part-0.dxf")
+        texts = [entity.dxf.text for entity in processed.modelspace().query("TEXT")]
+        self.assertEqual(texts, ["(2)part-0"])
+
+    def test_process_pool_annotates_every_file_in_chunks(self):
+        pool = DXFAnnotationPool(DxfConfig(), max_workers=2, chunk_size=2)
+
+        self._assert_results(list(pool.run(self.jobs)))
+
+    def test_single_worker_runs_in_process(self):
+        pool = DXFAnnotationPool(DxfConfig(), max_workers=1)
+
+        self._assert_results(list(pool.run(self.jobs)))
+
+    def test_zero_workers_means_all_cores(self):
+        self.assertGreaterEqual(resolve_worker_count(0), 1)
+        self.assertEqual(resolve_worker_count(3), 3)
+
+
+class DXFMergePoolTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        base = Path(self.temp_dir.name)
+        self.source_dir = base / "classified"
+        self.output_dir = base / "merged"
+        self.output_dir.mkdir()
+        for material, thickness, count in (("不锈钢板", "T=2.0", 3), ("铝板", "T=1.0", 1), ("铝板", "T=3.0", 2)):
+            group_dir = self.source_dir / material / thickness
+            group_dir.mkdir(parents=True)
+            for index in range(count):
+                write_part(group_dir / f"part-{index}.dxf", 50 + index)
+        (self.source_dir / "铝板" / "T=9.0").mkdir()  # 空组合并失败
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_parallel_results_keep_group_order(self):
+        groups = DXFProcessor.collect_merge_groups(self.source_dir, self.output_dir)
+
+        results = DXFMergePool(DxfConfig(), max_workers=2, memory_budget_mb=1).run(groups)
+
+        self.assertEqual([group.label for group, *_rest in results], [group.label for group in groups])
+        self.assertEqual([success for _group, success, _msg, _elapsed, _annotations, _notes in results], [True, True, True, False])
+        self.assertTrue((self.output_dir / "铝板_T=3.0_merged.dxf").exists())
+
+    def test_merge_by_thickness_logs_match_serial_order(self):
+        processor = DXFProcessor()
+
+        serial = processor.merge_by_thickness(self.source_dir, self.output_dir)
+        parallel = processor.merge_by_thickness(self.source_dir, self.output_dir, max_workers=3)
+
+        self.assertEqual(serial[:2], (3, 1))
+        self.assertEqual(parallel[:2], (3, 1))
+        group_lines = [line for line in parallel[2] if line.startswith("📦")]
+        self.assertEqual(group_lines, [line for line in serial[2] if line.startswith("📦")])
+        self.assertEqual(group_lines[0], "📦 正在合并组: 不锈钢板 - T=2.0")
+        self.assertTrue(any(line.startswith("⏱ 合并耗时") and "3 个进程" in line for line in parallel[2]))
+
+    def test_memory_budget(self):
+        self.assertEqual(resolve_memory_budget(512), 512 * 1024 * 1024)
+        budget = resolve_memory_budget(0)
+        self.assertTrue(budget is None or budget > 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
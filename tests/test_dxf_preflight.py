@@ -0,0 +1,82 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import ezdxf
+
+from core.dxf_preflight import REASON_SUFFIX, preflight_directory, preflight_file
+
+
+class DxfPreflightTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base = Path(self.temp_dir.name)
+        self.source_dir = self.base / "classified"
+        self.quarantine_dir = self.base / "quarantine"
+        (self.source_dir / "不锈钢板" / "T=2.0").mkdir(parents=True)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _write(self, name, fmt="asc", entities=2):
+        doc = ezdxf.new("R2010")
+        for index in range(entities):
+            doc.modelspace().add_line((0, index), (100, index))
+        path = self.source_dir / "不锈钢板" / "T=2.0" / name
+        doc.saveas(path, fmt=fmt)
+        return path
+
+    def _rewrite(self, path, old, new):
+        path.write_bytes(path.read_bytes().replace(old, new, 1))
+
+    def test_valid_ascii_and_binary_files_pass(self):
+        ascii_result = preflight_file(self._write("a.dxf", entities=3))
+        binary_result = preflight_file(self._write("b.dxf", fmt="bin"))
+
+        self.assertTrue(ascii_result.ok, ascii_result.reason)
+        self.assertEqual(ascii_result.version, "AC1024")
+        self.assertEqual(ascii_result.entity_count, 3)
+        self.assertTrue(binary_result.ok)
+        self.assertTrue(binary_result.binary)
+
+    def test_structural_errors_are_reported(self):
+        truncated = self._write("truncated.dxf")
+        truncated.write_bytes(truncated.read_bytes()[: truncated.stat().st_size // 2])
+        empty = self._write("empty.dxf")
+        empty.write_bytes(b"")
+        no_entities = self._write("no-entities.dxf", entities=0)
+        bad_code = self._write("bad-code.dxf")
+        self._rewrite(bad_code, b"\n  0\nLINE\n", b"\n  x\nLINE\n")
+        bad_version = self._write("bad-version.dxf")
+        self._rewrite(bad_version, b"AC1024", b"AC9999")
+        binary = self._write("binary.dxf", fmt="bin")
+        binary.write_bytes(binary.read_bytes()[:-10])
+
+        reasons = {path.name: preflight_file(path).reason for path in (truncated, empty, no_entities, bad_code, bad_version, binary)}
+
+        self.assertIn("截断", reasons["truncated.dxf"])
+        self.assertEqual(reasons["empty.dxf"], "文件为空")
+        self.assertEqual(reasons["no-entities.dxf"], "ENTITIES段中没有实体")
+        self.assertIn("组码无效", reasons["bad-code.dxf"])
+        self.assertEqual(reasons["bad-version.dxf"], "未知的DXF版本: AC9999")
+        self.assertIn("截断", reasons["binary.dxf"])
+
+    def test_directory_scan_moves_bad_files_to_quarantine(self):
+        good = self._write("good.dxf")
+        bad = self._write("bad.dxf")
+        bad.write_bytes(bad.read_bytes()[:200])
+
+        results = preflight_directory(self.source_dir, self.quarantine_dir)
+
+        self.assertEqual([result.ok for result in results], [False, True])
+        self.assertTrue(good.exists())
+        self.assertFalse(bad.exists())
+        target = self.quarantine_dir / "不锈钢板" / "T=2.0" / "bad.dxf"
+        self.assertEqual(results[0].quarantined_to, target)
+        self.assertTrue(target.exists())
+        reason = target.with_name(target.name + REASON_SUFFIX).read_text(encoding="utf-8")
+        self.assertIn(results[0].reason, reason)
+
+
+if __name__ == "__main__":
+    unittest.main()
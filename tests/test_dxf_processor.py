@@ -1,15 +1,24 @@
+import shutil
 import tempfile
 import unittest
 from pathlib import Path
+from unittest import mock
 
+import ezdxf
+
+from config.settings import DxfConfig
+from core.dxf_manifest import DxfManifest
+from core import dxf_processor
+from core.dxf_dedup import geometry_signature
 from core.dxf_processor import DXFProcessor
 
 
 class RecordingDXFProcessor(DXFProcessor):
     def __init__(self):
+        super().__init__()
         self.calls = []
 
-    def merge_directory_to_dxf(self, input_dir: Path, output_file: Path):
+    def merge_directory_to_dxf(self, input_dir: Path, output_file: Path, manifest=None):
         self.calls.append((input_dir.name, output_file.name))
         return True, f"merged {input_dir.name}"
 
@@ -41,5 +50,363 @@ class DXFProcessorMergeGroupingTests(unittest.TestCase):
         )
 
 
+class DXFProcessorLayerFilterTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base = Path(self.temp_dir.name)
+        self.source_dir = self.base / "classified"
+        self.source_dir.mkdir()
+        for name in ("a.dxf", "b.dxf"):
+            doc = ezdxf.new()
+            doc.layers.add("细实线层")
+            doc.layers.add("隐藏线")
+            msp = doc.modelspace()
+            msp.add_line((0, 0), (100, 50))
+            msp.add_circle((50, 25), 10, dxfattribs={"layer": "细实线层"})
+            msp.add_line((0, 0), (900, 0), dxfattribs={"layer": "隐藏线"})
+            doc.saveas(self.source_dir / name)
+        self.output = self.base / "merged.dxf"
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _block_layers(self, doc):
+        return sorted(
+            {e.dxf.layer for block in doc.blocks if block.name.startswith("block_") for e in block}
+        )
+
+    def test_default_imports_every_layer_and_hides_others(self):
+        processor = DXFProcessor()
+
+        success, _msg = processor.merge_directory_to_dxf(self.source_dir, self.output)
+
+        self.assertTrue(success)
+        doc = ezdxf.readfile(self.output)
+        self.assertEqual(self._block_layers(doc), ["0", "细实线层", "隐藏线"])
+        self.assertTrue(doc.layers.get("隐藏线").is_off())
+        offsets = sorted(insert.dxf.insert.x for insert in doc.modelspace().query("INSERT"))
+        self.assertEqual(offsets, [0, 900 + processor.spacing])
+
+    def test_import_visible_only_skips_other_layers(self):
+        processor = DXFProcessor(dxf_config=DxfConfig(merge_visible_layers="0；细实线层", merge_import_visible_only=True))
+
+        success, _msg = processor.merge_directory_to_dxf(self.source_dir, self.output)
+
+        self.assertTrue(success)
+        doc = ezdxf.readfile(self.output)
+        self.assertEqual(self._block_layers(doc), ["0", "细实线层"])
+        self.assertNotIn("隐藏线", doc.layers)
+        offsets = sorted(insert.dxf.insert.x for insert in doc.modelspace().query("INSERT"))
+        self.assertEqual(offsets, [0, 100 + processor.spacing])
+
+    def test_manifest_extents_are_limited_to_imported_layers(self):
+        processed_dir = self.base / "processed"
+        processed_dir.mkdir()
+        annotator = DXFProcessor()
+        manifest = DxfManifest(
+            annotator.annotate_file(path, processed_dir)[2] for path in sorted(self.source_dir.glob("*.dxf"))
+        )
+        processor = DXFProcessor(dxf_config=DxfConfig(merge_import_visible_only=True))
+
+        processor.merge_directory_to_dxf(self.source_dir, self.output, manifest)
+
+        doc = ezdxf.readfile(self.output)
+        offsets = sorted(insert.dxf.insert.x for insert in doc.modelspace().query("INSERT"))
+        self.assertEqual(offsets, [0, 100 + processor.spacing])
+
+
+def write_bracket(path, dx=0.0, dy=0.0, reverse=False):
+    doc = ezdxf.new()
+    msp = doc.modelspace()
+    builders = [
+        lambda: msp.add_line((dx, dy), (dx + 120, dy)),
+        lambda: msp.add_arc((dx + 120, dy + 30), 30, -90, 90),
+        lambda: msp.add_circle((dx + 40, dy + 30), 8),
+        lambda: msp.add_lwpolyline([(dx, dy + 60, 0, 0, 0.5), (dx + 120, dy + 60)], format="xyseb"),
+    ]
+    for build in reversed(builders) if reverse else builders:
+        build()
+    doc.saveas(path)
+
+
+class DXFProcessorBlockDedupTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base = Path(self.temp_dir.name)
+        self.source_dir = self.base / "classified"
+        self.source_dir.mkdir()
+        self.output = self.base / "merged.dxf"
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _merge(self, dedup, manifest=None):
+        processor = DXFProcessor(dxf_config=DxfConfig(merge_dedup_blocks=dedup))
+        success, msg = processor.merge_directory_to_dxf(self.source_dir, self.output, manifest)
+        self.assertTrue(success)
+        return ezdxf.readfile(self.output), msg
+
+    @staticmethod
+    def _world_geometry(doc):
+        points = []
+        for insert in doc.modelspace().query("INSERT"):
+            for entity in insert.virtual_entities():
+                box = ezdxf.bbox.extents([entity])
+                points.append(tuple(round(v, 6) for v in (*box.extmin, *box.extmax)))
+        return sorted(points)
+
+    def test_identical_shapes_share_one_block(self):
+        write_bracket(self.source_dir / "a.dxf")
+        write_bracket(self.source_dir / "b.dxf", dx=500, dy=-300, reverse=True)
+        write_bracket(self.source_dir / "c.dxf", dx=7)
+
+        doc, msg = self._merge(dedup=True)
+        separate, _msg = self._merge(dedup=False)
+
+        blocks = [block.name for block in doc.blocks if block.name.startswith("block_")]
+        self.assertEqual(len(blocks), 1)
+        self.assertEqual(len(doc.modelspace().query("INSERT")), 3)
+        self.assertIn("复用块定义 2 次", msg)
+        self.assertEqual(self._world_geometry(doc), self._world_geometry(separate))
+
+    def test_different_shapes_keep_separate_blocks(self):
+        write_bracket(self.source_dir / "a.dxf")
+        doc = ezdxf.new()
+        doc.modelspace().add_line((0, 0), (120, 1))
+        doc.saveas(self.source_dir / "b.dxf")
+
+        merged, msg = self._merge(dedup=True)
+
+        self.assertEqual(len([b for b in merged.blocks if b.name.startswith("block_")]), 2)
+        self.assertNotIn("复用", msg)
+
+    def test_identical_files_in_manifest_are_not_read_again(self):
+        write_bracket(self.source_dir / "a.dxf")
+        shutil.copy2(self.source_dir / "a.dxf", self.source_dir / "b.dxf")
+        processed_dir = self.base / "processed"
+        processed_dir.mkdir()
+        annotator = DXFProcessor()
+        manifest = DxfManifest(
+            annotator.annotate_file(path, processed_dir)[2] for path in sorted(self.source_dir.glob("*.dxf"))
+        )
+
+        with mock.patch.object(dxf_processor, "readfile", wraps=dxf_processor.readfile) as readfile:
+            doc, _msg = self._merge(dedup=True, manifest=manifest)
+
+        self.assertEqual(readfile.call_count, 1)
+        self.assertEqual(len(doc.modelspace().query("INSERT")), 2)
+
+    def test_unsupported_entities_have_no_signature(self):
+        doc = ezdxf.new()
+        doc.blocks.new("X").add_line((0, 0), (1, 1))
+        insert = doc.modelspace().add_blockref("X", (0, 0))
+
+        self.assertIsNone(geometry_signature([insert], (0, 0, 0)))
+
+
+class DXFProcessorShardingTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base = Path(self.temp_dir.name)
+        self.source_dir = self.base / "Q235板_T=3"
+        self.source_dir.mkdir()
+        for index in range(5):
+            doc = ezdxf.new()
+            msp = doc.modelspace()
+            for row in range(10):
+                msp.add_line((0, row * 10), (100 + index, row * 10))
+            doc.saveas(self.source_dir / f"part-{index}.dxf")
+        self.output = self.base / "Q235板_T=3_merged.dxf"
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _merge(self, **config):
+        processor = DXFProcessor(dxf_config=DxfConfig(**config))
+        success, msg = processor.merge_directory_to_dxf(self.source_dir, self.output)
+        self.assertTrue(success)
+        return msg
+
+    def _shards(self):
+        return sorted(path.name for path in self.base.glob("*_merged*.dxf"))
+
+    def test_entity_limit_splits_into_numbered_shards(self):
+        # 每个零件 10 条直线 + 插入和文字 2 个实体
+        msg = self._merge(merge_max_entities=25)
+
+        self.assertEqual(self._shards(), [f"Q235板_T=3_merged_0{index}.dxf" for index in range(1, 4)])
+        self.assertIn("3 个分片", msg)
+        counts = [len(ezdxf.readfile(self.base / name).modelspace().query("INSERT")) for name in self._shards()]
+        self.assertEqual(counts, [2, 2, 1])
+
+    def test_width_limit_restarts_layout_at_origin(self):
+        self._merge(merge_max_width=450, merge_dedup_blocks=False)
+
+        self.assertEqual(len(self._shards()), 3)
+        second = ezdxf.readfile(self.base / "Q235板_T=3_merged_02.dxf")
+        offsets = sorted(insert.dxf.insert.x for insert in second.modelspace().query("INSERT"))
+        self.assertEqual(offsets, [0, 102 + DxfConfig().spacing])
+
+    def test_single_shard_keeps_original_name_and_removes_stale_shards(self):
+        self._merge(merge_max_entities=25)
+
+        msg = self._merge(merge_max_entities=1000)
+
+        self.assertEqual(self._shards(), ["Q235板_T=3_merged.dxf"])
+        self.assertNotIn("分片", msg)
+
+    def test_reused_block_is_imported_again_in_new_shard(self):
+        for index in range(1, 5):
+            shutil.copy2(self.source_dir / "part-0.dxf", self.source_dir / f"part-{index}.dxf")
+
+        self._merge(merge_max_width=450)
+
+        for name in self._shards():
+            doc = ezdxf.readfile(self.base / name)
+            self.assertEqual(len([b for b in doc.blocks if b.name.startswith("block_")]), 1)
+
+    def test_source_read_again_after_split_is_cleaned_and_reported(self):
+        doc = ezdxf.new()
+        for row in range(10):
+            doc.modelspace().add_line((0, row * 10), (100, row * 10))
+            doc.modelspace().add_line((100, row * 10), (0, row * 10))
+        doc.saveas(self.source_dir / "part-0.dxf")
+        shutil.copy2(self.source_dir / "part-0.dxf", self.source_dir / "part-1.dxf")
+        for index in range(2, 5):
+            (self.source_dir / f"part-{index}.dxf").unlink()
+        processed_dir = self.base / "processed"
+        processed_dir.mkdir()
+        manifest = DxfManifest(
+            DXFProcessor().annotate_file(path, processed_dir)[2] for path in sorted(self.source_dir.glob("*.dxf"))
+        )
+        processor = DXFProcessor(dxf_config=DxfConfig(merge_max_width=150, remove_duplicates=True))
+
+        # part-1 与 part-0 内容相同，先按清单哈希复用块；拆分分片后需要重新读取
+        success, _msg, _annotations, notes = processor.merge_group(
+            dxf_processor.MergeGroup("Q235板_T=3", self.source_dir, self.output), manifest
+        )
+
+        self.assertTrue(success)
+        self.assertEqual(notes, ["♻ part-0.dxf: 删除重复实体 10 个", "♻ part-1.dxf: 删除重复实体 10 个"])
+        for name in self._shards():
+            block = next(b for b in ezdxf.readfile(self.base / name).blocks if b.name.startswith("block_"))
+            self.assertEqual(len(block), 10)
+
+
+class DXFProcessorBinaryTests(unittest.TestCase):
+    SENTINEL = b"AutoCAD Binary DXF"
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base = Path(self.temp_dir.name)
+        self.source_dir = self.base / "classified"
+        self.processed_dir = self.base / "processed"
+        self.source_dir.mkdir()
+        self.processed_dir.mkdir()
+        write_bracket(self.source_dir / "a.dxf")
+        doc = ezdxf.new()
+        doc.modelspace().add_line((0, 0), (300, 20))
+        doc.saveas(self.source_dir / "b.dxf", fmt="bin")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_binary_intermediate_output(self):
+        for mode in ("dom", "stream"):
+            processor = DXFProcessor(dxf_config=DxfConfig(annotation_mode=mode, binary_intermediate=True))
+            success, _msg = processor.process_dxf_file(self.source_dir / "a.dxf", 1, self.processed_dir)
+
+            self.assertTrue(success)
+            output = self.processed_dir / "processed_a.dxf"
+            self.assertTrue(output.read_bytes().startswith(self.SENTINEL))
+            texts = [text.dxf.text for text in ezdxf.readfile(output).modelspace().query("TEXT")]
+            self.assertEqual(texts, ["a"])
+
+    def test_binary_source_is_read_and_final_output_is_binary(self):
+        output = self.base / "merged.dxf"
+        processor = DXFProcessor(dxf_config=DxfConfig(binary_final=True))
+
+        success, msg = processor.merge_directory_to_dxf(self.source_dir, output)
+
+        self.assertTrue(success, msg)
+        self.assertIn("2 个文件", msg)
+        self.assertTrue(output.read_bytes().startswith(self.SENTINEL))
+        self.assertEqual(len(ezdxf.readfile(output).modelspace().query("INSERT")), 2)
+
+    def test_ascii_output_by_default(self):
+        output = self.base / "merged.dxf"
+
+        DXFProcessor().merge_directory_to_dxf(self.source_dir, output)
+
+        self.assertFalse(output.read_bytes().startswith(self.SENTINEL))
+
+
+class DXFProcessorSinglePassTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base = Path(self.temp_dir.name)
+        self.source_dir = self.base / "classified"
+        self.processed_dir = self.base / "processed"
+        self.group_dir = self.source_dir / "不锈钢板" / "T=2.0"
+        self.group_dir.mkdir(parents=True)
+        write_bracket(self.group_dir / "a.dxf")
+        write_bracket(self.group_dir / "b.dxf", dx=500)
+        doc = ezdxf.new()
+        doc.modelspace().add_line((0, 0), (300, 20), dxfattribs={"layer": "折弯线"})
+        doc.saveas(self.group_dir / "c.dxf")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    @staticmethod
+    def _merged_summary(path):
+        doc = ezdxf.readfile(path)
+        msp = doc.modelspace()
+        inserts = sorted((insert.dxf.name, tuple(insert.dxf.insert)) for insert in msp.query("INSERT"))
+        texts = sorted((text.dxf.text, tuple(text.dxf.insert)) for text in msp.query("TEXT"))
+        return inserts, texts
+
+    def test_each_source_is_read_once_and_output_matches_separate_stages(self):
+        for name in ("single", "separate"):
+            (self.base / name).mkdir()
+        processor = DXFProcessor()
+        with mock.patch.object(dxf_processor, "readfile", wraps=dxf_processor.readfile) as readfile:
+            success, fail, logs, manifest = processor.process_and_merge_by_thickness(
+                self.source_dir, self.processed_dir, self.base / "single"
+            )
+
+        self.assertEqual((success, fail), (1, 0))
+        self.assertEqual(readfile.call_count, 3)
+        self.assertIn("🏷 标注成功 2/3 个文件", logs)
+        self.assertTrue(any("图层0中没有实体: c.dxf" in line for line in logs))
+        processed_group = self.processed_dir / "不锈钢板" / "T=2.0"
+        texts = [text.dxf.text for text in ezdxf.readfile(processed_group / "processed_a.dxf").modelspace().query("TEXT")]
+        self.assertEqual(texts, ["a"])
+        self.assertEqual(len(manifest), 2)
+        self.assertEqual(manifest.lookup(self.group_dir / "b.dxf").output, str(processed_group / "processed_b.dxf"))
+
+        processor.merge_by_thickness(self.source_dir, self.base / "separate")
+        merged_name = "不锈钢板_T=2.0_merged.dxf"
+        self.assertEqual(
+            self._merged_summary(self.base / "single" / merged_name),
+            self._merged_summary(self.base / "separate" / merged_name),
+        )
+
+    def test_parallel_groups_return_annotations(self):
+        other_group = self.source_dir / "铝板" / "T=1.0"
+        other_group.mkdir(parents=True)
+        write_bracket(other_group / "d.dxf")
+        (self.base / "merged").mkdir()
+
+        _success, fail, logs, manifest = DXFProcessor().process_and_merge_by_thickness(
+            self.source_dir, self.processed_dir, self.base / "merged", max_workers=2
+        )
+
+        self.assertEqual(fail, 0)
+        self.assertEqual(len(manifest), 3)
+        self.assertTrue((self.processed_dir / "铝板" / "T=1.0" / "processed_d.dxf").exists())
+        self.assertIn("🏷 标注成功 3/4 个文件", logs)
+
+
 if __name__ == "__main__":
     unittest.main()
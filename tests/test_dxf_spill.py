@@ -0,0 +1,82 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import ezdxf
+
+from config.settings import DxfConfig
+from core.dxf_processor import DXFProcessor
+from core.dxf_spill import BlockSpill
+
+
+class BlockSpillTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_spilled_blocks_are_restored_on_save(self):
+        doc = ezdxf.new()
+        part = doc.blocks.new("PART")
+        part.add_line((0, 0), (10, 10))
+        part.add_arc((0, 0), 5, 0, 90)
+        part.add_text("零件-01")
+        hatched = doc.blocks.new("HATCHED")
+        hatched.add_hatch().paths.add_polyline_path([(0, 0), (1, 0), (1, 1)])
+        doc.modelspace().add_blockref("PART", (0, 0))
+        doc.modelspace().add_blockref("HATCHED", (20, 0))
+        spill = BlockSpill(doc)
+
+        self.assertTrue(spill.spill("PART"))
+        self.assertFalse(spill.spill("HATCHED"))
+        self.assertEqual(len(doc.blocks.get("PART")), 0)
+        output = self.base / "out.dxf"
+        spill.save(output)
+        spill.close()
+
+        restored = ezdxf.readfile(output)
+        self.assertEqual([e.dxftype() for e in restored.blocks.get("PART")], ["LINE", "ARC", "TEXT"])
+        self.assertEqual(restored.blocks.get("PART").query("TEXT")[0].dxf.text, "零件-01")
+        self.assertEqual([e.dxftype() for e in restored.blocks.get("HATCHED")], ["HATCH"])
+        self.assertEqual(len(restored.audit().errors), 0)
+        self.assertEqual(sorted(path.name for path in self.base.iterdir()), ["out.dxf"])
+
+    def test_streaming_merge_matches_in_memory_merge(self):
+        source_dir = self.base / "classified"
+        source_dir.mkdir()
+        for index in range(4):
+            doc = ezdxf.new()
+            msp = doc.modelspace()
+            msp.add_line((0, 0), (100 + index, 0))
+            msp.add_circle((50, 30), 10 + index)
+            msp.add_lwpolyline([(0, 60, 0, 0, 0.5), (100, 60)], format="xyseb")
+            doc.saveas(source_dir / f"part-{index}.dxf")
+
+        results = {}
+        for streaming in (False, True):
+            output = self.base / f"merged_{streaming}.dxf"
+            config = DxfConfig(merge_streaming=streaming, merge_max_entities=12)
+            success, msg = DXFProcessor(dxf_config=config).merge_directory_to_dxf(source_dir, output)
+            self.assertTrue(success, msg)
+            results[streaming] = sorted(self.base.glob(f"merged_{streaming}_*.dxf"))
+
+        self.assertEqual(len(results[True]), 2)
+        for in_memory, streamed in zip(results[False], results[True]):
+            self.assertEqual(self._world_geometry(in_memory), self._world_geometry(streamed))
+            self.assertEqual(len(ezdxf.readfile(streamed).audit().errors), 0)
+
+    @staticmethod
+    def _world_geometry(path):
+        doc = ezdxf.readfile(path)
+        items = []
+        for insert in doc.modelspace().query("INSERT"):
+            for entity in insert.virtual_entities():
+                box = ezdxf.bbox.extents([entity])
+                items.append((entity.dxftype(), *(round(v, 6) for v in (*box.extmin, *box.extmax))))
+        return sorted(items)
+
+
+if __name__ == "__main__":
+    unittest.main()
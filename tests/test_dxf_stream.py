@@ -0,0 +1,89 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import ezdxf
+from ezdxf.bbox import extents
+
+from config.settings import DxfConfig
+from core.dxf_processor import DXFProcessor
+from core.dxf_stream import DXFStreamAnnotator, StreamFallback
+
+
+class DXFStreamAnnotatorTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _flat_pattern(self, name="(2)零件-01.dxf", version="R2018"):
+        doc = ezdxf.new(version)
+        msp = doc.modelspace()
+        msp.add_line((0, 0), (200, 0))
+        msp.add_arc((200, 50), 50, -90, 90)
+        msp.add_arc((-20, 40), 10, 0, 180, dxfattribs={"extrusion": (0, 0, -1)})
+        msp.add_circle((100, 50), 20)
+        msp.add_lwpolyline([(0, 100, 0, 0, 1), (200, 100)], format="xyseb")
+        msp.add_line((0, 0), (5000, 5000), dxfattribs={"layer": "折弯线"})
+        path = self.base / name
+        doc.saveas(path)
+        return path
+
+    def test_stream_label_matches_document_extents(self):
+        source = self._flat_pattern()
+        output = self.base / "out.dxf"
+
+        bbox = DXFStreamAnnotator(text_layer="0", text_color=2).annotate(source, output, source.stem).bbox
+
+        source_doc = ezdxf.readfile(source)
+        expected = extents(e for e in source_doc.modelspace() if e.dxf.layer == "0")
+        self.assertAlmostEqual(bbox.extmin[0], expected.extmin.x, places=6)
+        self.assertAlmostEqual(bbox.extmin[1], expected.extmin.y, places=6)
+        self.assertAlmostEqual(bbox.extmax[0], expected.extmax.x, places=6)
+        self.assertAlmostEqual(bbox.extmax[1], expected.extmax.y, places=6)
+
+        doc = ezdxf.readfile(output)
+        texts = list(doc.modelspace().query("TEXT"))
+        self.assertEqual([text.dxf.text for text in texts], ["(2)零件-01"])
+        height = (expected.extmax.y - expected.extmin.y) * 0.1
+        self.assertAlmostEqual(texts[0].dxf.height, height)
+        self.assertAlmostEqual(texts[0].dxf.insert.y, -height * 1.5)
+        self.assertEqual(texts[0].dxf.color, 2)
+        self.assertEqual(len(doc.entitydb.query("TEXT")), 1)
+        self.assertGreater(int(doc.header["$HANDSEED"], 16), int(texts[0].dxf.handle, 16))
+        self.assertEqual(len(doc.audit().errors), 0)
+
+    def test_pre_r2007_label_uses_codepage(self):
+        source = self._flat_pattern(version="R2000")
+        doc = ezdxf.readfile(source)
+        doc.encoding = "gbk"
+        doc.saveas(source)
+        output = self.base / "out.dxf"
+
+        DXFStreamAnnotator().annotate(source, output, "零件-01")
+
+        self.assertTrue("零件-01".encode("gbk") in output.read_bytes())
+        self.assertEqual(ezdxf.readfile(output).modelspace().query("TEXT")[0].dxf.text, "零件-01")
+
+    def test_unsupported_layer_0_entity_requests_fallback(self):
+        doc = ezdxf.new()
+        doc.modelspace().add_spline([(0, 0), (10, 10), (20, 0), (30, 10)])
+        source = self.base / "spline.dxf"
+        doc.saveas(source)
+        output = self.base / "out.dxf"
+
+        with self.assertRaises(StreamFallback):
+            DXFStreamAnnotator().annotate(source, output, "spline")
+        self.assertFalse(output.exists())
+
+        processor = DXFProcessor(dxf_config=DxfConfig(annotation_mode="stream"))
+        success, msg = processor.process_dxf_file(source, 1, self.base)
+        self.assertTrue(success)
+        self.assertIn("SPLINE", msg)
+        self.assertEqual(len(ezdxf.readfile(self.base / "processed_spline.dxf").modelspace().query("TEXT")), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
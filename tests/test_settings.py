@@ -16,13 +16,46 @@ class SettingsTests(unittest.TestCase):
         self.assertEqual(settings.output.classified_dir, "1_分类结果")
         self.assertEqual(settings.output.processed_dxf_dir, "2_DXF处理结果")
         self.assertEqual(settings.output.merged_dir, "3_合并文件")
+        self.assertEqual(settings.output.quarantine_dir, "0_隔离文件")
         self.assertEqual(settings.inventory.export_filename_prefix, "板材物料库存")
         self.assertEqual(settings.solidworks.template_dir, "template")
         self.assertFalse(settings.solidworks.visible)
+        self.assertFalse(settings.solidworks.early_binding)
+        self.assertTrue(settings.solidworks.com_trace)
+        self.assertEqual(settings.solidworks.export_mode, "drawing")
+        self.assertEqual(settings.solidworks.export_formats, "dxf")
+        self.assertEqual(settings.solidworks.open_mode, "normal")
+        self.assertFalse(settings.solidworks.lightweight_references)
+        self.assertTrue(settings.solidworks.read_drawing_metadata)
+        self.assertTrue(settings.solidworks.skip_unchanged)
+        self.assertFalse(settings.solidworks.staging_enabled)
+        self.assertEqual(settings.solidworks.staging_dir, "")
+        self.assertEqual(settings.solidworks.staging_workers, 4)
+        self.assertEqual(settings.solidworks.session_idle_minutes, 15)
         self.assertEqual(settings.dxf.text_layer, "0")
         self.assertEqual(settings.dxf.text_color, 2)
         self.assertEqual(settings.dxf.text_height, 50.0)
         self.assertEqual(settings.dxf.spacing, 100.0)
+        self.assertEqual(settings.dxf.annotation_mode, "dom")
+        self.assertEqual(settings.dxf.annotation_workers, 0)
+        self.assertEqual(settings.dxf.annotation_chunk_size, 4)
+        self.assertEqual(settings.dxf.merge_visible_layers, "0;细实线层")
+        self.assertFalse(settings.dxf.merge_import_visible_only)
+        self.assertTrue(settings.dxf.merge_dedup_blocks)
+        self.assertEqual(settings.dxf.merge_workers, 0)
+        self.assertEqual(settings.dxf.merge_memory_budget_mb, 0)
+        self.assertEqual(settings.dxf.merge_max_entities, 0)
+        self.assertEqual(settings.dxf.merge_max_file_mb, 0)
+        self.assertEqual(settings.dxf.merge_max_width, 0.0)
+        self.assertFalse(settings.dxf.binary_intermediate)
+        self.assertFalse(settings.dxf.binary_final)
+        self.assertFalse(settings.dxf.merge_streaming)
+        self.assertTrue(settings.dxf.preflight)
+        self.assertFalse(settings.dxf.merge_cleanup)
+        self.assertEqual(settings.dxf.merge_cleanup_tolerance, 0.001)
+        self.assertEqual(settings.dxf.merge_layout, "strip")
+        self.assertEqual(settings.dxf.merge_sheet_width, 0.0)
+        self.assertFalse(settings.dxf.remove_duplicates)
         self.assertEqual(settings.remote_api.base_url, "")
         self.assertEqual(settings.remote_api.timeout_seconds, 15)
         self.assertEqual(settings.auth.fallback_admin_username, "admin")
@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from core.staging_cache import DrawingStagingCache
+
+
+class DrawingStagingCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        base = Path(self.temp_dir.name)
+        self.share = base / "share" / "project"
+        self.share.mkdir(parents=True)
+        self.cache_root = base / "cache"
+        self.drawing = self.share / "P-001.SLDDRW"
+        self.part = self.share / "P-001.SLDPRT"
+        self.drawing.write_bytes(b"drawing")
+        self.part.write_bytes(b"part")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_stage_copies_drawing_and_references_side_by_side(self):
+        cache = DrawingStagingCache(self.share, self.cache_root, max_workers=2)
+        try:
+            staged = cache.stage(self.drawing, [self.part])
+        finally:
+            cache.shutdown()
+
+        self.assertEqual(staged.local_path, cache.cache_dir / "P-001.SLDDRW")
+        self.assertEqual(staged.local_path.read_bytes(), b"drawing")
+        self.assertEqual((cache.cache_dir / "P-001.SLDPRT").read_bytes(), b"part")
+        self.assertEqual(staged.copied_files, 2)
+        self.assertEqual(staged.copied_bytes, len(b"drawing") + len(b"part"))
+
+    def test_same_named_files_in_different_folders_are_kept_apart(self):
+        drawings = []
+        for folder in ("A", "B"):
+            (self.share / folder).mkdir()
+            drawing = self.share / folder / "bracket.SLDDRW"
+            drawing.write_bytes(folder.encode("ascii"))
+            (self.share / folder / "plate.SLDPRT").write_bytes(f"plate {folder}".encode("ascii"))
+            drawings.append(drawing)
+        outside = Path(self.temp_dir.name) / "library" / "plate.SLDPRT"
+        outside.parent.mkdir()
+        outside.write_bytes(b"library plate")
+        cache = DrawingStagingCache(self.share, self.cache_root)
+        try:
+            staged = [cache.stage(drawing, [drawing.with_name("plate.SLDPRT"), outside]) for drawing in drawings]
+        finally:
+            cache.shutdown()
+
+        self.assertEqual(staged[0].local_path, cache.cache_dir / "A" / "bracket.SLDDRW")
+        self.assertEqual(staged[1].local_path, cache.cache_dir / "B" / "bracket.SLDDRW")
+        self.assertEqual([item.local_path.read_bytes() for item in staged], [b"A", b"B"])
+        self.assertEqual((cache.cache_dir / "A" / "plate.SLDPRT").read_bytes(), b"plate A")
+        self.assertEqual((cache.cache_dir / "B" / "plate.SLDPRT").read_bytes(), b"plate B")
+        external = cache.local_path_for(outside)
+        self.assertEqual(external.parent.parent, cache.cache_dir / cache.EXTERNAL_DIR_NAME)
+        self.assertEqual(external.read_bytes(), b"library plate")
+
+    def test_unchanged_files_are_reused_across_runs(self):
+        first = DrawingStagingCache(self.share, self.cache_root)
+        first.stage(self.drawing, [self.part])
+        first.shutdown()
+
+        second = DrawingStagingCache(self.share, self.cache_root)
+        try:
+            staged = second.stage(self.drawing, [self.part])
+        finally:
+            second.shutdown()
+
+        self.assertEqual(staged.copied_files, 0)
+        self.assertEqual(staged.reused_files, 2)
+
+    def test_changed_source_is_copied_again(self):
+        first = DrawingStagingCache(self.share, self.cache_root)
+        first.stage(self.drawing)
+        first.shutdown()
+        self.drawing.write_bytes(b"drawing v2")
+        later = self.drawing.stat().st_mtime + 60
+        os.utime(self.drawing, (later, later))
+
+        second = DrawingStagingCache(self.share, self.cache_root)
+        try:
+            staged = second.stage(self.drawing)
+        finally:
+            second.shutdown()
+
+        self.assertEqual(staged.copied_files, 1)
+        self.assertEqual(staged.local_path.read_bytes(), b"drawing v2")
+
+    def test_shared_reference_is_copied_once_per_run(self):
+        other_drawing = self.share / "P-002.SLDDRW"
+        other_drawing.write_bytes(b"other")
+        cache = DrawingStagingCache(self.share, self.cache_root)
+        try:
+            first = cache.stage_async(self.drawing, [self.part])
+            second = cache.stage_async(other_drawing, [self.part])
+            results = [first.result(), second.result()]
+        finally:
+            cache.shutdown()
+
+        self.assertEqual([result.copied_files for result in results], [2, 1])
+        self.assertEqual(results[1].reused_files, 1)
+        self.assertEqual(len(list(cache.cache_dir.iterdir())), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
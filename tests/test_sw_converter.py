@@ -0,0 +1,279 @@
+import importlib.util
+import sys
+import tempfile
+import types
+import unittest
+from pathlib import Path
+
+from config.settings import SolidWorksConfig
+
+
+def load_module_from_path(module_name, path):
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class FakeView:
+    def __init__(self, use_sheet_scale):
+        self.UseSheetScale = use_sheet_scale
+
+
+class FakeDrawing:
+    def __init__(self, sheets):
+        self.GetViews = sheets
+        self.rebuild_count = 0
+
+    @property
+    def EditRebuild3(self):
+        self.rebuild_count += 1
+        return True
+
+
+class SWConverterTestCase(unittest.TestCase):
+    def setUp(self):
+        utils_module = types.ModuleType("utils")
+        utils_module.logger = types.SimpleNamespace(
+            info=lambda *args, **kwargs: None,
+            warning=lambda *args, **kwargs: None,
+            error=lambda *args, **kwargs: None,
+        )
+        self.original_utils = sys.modules.get("utils")
+        sys.modules["utils"] = utils_module
+        self.module = load_module_from_path("sw_converter_under_test", "core/sw_converter.py")
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+        if self.original_utils is None:
+            sys.modules.pop("utils", None)
+        else:
+            sys.modules["utils"] = self.original_utils
+
+    def make_converter(self, **config):
+        return self.module.SWConverter(
+            solidworks_config=SolidWorksConfig(template_dir=self.temp_dir.name, **config)
+        )
+
+
+class SWConverterViewScaleTests(SWConverterTestCase):
+    def setUp(self):
+        super().setUp()
+        self.converter = self.make_converter()
+
+    def test_bulk_views_only_update_views_not_at_sheet_scale(self):
+        scaled = FakeView(True)
+        unscaled = FakeView(False)
+        drawing = FakeDrawing(((FakeView(False), scaled, unscaled), (FakeView(False), FakeView(False))))
+
+        self.assertTrue(self.converter._set_views_to_sheet_scale(drawing))
+
+        self.assertTrue(unscaled.UseSheetScale)
+        self.assertEqual(drawing.rebuild_count, 1)
+        self.assertEqual(self.converter.com_trace.call_count("UseSheetScale"), 3)
+        self.assertEqual(self.converter.com_trace.call_count("UseSheetScale="), 2)
+        self.assertIn("GetViews", self.converter.timing_summary())
+
+    def test_drawing_already_at_sheet_scale_skips_rebuild(self):
+        drawing = FakeDrawing(((FakeView(False), FakeView(True), FakeView(True)),))
+
+        self.assertTrue(self.converter._set_views_to_sheet_scale(drawing))
+
+        self.assertEqual(drawing.rebuild_count, 0)
+
+
+class FakeApp:
+    def __init__(self):
+        self.opened = []
+
+    def OpenDoc6(self, path, doc_type, options, configuration, errors, warnings):
+        self.opened.append((path, doc_type, options))
+        return "model"
+
+
+class SWConverterOpenModeTests(SWConverterTestCase):
+    def _converter(self, **config):
+        converter = self.make_converter(**config)
+        converter._create_ref_int = lambda: 0
+        converter.sw_app = FakeApp()
+        return converter
+
+    def test_default_open_options_stay_silent_only(self):
+        self.assertEqual(self._converter().drawing_open_options(), 1)
+
+    def test_detailing_mode_with_lightweight_references(self):
+        converter = self._converter(open_mode="detailing", lightweight_references=True)
+
+        model = converter._open_doc(Path("a.SLDDRW"), 3, converter.drawing_open_options())
+
+        self.assertEqual(model, "model")
+        self.assertEqual(converter.sw_app.opened, [("a.SLDDRW", 3, 1 | 1024 | 64 | 128)])
+        self.assertIn("OpenDoc6[detailing+lightweight]", converter.timing_summary())
+
+    def test_read_only_mode_timings_are_keyed_by_mode(self):
+        converter = self._converter(open_mode="read_only")
+
+        converter._open_doc(Path("a.SLDDRW"), 3, converter.drawing_open_options())
+
+        self.assertEqual(converter.sw_app.opened[0][2], 1 | 2)
+        self.assertIn("OpenDoc6[read_only]", converter.timing_summary())
+
+    def test_unknown_mode_falls_back_to_normal(self):
+        converter = self._converter(open_mode="readonly")
+
+        converter._open_doc(Path("a.SLDDRW"), 3, converter.drawing_open_options())
+
+        self.assertEqual(converter.open_mode, "normal")
+        self.assertEqual(converter.sw_app.opened[0][2], 1)
+        self.assertIn("OpenDoc6[normal]", converter.timing_summary())
+
+
+class FakeExtension:
+    def __init__(self, model):
+        self.model = model
+
+    def SaveAs(self, path, version, options, export_data, errors, warnings):
+        self.model.saved.append(Path(path).suffix)
+        self.model.export_data.append(export_data)
+        Path(path).write_text("exported", encoding="utf-8")
+        return True
+
+
+class FakeExportData:
+    def __init__(self):
+        self.sheets = None
+
+    def SetSheets(self, which, names):
+        self.sheets = (which, names)
+        return True
+
+
+class FakeExportModel:
+    def __init__(self):
+        self.GetTitle = "part.SLDDRW"
+        self.GetViews = ()
+        self.GetType = 0
+        self.GetSheetNames = ("图纸1", "图纸2")
+        self.Extension = FakeExtension(self)
+        self.saved = []
+        self.export_data = []
+
+    def SaveAs2(self, path, version, as_copy, silent):
+        self.saved.append(Path(path).suffix)
+        self.export_data.append(None)
+        Path(path).write_text("exported", encoding="utf-8")
+        return 0
+
+
+class FakeExportApp(FakeApp):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+        self.closed = []
+
+    def OpenDoc6(self, path, doc_type, options, configuration, errors, warnings):
+        super().OpenDoc6(path, doc_type, options, configuration, errors, warnings)
+        return self.model
+
+    def CloseDoc(self, path):
+        self.closed.append(path)
+
+    def GetExportFileData(self, file_type):
+        return FakeExportData()
+
+
+class SWConverterMultiFormatTests(SWConverterTestCase):
+    def test_parse_export_formats_always_starts_with_dxf(self):
+        parse = self.module.SWConverter.parse_export_formats
+
+        self.assertEqual(parse("pdf；DWG;.dxf;step;pdf"), ["dxf", "pdf", "dwg"])
+        self.assertEqual(parse(""), ["dxf"])
+
+    def test_export_drawing_opens_once_and_saves_every_format(self):
+        model = FakeExportModel()
+        converter = self.make_converter()
+        converter._create_ref_int = lambda: 0
+        converter._create_string_array = list
+        converter.sw_app = FakeExportApp(model)
+        base = Path(self.temp_dir.name)
+        outputs = {"dxf": base / "dxf" / "part.dxf", "pdf": base / "pdf" / "part.pdf"}
+
+        saved_formats, _msg = converter.export_drawing(Path("part.SLDDRW"), outputs)
+
+        self.assertEqual(saved_formats, ["dxf", "pdf"])
+        self.assertEqual(len(converter.sw_app.opened), 1)
+        self.assertEqual(model.saved, [".dxf", ".pdf"])
+        self.assertTrue(outputs["pdf"].exists())
+        self.assertIsNone(model.export_data[0])
+        # PDF通过导出数据导出全部图纸
+        self.assertEqual(model.export_data[1].sheets, (self.module.EXPORT_ALL_SHEETS, ["图纸1", "图纸2"]))
+        self.assertIn("SaveAs[pdf]", converter.timing_summary())
+        self.assertEqual(
+            set(converter.step_summary()),
+            {"open", "sheet_scale", "template", "save[dxf]", "save[pdf]", "close"},
+        )
+
+    def test_view_only_mode_exports_without_editing_the_drawing(self):
+        model = FakeExportModel()
+        converter = self.make_converter(open_mode="view_only")
+        converter._create_ref_int = lambda: 0
+        converter.sw_app = FakeExportApp(model)
+
+        saved_formats, _msg = converter.export_drawing(Path("part.SLDDRW"), {"dxf": Path(self.temp_dir.name) / "part.dxf"})
+
+        self.assertEqual(saved_formats, ["dxf"])
+        self.assertEqual(converter.sw_app.opened[0][2], 1 | 4)
+        self.assertEqual(set(converter.step_summary()), {"open", "save[dxf]", "close"})
+
+    def test_failed_export_still_closes_document(self):
+        model = FakeExportModel()
+
+        def fail(*args):
+            raise RuntimeError("SaveAs2 failed")
+
+        model.SaveAs2 = fail
+        converter = self.make_converter()
+        converter._create_ref_int = lambda: 0
+        converter.sw_app = FakeExportApp(model)
+
+        saved_formats, msg = converter.export_drawing(Path("part.SLDDRW"), {"dxf": Path(self.temp_dir.name) / "part.dxf"})
+
+        self.assertEqual(saved_formats, [])
+        self.assertIn("SaveAs2 failed", msg)
+        self.assertEqual(converter.sw_app.closed, ["part.SLDDRW"])
+
+    def test_failed_secondary_format_keeps_the_saved_ones(self):
+        model = FakeExportModel()
+
+        def fail(*args):
+            raise RuntimeError("PDF export failed")
+
+        model.Extension.SaveAs = fail
+        converter = self.make_converter()
+        converter._create_ref_int = lambda: 0
+        converter._create_string_array = list
+        converter.sw_app = FakeExportApp(model)
+        base = Path(self.temp_dir.name)
+        outputs = {"dxf": base / "part.dxf", "pdf": base / "part.pdf", "dwg": base / "part.dwg"}
+
+        saved_formats, msg = converter.export_drawing(Path("part.SLDDRW"), outputs)
+
+        self.assertEqual(saved_formats, ["dxf", "dwg"])
+        self.assertIn("PDF", msg)
+        self.assertNotIn("DXF", msg)
+        self.assertNotIn("DWG", msg)
+        self.assertEqual(converter.sw_app.closed, ["part.SLDDRW"])
+
+    def test_disabled_trace_records_nothing(self):
+        converter = self.make_converter(com_trace=False)
+        drawing = FakeDrawing(((FakeView(False), FakeView(False)),))
+
+        self.assertTrue(converter._set_views_to_sheet_scale(drawing))
+
+        self.assertEqual(converter.timing_summary(), {})
+        self.assertEqual(converter.step_summary(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import threading
+import time
+import unittest
+
+from config.settings import SolidWorksConfig
+from core.sw_session import SolidWorksSessionService
+
+
+class FakeConverter:
+    instances = []
+
+    fail_initialize = False
+
+    def __init__(self, solidworks_config):
+        self.solidworks_config = solidworks_config
+        self.alive = True
+        self.shutdown_count = 0
+        self.thread_names = []
+        FakeConverter.instances.append(self)
+
+    def initialize(self):
+        return not FakeConverter.fail_initialize
+
+    def is_alive(self):
+        return self.alive
+
+    def shutdown(self):
+        self.shutdown_count += 1
+
+    def convert(self, name):
+        self.thread_names.append(threading.current_thread().name)
+        return f"converted {name}"
+
+
+class SolidWorksSessionServiceTests(unittest.TestCase):
+    def setUp(self):
+        FakeConverter.instances = []
+        FakeConverter.fail_initialize = False
+
+    def test_jobs_reuse_one_warm_converter_on_dedicated_thread(self):
+        service = SolidWorksSessionService(converter_factory=FakeConverter)
+
+        first = service.run(lambda converter: converter.convert("a"))
+        second = service.run(lambda converter: converter.convert("b"))
+        service.shutdown()
+
+        self.assertEqual((first, second), ("converted a", "converted b"))
+        self.assertEqual(len(FakeConverter.instances), 1)
+        converter = FakeConverter.instances[0]
+        self.assertEqual(converter.thread_names, ["SolidWorksSession", "SolidWorksSession"])
+        self.assertEqual(converter.shutdown_count, 1)
+
+    def test_failed_health_check_restarts_converter(self):
+        service = SolidWorksSessionService(converter_factory=FakeConverter)
+
+        service.run(lambda converter: converter.convert("a"))
+        FakeConverter.instances[0].alive = False
+        service.run(lambda converter: converter.convert("b"))
+        service.shutdown()
+
+        self.assertEqual(len(FakeConverter.instances), 2)
+        self.assertEqual(FakeConverter.instances[0].shutdown_count, 1)
+
+    def test_failed_rebuild_shuts_down_each_converter_once(self):
+        service = SolidWorksSessionService(converter_factory=FakeConverter)
+
+        service.run(lambda converter: None)
+        FakeConverter.instances[0].alive = False
+        FakeConverter.fail_initialize = True
+        with self.assertRaises(RuntimeError):
+            service.run(lambda converter: None)
+        with self.assertRaises(RuntimeError):
+            service.run(lambda converter: None)
+        FakeConverter.fail_initialize = False
+        result = service.run(lambda converter: converter.convert("c"))
+        service.shutdown()
+
+        self.assertEqual(result, "converted c")
+        self.assertEqual([converter.shutdown_count for converter in FakeConverter.instances], [1, 1, 1, 1])
+
+    def test_config_change_rebuilds_converter_for_next_job(self):
+        service = SolidWorksSessionService(converter_factory=FakeConverter)
+
+        service.run(lambda converter: None)
+        service.update_config(SolidWorksConfig(visible=True))
+        service.run(lambda converter: None)
+        service.shutdown()
+
+        self.assertEqual(len(FakeConverter.instances), 2)
+        self.assertTrue(FakeConverter.instances[1].solidworks_config.visible)
+
+    def test_idle_timeout_releases_connection(self):
+        service = SolidWorksSessionService(idle_timeout_seconds=0.05, converter_factory=FakeConverter)
+
+        service.run(lambda converter: None)
+        deadline = time.monotonic() + 2
+        while service.is_running and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertFalse(service.is_running)
+        self.assertEqual(FakeConverter.instances[0].shutdown_count, 1)
+        service.run(lambda converter: None)
+        service.shutdown()
+        self.assertEqual(len(FakeConverter.instances), 2)
+
+    def test_submit_after_shutdown_is_rejected(self):
+        service = SolidWorksSessionService(converter_factory=FakeConverter)
+        service.shutdown()
+
+        with self.assertRaises(RuntimeError):
+            service.submit(lambda converter: None)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+# tools/bench_dxf_bbox.py - 对比 ezdxf.bbox.extents 与 fast_extents 的耗时
+#
+# 用法:
+#   python tools/bench_dxf_bbox.py 展开图1.dxf 展开图2.dxf ...
+#   python tools/bench_dxf_bbox.py            # 不给文件时生成一个模拟的大展开图
+import math
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import ezdxf
+from ezdxf.bbox import extents
+
+from core.dxf_bbox import fast_extents
+
+
+def make_flat_pattern(count: int = 50_000):
+    """生成含直线、圆弧、孔和带凸度多段线的模拟展开图"""
+    random.seed(0)
+    doc = ezdxf.new()
+    msp = doc.modelspace()
+    for index in range(count):
+        x, y = random.uniform(0, 3000), random.uniform(0, 1500)
+        kind = index % 4
+        if kind == 0:
+            msp.add_line((x, y), (x + random.uniform(-50, 50), y + random.uniform(-50, 50)))
+        elif kind == 1:
+            msp.add_arc((x, y), random.uniform(1, 30), random.uniform(0, 360), random.uniform(0, 360))
+        elif kind == 2:
+            msp.add_circle((x, y), random.uniform(1, 10))
+        else:
+            points = [(x + 20 * math.cos(a), y + 20 * math.sin(a), 0, 0, 0.4) for a in (0, 2, 4)]
+            msp.add_lwpolyline(points, format="xyseb", close=True)
+    return doc
+
+
+def bench(name: str, doc) -> None:
+    entities = list(doc.modelspace())
+    start = time.perf_counter()
+    expected = extents(entities)
+    ezdxf_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = fast_extents(entities)
+    fast_time = time.perf_counter() - start
+
+    deviation = max(
+        abs(a - b)
+        for a, b in zip((*expected.extmin, *expected.extmax), (*actual.extmin, *actual.extmax))
+    )
+    print(
+        f"{name}: {len(entities)} 个实体 | ezdxf {ezdxf_time:.3f}s | fast {fast_time:.3f}s | "
+        f"加速 {ezdxf_time / max(fast_time, 1e-9):.1f}x | 最大偏差 {deviation:.4f}"
+    )
+
+
+def main() -> None:
+    if len(sys.argv) > 1:
+        for path in sys.argv[1:]:
+            bench(Path(path).name, ezdxf.readfile(path))
+    else:
+        bench("模拟展开图", make_flat_pattern())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# tools/bench_dxf_binary.py - 对比 ASCII 与二进制 DXF 的写出耗时、读取耗时和文件大小
+#
+# 用法:
+#   python tools/bench_dxf_binary.py result/1_分类结果      # 目录下所有DXF（递归）
+#   python tools/bench_dxf_binary.py a.dxf b.dxf
+#   python tools/bench_dxf_binary.py                        # 不给参数时使用生成的模拟展开图
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import ezdxf
+
+from bench_dxf_bbox import make_flat_pattern
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def bench(name: str, doc, work_dir: Path, totals: dict) -> None:
+    row = {}
+    for fmt in ("asc", "bin"):
+        path = work_dir / f"{fmt}.dxf"
+        _result, write_time = timed(lambda: doc.saveas(path, fmt=fmt))
+        _result, read_time = timed(lambda: ezdxf.readfile(path))
+        size = path.stat().st_size
+        row[fmt] = (write_time, read_time, size)
+        for key, value in zip(("write", "read", "size"), row[fmt]):
+            totals[fmt][key] += value
+    asc, binary = row["asc"], row["bin"]
+    print(
+        f"{name}: 写出 {asc[0]:.2f}s -> {binary[0]:.2f}s | 读取 {asc[1]:.2f}s -> {binary[1]:.2f}s | "
+        f"大小 {asc[2] / 1024:.0f}KB -> {binary[2] / 1024:.0f}KB"
+    )
+
+
+def collect(arguments):
+    for argument in arguments:
+        path = Path(argument)
+        if path.is_dir():
+            yield from sorted(path.rglob("*.dxf"))
+        else:
+            yield path
+
+
+def main() -> None:
+    totals = {fmt: {"write": 0.0, "read": 0.0, "size": 0} for fmt in ("asc", "bin")}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        work_dir = Path(temp_dir)
+        if len(sys.argv) > 1:
+            count = 0
+            for path in collect(sys.argv[1:]):
+                bench(path.name, ezdxf.readfile(path), work_dir, totals)
+                count += 1
+        else:
+            bench("模拟展开图", make_flat_pattern(), work_dir, totals)
+            count = 1
+
+    asc, binary = totals["asc"], totals["bin"]
+    print("=" * 60)
+    print(
+        f"合计 {count} 个文件 | 写出 {asc['write']:.2f}s -> {binary['write']:.2f}s | "
+        f"读取 {asc['read']:.2f}s -> {binary['read']:.2f}s | "
+        f"大小 {asc['size'] / 1024 / 1024:.1f}MB -> {binary['size'] / 1024 / 1024:.1f}MB "
+        f"({binary['size'] / max(asc['size'], 1):.0%})"
+    )
+
+
+if __name__ == "__main__":
+    main()